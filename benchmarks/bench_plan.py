@@ -0,0 +1,193 @@
+"""
+Micro-benchmarks for the plan and frontier hot paths.
+
+    python benchmarks/bench_plan.py
+    python benchmarks/bench_plan.py --out benchmarks/baseline.json
+    python benchmarks/bench_plan.py --baseline benchmarks/baseline.json --threshold 0.25
+
+Runs against a throw-away DATA_ROOT. With --baseline, exits 1 when any median is
+more than `threshold` slower than the stored one.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from collections.abc import Callable
+from dataclasses import replace
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any
+
+os.environ["DATA_ROOT"] = tempfile.mkdtemp(prefix="mlcp-bench-")  # before mlcp reads it
+
+from dags import GENERATORS  # noqa: E402
+
+from mlcp.api import frontier  # noqa: E402
+from mlcp.api.artifacts import ARTIFACTS  # noqa: E402
+from mlcp.api.db import close_all, init_db  # noqa: E402
+from mlcp.api.models import RunCreate  # noqa: E402
+from mlcp.api.plan_graph import analyze  # noqa: E402
+from mlcp.api.plan_normalize import PlanNorm, normalize_plan, plan_hash  # noqa: E402
+from mlcp.api.plan_store import persist_plan  # noqa: E402
+from mlcp.api.plan_validate import PLAN_MAX_NODES, validate_plan  # noqa: E402
+from mlcp.api.repo import create_run  # noqa: E402
+from mlcp.api.routes.runs import _frontier_for, _frontier_items, _upsert_task_status  # noqa: E402
+
+Result = dict[str, float]
+
+
+def measure(fn: Callable[[int], object], repeat: int) -> Result:
+    """Call fn(i) for i in range(repeat); per-call wall time in milliseconds."""
+    samples: list[float] = []
+    for i in range(repeat):
+        t0 = time.perf_counter_ns()
+        fn(i)
+        samples.append((time.perf_counter_ns() - t0) / 1e6)
+    return {
+        "median_ms": round(statistics.median(samples), 4),
+        "min_ms": round(min(samples), 4),
+        "mean_ms": round(statistics.fmean(samples), 4),
+        "runs": repeat,
+    }
+
+
+def _variant(norm: PlanNorm, i: int) -> PlanNorm:
+    """Same shape, different plan_hash, so every persist stores a new body."""
+    first = replace(norm.nodes[0], name=f"{norm.nodes[0].name} #{i}")
+    return replace(norm, nodes=[first, *norm.nodes[1:]])
+
+
+def bench_case(plan: dict[str, Any], repeat: int) -> dict[str, Result]:
+    out: dict[str, Result] = {}
+    text = json.dumps(plan)
+    out["validate_plan"] = measure(lambda _: validate_plan(plan, None), repeat)
+    out["validate_plan_text"] = measure(lambda _: validate_plan(None, text), repeat)
+    out["normalize_plan"] = measure(lambda _: normalize_plan(plan), repeat)
+    norm = normalize_plan(plan)
+    out["plan_hash"] = measure(lambda _: plan_hash(norm), repeat)
+
+    run_id = create_run(RunCreate(goals="benchmark")).run_id
+    variants = [_variant(norm, i) for i in range(repeat)]
+    out["persist_plan"] = measure(lambda i: persist_plan(run_id, variants[i], None), repeat)
+    ARTIFACTS.flush()
+
+    def cold(_: int) -> None:
+        frontier.FRONTIER.clear()
+        frontier._STRUCTURE.clear()
+        rf, _ver = _frontier_for(run_id, None)
+        _frontier_items(rf, rf.ready_ids())
+
+    def warm(_: int) -> None:
+        rf, _ver = _frontier_for(run_id, None)
+        _frontier_items(rf, rf.ready_ids())
+
+    out["get_frontier_cold"] = measure(cold, repeat)
+    out["get_frontier_warm"] = measure(warm, repeat)
+
+    # complete nodes in dependency order so each update moves the frontier
+    version = repeat
+    order = analyze([n.id for n in norm.nodes], norm.edges).order
+    steps = min(repeat, len(order))
+    out["upsert_task_status"] = measure(
+        lambda i: _upsert_task_status(run_id, version, order[i], "complete"), steps
+    )
+    return out
+
+
+def run(generators: list[str], sizes: list[int], repeat: int) -> dict[str, Any]:
+    init_db()
+    results: dict[str, Result] = {}
+    try:
+        for name in generators:
+            for n in sizes:
+                plan = GENERATORS[name](n)
+                ok, _errors, _stats = validate_plan(plan, None)
+                label = f"{name}/{n}"
+                print(f"{label}: {len(plan['nodes'])} nodes, {len(plan['edges'])} edges"
+                      f"{'' if ok else ' (rejected by plan limits)'}", file=sys.stderr)
+                for op, res in bench_case(plan, repeat).items():
+                    results[f"{label}/{op}"] = res
+    finally:
+        ARTIFACTS.close()
+        close_all()
+    return {
+        "meta": {
+            "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "repeat": repeat,
+        },
+        "results": results,
+    }
+
+
+def compare(
+    current: dict[str, Any], baseline: dict[str, Any], threshold: float, min_delta_ms: float
+) -> list[str]:
+    """Print current vs baseline medians; return keys that regressed beyond the threshold."""
+    regressions: list[str] = []
+    base = baseline.get("results", {})
+    print(f"{'case':<44} {'base ms':>10} {'now ms':>10} {'ratio':>7}")
+    for key, res in current["results"].items():
+        if key not in base:
+            print(f"{key:<44} {'-':>10} {res['median_ms']:>10.3f} {'new':>7}")
+            continue
+        was, now = base[key]["median_ms"], res["median_ms"]
+        ratio = now / was if was > 0 else float("inf")
+        bad = ratio > 1 + threshold and now - was > min_delta_ms
+        if bad:
+            regressions.append(key)
+        print(f"{key:<44} {was:>10.3f} {now:>10.3f} {ratio:>6.2f}x{' !' if bad else ''}")
+    return regressions
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument(
+        "--generators", nargs="+", default=sorted(GENERATORS), choices=sorted(GENERATORS)
+    )
+    parser.add_argument(
+        "--sizes", nargs="+", type=int, default=[100, PLAN_MAX_NODES, 4 * PLAN_MAX_NODES],
+        help="node counts (default: 100, PLAN_MAX_NODES and 4x PLAN_MAX_NODES)",
+    )
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--out", type=Path, help="write results as JSON")
+    parser.add_argument("--baseline", type=Path, help="compare against a stored results file")
+    parser.add_argument(
+        "--threshold", type=float, default=0.25, help="allowed slowdown (0.25 = 25%%)"
+    )
+    parser.add_argument(
+        "--min-delta-ms", type=float, default=0.05, help="ignore slowdowns below this"
+    )
+    args = parser.parse_args(argv)
+
+    current = run(args.generators, args.sizes, args.repeat)
+    if args.out:
+        args.out.write_text(json.dumps(current, indent=2) + "\n", encoding="utf-8")
+
+    if args.baseline is None:
+        for key, res in current["results"].items():
+            print(f"{key:<44} {res['median_ms']:>10.3f} ms")
+        return 0
+    regressions = compare(current, json.loads(args.baseline.read_text(encoding="utf-8")),
+                          args.threshold, args.min_delta_ms)
+    if regressions:
+        print(
+            f"\n{len(regressions)} regression(s) over {args.threshold:.0%}: "
+            f"{', '.join(regressions)}"
+        )
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
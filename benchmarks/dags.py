@@ -0,0 +1,66 @@
+"""
+Synthetic plan generators for the benchmarks. Every generator returns a plan dict in
+the shape accepted by `/v1/plan:validate` and is deterministic for a given seed.
+"""
+
+from __future__ import annotations
+
+import random
+from collections.abc import Callable
+from typing import Any
+
+Plan = dict[str, Any]
+
+_ROLES = ("developer", "tester", "product_owner")
+
+
+def _node(i: int, rng: random.Random) -> dict[str, Any]:
+    return {
+        "id": f"n{i:06d}",
+        "name": f"Task {i}",
+        "role": _ROLES[rng.randrange(len(_ROLES))],
+        "timeout_ms": rng.choice((30_000, 60_000, 120_000, 300_000)),
+        "retries": rng.randrange(3),
+    }
+
+
+def chain(n: int, seed: int = 0) -> Plan:
+    """n nodes in a single line: depth n, width 1."""
+    rng = random.Random(seed)
+    nodes = [_node(i, rng) for i in range(n)]
+    edges = [[nodes[i]["id"], nodes[i + 1]["id"]] for i in range(n - 1)]
+    return {"schema_version": "1", "nodes": nodes, "edges": edges}
+
+
+def fan(n: int, seed: int = 0) -> Plan:
+    """One source fanning out to n - 2 parallel nodes that fan back in to one sink."""
+    rng = random.Random(seed)
+    nodes = [_node(i, rng) for i in range(max(n, 2))]
+    src, sink = nodes[0]["id"], nodes[-1]["id"]
+    edges: list[list[str]] = []
+    for node in nodes[1:-1]:
+        edges.append([src, node["id"]])
+        edges.append([node["id"], sink])
+    if len(nodes) == 2:
+        edges.append([src, sink])
+    return {"schema_version": "1", "nodes": nodes, "edges": edges}
+
+
+def layered(n: int, seed: int = 0, width: int = 16, fan_in: int = 3) -> Plan:
+    """
+    Random layered DAG: nodes are dealt into layers of up to `width`, and every node
+    outside the first layer draws up to `fan_in` predecessors from the previous layer
+    (about fan_in * n edges).
+    """
+    rng = random.Random(seed)
+    nodes = [_node(i, rng) for i in range(n)]
+    layers = [nodes[i : i + width] for i in range(0, n, width)]
+    edges: list[list[str]] = []
+    for prev, layer in zip(layers, layers[1:]):
+        for node in layer:
+            for pred in rng.sample(prev, min(fan_in, len(prev))):
+                edges.append([pred["id"], node["id"]])
+    return {"schema_version": "1", "nodes": nodes, "edges": edges}
+
+
+GENERATORS: dict[str, Callable[..., Plan]] = {"chain": chain, "fan": fan, "layered": layered}
@@ -0,0 +1,300 @@
+"""
+End-to-end load generator: N simulated agents drive runs through their whole
+lifecycle (create run, seal a plan, poll the frontier, complete/fail nodes) and the
+tool reports throughput and per-route latency percentiles.
+
+    python benchmarks/load.py --agents 32 --runs 4 --shape layered --nodes 60
+    python benchmarks/load.py --mode uvicorn --agents 64 --poll long --json load.json
+    python benchmarks/load.py --url http://127.0.0.1:8081 --agents 16
+
+Modes: `inprocess` (default) serves create_app() over httpx's ASGI transport in this
+event loop; `uvicorn` starts a real server subprocess. Both use a fresh temporary
+DATA_ROOT unless --data-root names one explicitly. --url targets a server that is
+already running. Requires httpx (dev extra).
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import random
+import re
+import socket
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter, defaultdict
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
+
+import httpx
+
+from dags import GENERATORS
+
+_LOCK_RE = re.compile(r"database is (locked|busy)|SQLITE_BUSY", re.IGNORECASE)
+
+
+@dataclass
+class Stats:
+    latencies: dict[str, list[float]] = field(default_factory=lambda: defaultdict(list))
+    statuses: dict[str, Counter[int]] = field(default_factory=lambda: defaultdict(Counter))
+    lock_errors: int = 0
+    other_errors: Counter[str] = field(default_factory=Counter)
+    runs_done: int = 0
+    nodes_done: int = 0
+
+
+class Agent:
+    def __init__(
+        self, client: httpx.AsyncClient, stats: Stats, args: argparse.Namespace, seed: int
+    ) -> None:
+        self.client = client
+        self.stats = stats
+        self.args = args
+        self.rng = random.Random(seed)
+
+    async def call(self, method: str, route: str, *, params: dict[str, Any] | None = None,
+                   json_body: Any = None, **path: str) -> httpx.Response | None:
+        """Issue one request, recording latency and status under the route template."""
+        t0 = time.perf_counter()
+        try:
+            resp = await self.client.request(
+                method, route.format(**path), params=params, json=json_body
+            )
+        except sqlite3.OperationalError as exc:  # in-process mode surfaces server exceptions
+            self.stats.latencies[f"{method} {route}"].append(time.perf_counter() - t0)
+            if _LOCK_RE.search(str(exc)):
+                self.stats.lock_errors += 1
+            else:
+                self.stats.other_errors[type(exc).__name__] += 1
+            return None
+        except (httpx.HTTPError, RuntimeError) as exc:
+            self.stats.other_errors[type(exc).__name__] += 1
+            return None
+        key = f"{method} {route}"
+        self.stats.latencies[key].append(time.perf_counter() - t0)
+        self.stats.statuses[key][resp.status_code] += 1
+        return resp
+
+    async def think(self) -> None:
+        if self.args.think_ms > 0:
+            await asyncio.sleep(self.args.think_ms * self.rng.uniform(0.5, 1.5) / 1000.0)
+
+    async def run_once(self) -> None:
+        r = await self.call("POST", "/v1/runs", json_body={"goals": "load test"})
+        if r is None or r.status_code != 201:
+            return
+        run_id = r.json()["run_id"]
+        plan = GENERATORS[self.args.shape](self.args.nodes, seed=self.rng.randrange(1 << 30))
+        r = await self.call(
+            "POST", "/v1/runs/{run_id}/plan:seal", json_body={"plan": plan}, run_id=run_id
+        )
+        if r is None or r.status_code != 200:
+            return
+
+        cursor: str | None = None
+        backlog: list[str] = []
+        while True:
+            if self.args.poll == "long":
+                # the cursor only reports nodes once, so keep what we have not worked on yet
+                r = await self.call("GET", "/v1/runs/{run_id}/frontier:poll", run_id=run_id,
+                                    params={"timeout_sec": 0 if backlog else 0.5,
+                                            **({"since": cursor} if cursor else {})})
+                if r is None or r.status_code != 200:
+                    return
+                body = r.json()
+                cursor = body["cursor"]
+                fresh = [n["node_id"] for n in body["nodes"]]
+                if body["reset"]:
+                    backlog = fresh
+                else:
+                    backlog += [n for n in fresh if n not in backlog]
+                if not backlog:
+                    r = await self.call("GET", "/v1/runs/{run_id}/frontier", run_id=run_id)
+                    if r is None or r.status_code != 200:
+                        return
+                    backlog = [n["node_id"] for n in r.json()]
+                    if not backlog:
+                        break
+            else:
+                r = await self.call("GET", "/v1/runs/{run_id}/frontier", run_id=run_id)
+                if r is None or r.status_code != 200:
+                    return
+                backlog = [n["node_id"] for n in r.json()]
+                if not backlog:
+                    break
+            batch, backlog = backlog[: self.args.slots], backlog[self.args.slots :]
+            await asyncio.gather(*(self.work(run_id, nid) for nid in batch))
+        self.stats.runs_done += 1
+
+    async def work(self, run_id: str, node_id: str) -> None:
+        await self.think()
+        outcome = "fail" if self.rng.random() < self.args.fail_rate else "complete"
+        r = await self.call("POST", f"/v1/runs/{{run_id}}/tasks/{{node_id}}:{outcome}",
+                            run_id=run_id, node_id=node_id)
+        if r is not None and r.status_code == 200:
+            self.stats.nodes_done += 1
+
+    async def run(self) -> None:
+        for _ in range(self.args.runs):
+            await self.run_once()
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return int(s.getsockname()[1])
+
+
+@asynccontextmanager
+async def _client(args: argparse.Namespace, log_path: Path) -> AsyncIterator[httpx.AsyncClient]:
+    limits = httpx.Limits(max_connections=args.agents * args.slots + 8)
+    timeout = httpx.Timeout(60.0)
+    if args.url:
+        async with httpx.AsyncClient(base_url=args.url, limits=limits, timeout=timeout) as client:
+            yield client
+        return
+
+    # never the caller's DATA_ROOT by accident: the run writes runs, plans and artifacts
+    os.environ["DATA_ROOT"] = str(args.data_root or tempfile.mkdtemp(prefix="mlcp-load-"))
+    if args.mode == "inprocess":
+        from mlcp.api.main import create_app
+
+        app = create_app()
+        async with app.router.lifespan_context(app):
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(
+                transport=transport, base_url="http://mlcp", timeout=timeout
+            ) as client:
+                yield client
+        return
+
+    port = _free_port()
+    with log_path.open("wb") as log:
+        proc = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "mlcp.api.main:app", "--host", "127.0.0.1",
+             "--port", str(port), "--log-level", "warning"],
+            stdout=log, stderr=subprocess.STDOUT, env=os.environ.copy(),
+        )
+        try:
+            async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", limits=limits,
+                                         timeout=timeout) as client:
+                for _ in range(100):
+                    try:
+                        if (await client.get("/health")).status_code == 200:
+                            break
+                    except httpx.TransportError:
+                        await asyncio.sleep(0.1)
+                else:
+                    raise SystemExit(f"server did not start; see {log_path}")
+                yield client
+        finally:
+            proc.terminate()
+            proc.wait(timeout=30)
+
+
+def _pct(sorted_vals: list[float], p: float) -> float:
+    """Nearest-rank percentile of an ascending list."""
+    if not sorted_vals:
+        return 0.0
+    k = max(0, min(len(sorted_vals) - 1, int(round(p / 100.0 * len(sorted_vals) + 0.5)) - 1))
+    return sorted_vals[k]
+
+
+def report(stats: Stats, elapsed: float, server_lock_lines: int) -> dict[str, Any]:
+    routes: dict[str, Any] = {}
+    total = 0
+    for route, vals in sorted(stats.latencies.items()):
+        vals.sort()
+        total += len(vals)
+        codes = stats.statuses.get(route, Counter())
+        routes[route] = {
+            "count": len(vals),
+            "rps": round(len(vals) / elapsed, 1),
+            "p50_ms": round(_pct(vals, 50) * 1000, 2),
+            "p95_ms": round(_pct(vals, 95) * 1000, 2),
+            "p99_ms": round(_pct(vals, 99) * 1000, 2),
+            "max_ms": round(vals[-1] * 1000, 2),
+            "errors": sum(n for code, n in codes.items() if code >= 500),
+            "statuses": {str(k): v for k, v in sorted(codes.items())},
+        }
+    return {
+        "elapsed_sec": round(elapsed, 3),
+        "requests": total,
+        "throughput_rps": round(total / elapsed, 1) if elapsed else 0.0,
+        "runs_completed": stats.runs_done,
+        "nodes_finished": stats.nodes_done,
+        "sqlite_lock_errors": stats.lock_errors + server_lock_lines,
+        "client_errors": dict(stats.other_errors),
+        "routes": routes,
+    }
+
+
+def print_report(rep: dict[str, Any]) -> None:
+    print(f"{rep['requests']} requests in {rep['elapsed_sec']}s = {rep['throughput_rps']} req/s; "
+          f"runs completed {rep['runs_completed']}, nodes finished {rep['nodes_finished']}, "
+          f"sqlite lock/busy errors {rep['sqlite_lock_errors']}")
+    if rep["client_errors"]:
+        print(f"client errors: {rep['client_errors']}")
+    print(f"{'route':<52} {'count':>7} {'rps':>8} {'p50':>8} {'p95':>8} {'p99':>8} "
+          f"{'max':>8} {'5xx':>5}")
+    for route, r in rep["routes"].items():
+        print(f"{route:<52} {r['count']:>7} {r['rps']:>8} {r['p50_ms']:>8} {r['p95_ms']:>8} "
+              f"{r['p99_ms']:>8} {r['max_ms']:>8} {r['errors']:>5}")
+
+
+async def main_async(args: argparse.Namespace) -> dict[str, Any]:
+    stats = Stats()
+    log_path = Path(tempfile.gettempdir()) / f"mlcp-load-server-{os.getpid()}.log"
+    async with _client(args, log_path) as client:
+        agents = [Agent(client, stats, args, seed=args.seed + i) for i in range(args.agents)]
+        t0 = time.perf_counter()
+        await asyncio.gather(*(a.run() for a in agents))
+        elapsed = time.perf_counter() - t0
+    server_locks = 0
+    if args.mode == "uvicorn" and not args.url and log_path.exists():
+        lines = log_path.read_text(errors="replace").splitlines()
+        server_locks = sum(1 for line in lines if _LOCK_RE.search(line))
+    return report(stats, elapsed, server_locks)
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--mode", choices=("inprocess", "uvicorn"), default="inprocess")
+    parser.add_argument("--url", help="target an already running API instead of starting one")
+    parser.add_argument("--data-root", type=Path,
+                        help="serve from this DATA_ROOT instead of a fresh temporary one")
+    parser.add_argument("--agents", type=int, default=16, help="concurrent simulated agents")
+    parser.add_argument("--runs", type=int, default=2, help="runs each agent drives to completion")
+    parser.add_argument("--shape", choices=sorted(GENERATORS), default="layered")
+    parser.add_argument("--nodes", type=int, default=40, help="nodes per plan")
+    parser.add_argument("--slots", type=int, default=4,
+                        help="ready nodes an agent works on at once")
+    parser.add_argument("--think-ms", type=float, default=5.0, help="mean work time per node")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="probability a node is failed")
+    parser.add_argument("--poll", choices=("get", "long"), default="get",
+                        help="GET /frontier each step, or long-poll frontier:poll with a cursor")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", type=Path, help="also write the report as JSON")
+    args = parser.parse_args(argv)
+
+    logging.getLogger("httpx").setLevel(logging.WARNING)  # one INFO line per request otherwise
+    rep = asyncio.run(main_async(args))
+    print_report(rep)
+    if args.json:
+        args.json.write_text(json.dumps(rep, indent=2) + "\n", encoding="utf-8")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
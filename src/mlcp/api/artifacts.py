@@ -0,0 +1,394 @@
+from __future__ import annotations
+
+import gzip
+import os
+import queue
+import shutil
+import sqlite3
+import threading
+import time
+import zlib
+from collections.abc import Iterator
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+from mlcp.common.config import config_value
+from mlcp.common.logger import get_logger
+from mlcp.common.metrics import REGISTRY
+
+from .db import connect, transaction
+
+_LOG = get_logger(__name__)
+
+ARTIFACT_QUEUE_MAX = int(os.getenv("MLCP_ARTIFACT_QUEUE_MAX", "1024"))
+ARTIFACT_BATCH_MAX = int(os.getenv("MLCP_ARTIFACT_BATCH_MAX", "256"))
+ARTIFACT_LINGER_SEC = float(os.getenv("MLCP_ARTIFACT_LINGER_MS", "50")) / 1000.0
+ARTIFACT_SEGMENT_BYTES = int(os.getenv("MLCP_ARTIFACT_SEGMENT_BYTES", str(64 * 1024 * 1024)))
+ARTIFACT_ROTATE_SEC = float(os.getenv("MLCP_ARTIFACT_ROTATE_SEC", "3600"))
+ARTIFACT_GZIP_LEVEL = int(os.getenv("MLCP_ARTIFACT_GZIP_LEVEL", "6"))
+# a batch that keeps failing with I/O or lock errors is retried this many times, then dropped
+ARTIFACT_WRITE_ATTEMPTS = max(1, int(os.getenv("MLCP_ARTIFACT_WRITE_ATTEMPTS", "5")))
+ARTIFACT_RETRY_SEC = float(os.getenv("MLCP_ARTIFACT_RETRY_MS", "200")) / 1000.0
+
+ARTIFACTS_TOTAL = REGISTRY.counter(
+    "mlcp_artifacts_total", "Audit artifacts by write outcome.", ("result",)
+)
+
+MEDIA_TYPES: dict[str, str] = {"yaml": "application/yaml", "json": "application/json"}
+
+_SEGMENTS = Path("layers") / "artifacts"
+_ARCHIVED_SEGMENTS = Path("archive") / "artifacts"
+_LEGACY_PLANS = Path("layers") / "plans"
+_ARCHIVED_PLANS = Path("archive") / "plans"
+_CHUNK = 64 * 1024
+
+
+def data_root() -> Path:
+    return Path(os.getenv("DATA_ROOT", "./workspace")).resolve()
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def retain_days() -> int:
+    return int(config_value("mlcp.temporal.retain_days", 30))
+
+
+@dataclass(frozen=True, slots=True)
+class Artifact:
+    run_id: str
+    version: int
+    kind: str  # 'yaml' | 'json'
+    text: str
+
+
+@dataclass(frozen=True, slots=True)
+class StoredArtifact:
+    """
+    Location of one artifact: a gzip member at [offset, offset + length) of a segment,
+    a plain legacy file (gzipped=False), or the raw bytes while still queued.
+    """
+
+    kind: str
+    path: Path | None
+    offset: int
+    length: int
+    gzipped: bool
+    data: bytes | None = None
+
+    def iter_bytes(self, *, compressed: bool) -> Iterator[bytes]:
+        """Yield the artifact gzip-encoded (`compressed`) or decoded, in bounded chunks."""
+        if self.data is not None:
+            if compressed:
+                yield gzip.compress(self.data, ARTIFACT_GZIP_LEVEL, mtime=0)
+            else:
+                yield self.data
+            return
+        assert self.path is not None
+        chunks = _read_range(self.path, self.offset, self.length)
+        if self.gzipped == compressed:
+            yield from chunks
+            return
+        if self.gzipped:
+            dec = zlib.decompressobj(wbits=31)
+            out = (dec.decompress(chunk) for chunk in chunks)
+            yield from (b for b in out if b)
+            yield dec.flush()
+        else:
+            enc = zlib.compressobj(ARTIFACT_GZIP_LEVEL, wbits=31)
+            out = (enc.compress(chunk) for chunk in chunks)
+            yield from (b for b in out if b)
+            yield enc.flush()
+
+
+def _read_range(path: Path, offset: int, length: int) -> Iterator[bytes]:
+    with path.open("rb") as f:
+        f.seek(offset)
+        left = length
+        while left > 0:
+            chunk = f.read(min(_CHUNK, left))
+            if not chunk:
+                break
+            left -= len(chunk)
+            yield chunk
+
+
+class ArtifactStore:
+    """
+    Audit artifacts (the raw or normalized plan of every sealed version), written off
+    the request path. A background thread drains a bounded queue in batches, appends
+    each artifact as its own gzip member to the current per-day segment
+    (layers/artifacts/<YYYY-MM-DD>/segment-<pid>-<n>.gz) and records its byte range in
+    `plan_artifacts`, so one artifact is read back with a seek. Segments are named by
+    pid so that each API process appends only to its own files. Failed batches stay
+    readable while they are retried and are counted in mlcp_artifacts_total. Every
+    ARTIFACT_ROTATE_SEC the thread moves day directories and legacy per-run folders
+    older than `temporal.retain_days` into archive/.
+    When the queue is full, `submit` blocks (backpressure).
+    """
+
+    def __init__(self, max_queue: int = ARTIFACT_QUEUE_MAX) -> None:
+        self._queue: queue.Queue[Artifact | None] = queue.Queue(maxsize=max(1, max_queue))
+        self._pending: dict[tuple[str, int], Artifact] = {}
+        self._thread: threading.Thread | None = None
+        self._lock = threading.Lock()
+        self._segment: Path | None = None
+
+    def start(self) -> None:
+        if self._thread is None or not self._thread.is_alive():
+            with self._lock:
+                if self._thread is None or not self._thread.is_alive():
+                    self._thread = threading.Thread(
+                        target=self._run, name="mlcp-artifacts", daemon=True
+                    )
+                    self._thread.start()
+
+    def submit(self, run_id: str, version: int, kind: str, text: str) -> None:
+        item = Artifact(run_id, version, kind, text)
+        self.start()
+        with self._lock:
+            self._pending[(run_id, version)] = item
+        self._queue.put(item)
+
+    # --- writer thread -------------------------------------------------
+
+    def _run(self) -> None:
+        next_rotate = time.monotonic()
+        while True:
+            # checked every pass: under steady writes the get below never times out
+            if time.monotonic() >= next_rotate:
+                self._rotate_logged()
+                next_rotate = time.monotonic() + ARTIFACT_ROTATE_SEC
+            try:
+                first = self._queue.get(timeout=max(0.0, next_rotate - time.monotonic()))
+            except queue.Empty:
+                continue
+            batch, stop = self._gather(first)
+            try:
+                if batch:
+                    self._write_retrying(batch)
+            finally:
+                with self._lock:
+                    for a in batch:
+                        if self._pending.get((a.run_id, a.version)) is a:
+                            del self._pending[(a.run_id, a.version)]
+                for _ in range(len(batch) + stop):
+                    self._queue.task_done()
+            if stop:
+                return
+
+    def _gather(self, first: Artifact | None) -> tuple[list[Artifact], bool]:
+        """Collect up to ARTIFACT_BATCH_MAX items, lingering briefly for stragglers."""
+        if first is None:
+            return [], True
+        batch = [first]
+        deadline = time.monotonic() + ARTIFACT_LINGER_SEC
+        while len(batch) < ARTIFACT_BATCH_MAX:
+            remaining = deadline - time.monotonic()
+            try:
+                if remaining > 0:
+                    item = self._queue.get(timeout=remaining)
+                else:
+                    item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is None:
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    def _write_retrying(self, batch: list[Artifact]) -> None:
+        """Write `batch`, retrying I/O and lock errors; count it as dropped when they persist."""
+        for attempt in range(1, ARTIFACT_WRITE_ATTEMPTS + 1):
+            try:
+                self._write(batch)
+            except (OSError, sqlite3.OperationalError) as exc:
+                # disk full / locked / busy: the batch stays in _pending, so reads still see it
+                self._segment = None
+                if attempt < ARTIFACT_WRITE_ATTEMPTS:
+                    _LOG.warning(
+                        "artifact_write_retry", count=len(batch), attempt=attempt, error=str(exc)
+                    )
+                    ARTIFACTS_TOTAL.inc(len(batch), result="retried")
+                    time.sleep(ARTIFACT_RETRY_SEC * attempt)
+                    continue
+                error: Exception = exc
+            except sqlite3.Error as exc:
+                error = exc
+            else:
+                ARTIFACTS_TOTAL.inc(len(batch), result="written")
+                return
+            _LOG.error("artifact_write_failed", count=len(batch), error=str(error))
+            ARTIFACTS_TOTAL.inc(len(batch), result="dropped")
+            return
+
+    def _segment_for(self, root: Path, day: str) -> Path:
+        prefix = f"segment-{os.getpid()}-"
+        current = self._segment
+        if (
+            current is not None
+            and current.parent.name == day
+            and current.name.startswith(prefix)
+            and current.is_relative_to(root)
+            and (not current.exists() or current.stat().st_size < ARTIFACT_SEGMENT_BYTES)
+        ):
+            return current
+        day_dir = root / _SEGMENTS / day
+        day_dir.mkdir(parents=True, exist_ok=True)
+        numbers = [int(p.stem.rsplit("-", 1)[1]) for p in day_dir.glob(f"{prefix}*.gz")]
+        n = max(numbers, default=0)
+        seg = day_dir / f"{prefix}{n}.gz"
+        if seg.exists() and seg.stat().st_size >= ARTIFACT_SEGMENT_BYTES:
+            seg = day_dir / f"{prefix}{n + 1}.gz"
+        self._segment = seg
+        return seg
+
+    def _write(self, batch: list[Artifact]) -> None:
+        root = data_root()
+        now = _utcnow()
+        seg = self._segment_for(root, now.date().isoformat())
+        raw = [a.text.encode("utf-8") for a in batch]
+        members = [gzip.compress(b, ARTIFACT_GZIP_LEVEL, mtime=0) for b in raw]
+        # only this process appends to `seg`, so the end offset cannot move under us
+        with seg.open("ab") as f:
+            base = f.seek(0, os.SEEK_END)
+            f.write(b"".join(members))
+            f.flush()
+            os.fsync(f.fileno())
+
+        rel = seg.relative_to(root).as_posix()
+        created = now.isoformat(timespec="seconds")
+        rows: list[tuple[str, int, str, str, int, int, int, str]] = []
+        offset = base
+        for a, b, m in zip(batch, raw, members):
+            rows.append((a.run_id, a.version, a.kind, rel, offset, len(m), len(b), created))
+            offset += len(m)
+        conn = connect()
+        with transaction(conn):
+            conn.executemany(
+                "INSERT OR REPLACE INTO plan_artifacts(run_id, plan_version, kind, segment,"
+                " byte_offset, byte_length, size, created_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+        _LOG.debug("artifacts_written", segment=rel, count=len(batch), bytes=offset - base)
+
+    # --- retention -----------------------------------------------------
+
+    def _rotate_logged(self) -> None:
+        try:
+            self.rotate()
+        except (OSError, sqlite3.Error) as exc:
+            _LOG.error("artifact_rotation_failed", error=str(exc))
+
+    def rotate(self, now: datetime | None = None) -> int:
+        """
+        Move segment day directories and legacy layers/plans/<run_id> folders older
+        than `temporal.retain_days` into archive/. Returns the number of folders moved.
+        """
+        root = data_root()
+        now = now or _utcnow()
+        cutoff = now - timedelta(days=retain_days())
+        moved = 0
+
+        seg_root = root / _SEGMENTS
+        if seg_root.is_dir():
+            for day_dir in sorted(seg_root.iterdir()):
+                if not day_dir.is_dir() or day_dir.name >= cutoff.date().isoformat():
+                    continue
+                if self._segment is not None and self._segment.parent == day_dir:
+                    self._segment = None
+                _move_dir(day_dir, root / _ARCHIVED_SEGMENTS / day_dir.name)
+                old_prefix = (_SEGMENTS / day_dir.name).as_posix() + "/"
+                new_prefix = (_ARCHIVED_SEGMENTS / day_dir.name).as_posix() + "/"
+                conn = connect()
+                with transaction(conn):
+                    conn.execute(
+                        "UPDATE plan_artifacts SET segment = ? || substr(segment, ?) "
+                        "WHERE segment LIKE ?",
+                        (new_prefix, len(old_prefix) + 1, old_prefix + "%"),
+                    )
+                moved += 1
+
+        plans_root = root / _LEGACY_PLANS
+        if plans_root.is_dir():
+            cutoff_ts = cutoff.timestamp()
+            for run_dir in plans_root.iterdir():
+                if not run_dir.is_dir():
+                    continue
+                newest = max(
+                    (p.stat().st_mtime for p in run_dir.iterdir()),
+                    default=run_dir.stat().st_mtime,
+                )
+                if newest < cutoff_ts:
+                    _move_dir(run_dir, root / _ARCHIVED_PLANS / run_dir.name)
+                    moved += 1
+
+        if moved:
+            _LOG.info("artifacts_rotated", folders=moved, retain_days=retain_days())
+        return moved
+
+    # --- readers -------------------------------------------------------
+
+    def open(self, run_id: str, version: int) -> StoredArtifact | None:
+        """Locate the artifact of (run_id, version): queued, segmented, or a legacy plain file."""
+        with self._lock:
+            queued = self._pending.get((run_id, version))
+        if queued is not None:
+            data = queued.text.encode("utf-8")
+            return StoredArtifact(queued.kind, None, 0, len(data), False, data)
+
+        root = data_root()
+        row = connect().execute(
+            "SELECT kind, segment, byte_offset, byte_length FROM plan_artifacts "
+            "WHERE run_id = ? AND plan_version = ?",
+            (run_id, version),
+        ).fetchone()
+        if row is not None:
+            path = root / str(row["segment"])
+            if not path.exists():
+                # rotated between the lookup and the index update
+                if not path.is_relative_to(root / _SEGMENTS):
+                    return None
+                path = root / _ARCHIVED_SEGMENTS / path.relative_to(root / _SEGMENTS)
+                if not path.exists():
+                    return None
+            return StoredArtifact(
+                str(row["kind"]), path, int(row["byte_offset"]), int(row["byte_length"]), True
+            )
+
+        for base in (root / _LEGACY_PLANS / run_id, root / _ARCHIVED_PLANS / run_id):
+            for kind in MEDIA_TYPES:
+                path = base / f"v{version}.{kind}"
+                if path.is_file():
+                    return StoredArtifact(kind, path, 0, path.stat().st_size, False)
+        return None
+
+    def flush(self) -> None:
+        """Block until every submitted artifact has been written."""
+        if self._thread is not None and self._thread.is_alive():
+            self._queue.join()
+
+    def close(self) -> None:
+        """Drain the queue and stop the writer thread (on shutdown)."""
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None and thread.is_alive():
+            self._queue.put(None)
+            thread.join()
+        self._segment = None
+
+
+def _move_dir(src: Path, dest: Path) -> None:
+    """Rename `src` to `dest`, merging file by file if `dest` already exists."""
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    if not dest.exists():
+        shutil.move(str(src), str(dest))
+        return
+    for p in src.iterdir():
+        shutil.move(str(p), str(dest / p.name))
+    src.rmdir()
+
+
+ARTIFACTS = ArtifactStore()
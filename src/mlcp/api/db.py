@@ -1,130 +1,486 @@
 from __future__ import annotations
 
+import asyncio
+import contextvars
+import functools
+import json
 import os
+import re
 import sqlite3
+import threading
+import time
+from collections.abc import Callable, Iterable, Iterator
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from pathlib import Path
-from typing import Final
+from typing import Any, Final, ParamSpec, TypeAlias, TypeVar
 
 from mlcp.common.logger import get_logger
+from mlcp.common.metrics import REGISTRY, SQL_BUCKETS, add_request_sql
 
 _LOG = get_logger(__name__)
 _DB_NAME: Final[str] = "mlcp.db"
 
+P = ParamSpec("P")
+R = TypeVar("R")
 
-def _db_path() -> Path:
-    root = Path(os.getenv("DATA_ROOT", "./workspace")) / "db"
-    root.mkdir(parents=True, exist_ok=True)
-    return root / _DB_NAME
+Step: TypeAlias = str | Callable[[sqlite3.Connection], None]
 
 
-def connect() -> sqlite3.Connection:
-    """Open a SQLite connection in WAL mode with safe defaults and ensure schema."""
-    path = _db_path()
-    conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
-    conn.row_factory = sqlite3.Row
-    with conn:
-        conn.execute("PRAGMA journal_mode=WAL;")
-        conn.execute("PRAGMA foreign_keys=ON;")
+def _move_plans_to_content_store(conn: sqlite3.Connection) -> None:
+    """v4: copy per-version plan rows into the plan_hash-keyed tables, compressing bodies."""
+    from .plan_codec import compress_body, encode_gates
 
-        # existing runs table
+    # one real (run_id, plan_version) row per hash: its body, nodes and edges belong together
+    bodies = conn.execute(
+        "SELECT plan_hash, created_at, run_id, plan_version, body_json FROM ("
+        " SELECT p.plan_hash, p.created_at, p.run_id, p.plan_version, j.body_json,"
+        "  ROW_NUMBER() OVER (PARTITION BY p.plan_hash"
+        "   ORDER BY p.created_at, p.run_id, p.plan_version) AS rn"
+        " FROM plans p JOIN plan_json j ON j.run_id = p.run_id AND j.plan_version = p.plan_version"
+        ") WHERE rn = 1"
+    ).fetchall()
+    for b in bodies:
+        key = (str(b["run_id"]), int(b["plan_version"]))
+        body = str(b["body_json"])
+        parsed = json.loads(body)
         conn.execute(
-            """
-            CREATE TABLE IF NOT EXISTS runs (
-              run_id      TEXT PRIMARY KEY,
-              state       TEXT NOT NULL,
-              goals       TEXT NOT NULL,
-              project     TEXT NOT NULL,
-              owner       TEXT NOT NULL,
-              plan_sealed INTEGER NOT NULL DEFAULT 0,
-              created_at  TEXT NOT NULL,
-              updated_at  TEXT NOT NULL
-            )
-            """
+            "INSERT INTO plan_bodies(plan_hash, body_z, nodes, edges, created_at) "
+            "VALUES (?, ?, ?, ?, ?)",
+            (b["plan_hash"], compress_body(body), len(parsed.get("nodes", [])),
+             len(parsed.get("edges", [])), b["created_at"]),
+        )
+        nodes = conn.execute(
+            "SELECT node_id, role, retries, timeout_ms, gates_json, "
+            "topo_index, level, in_degree, out_degree "
+            "FROM plan_nodes WHERE run_id = ? AND plan_version = ?",
+            key,
+        ).fetchall()
+        conn.executemany(
+            "INSERT INTO plan_body_nodes(plan_hash, node_id, role, retries, timeout_ms, gates_mask,"
+            " topo_index, level, in_degree, out_degree) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            [
+                (b["plan_hash"], n["node_id"], n["role"], n["retries"], n["timeout_ms"],
+                 encode_gates(json.loads(n["gates_json"])), n["topo_index"], n["level"],
+                 n["in_degree"], n["out_degree"])
+                for n in nodes
+            ],
         )
-
-        # plan metadata (versioned per run)
         conn.execute(
-            """
-            CREATE TABLE IF NOT EXISTS plans (
-              run_id       TEXT NOT NULL,
-              plan_version INTEGER NOT NULL,
-              plan_hash    TEXT NOT NULL,
-              created_at   TEXT NOT NULL,
-              PRIMARY KEY (run_id, plan_version),
-              FOREIGN KEY (run_id) REFERENCES runs(run_id) ON DELETE CASCADE
-            )
-            """
+            "INSERT OR IGNORE INTO plan_body_edges(plan_hash, src, dst) "
+            "SELECT ?, src, dst FROM plan_edges WHERE run_id = ? AND plan_version = ?",
+            (b["plan_hash"], *key),
         )
 
+
+# Ordered schema migrations; entry N brings `PRAGMA user_version` from N to N+1.
+_MIGRATIONS: Final[tuple[tuple[Step, ...], ...]] = (
+    (
+        # existing runs table
+        """
+        CREATE TABLE IF NOT EXISTS runs (
+          run_id      TEXT PRIMARY KEY,
+          state       TEXT NOT NULL,
+          goals       TEXT NOT NULL,
+          project     TEXT NOT NULL,
+          owner       TEXT NOT NULL,
+          plan_sealed INTEGER NOT NULL DEFAULT 0,
+          created_at  TEXT NOT NULL,
+          updated_at  TEXT NOT NULL
+        )
+        """,
+        # plan metadata (versioned per run)
+        """
+        CREATE TABLE IF NOT EXISTS plans (
+          run_id       TEXT NOT NULL,
+          plan_version INTEGER NOT NULL,
+          plan_hash    TEXT NOT NULL,
+          created_at   TEXT NOT NULL,
+          PRIMARY KEY (run_id, plan_version),
+          FOREIGN KEY (run_id) REFERENCES runs(run_id) ON DELETE CASCADE
+        )
+        """,
         # normalized plan JSON blob (authoritative runtime form)
-        conn.execute(
-            """
-            CREATE TABLE IF NOT EXISTS plan_json (
-              run_id       TEXT NOT NULL,
-              plan_version INTEGER NOT NULL,
-              body_json    TEXT NOT NULL,
-              FOREIGN KEY (run_id, plan_version) REFERENCES plans(run_id, plan_version) ON DELETE CASCADE
-            )
-            """
+        """
+        CREATE TABLE IF NOT EXISTS plan_json (
+          run_id       TEXT NOT NULL,
+          plan_version INTEGER NOT NULL,
+          body_json    TEXT NOT NULL,
+          FOREIGN KEY (run_id, plan_version) REFERENCES plans(run_id, plan_version) ON DELETE CASCADE
         )
-
+        """,
         # per-node index (fast lookups by task id)
-        conn.execute(
-            """
-            CREATE TABLE IF NOT EXISTS plan_nodes (
-              run_id       TEXT NOT NULL,
-              plan_version INTEGER NOT NULL,
-              node_id      TEXT NOT NULL,
-              role         TEXT NOT NULL,
-              retries      INTEGER NOT NULL,
-              timeout_ms   INTEGER NOT NULL,
-              gates_json   TEXT NOT NULL,
-              PRIMARY KEY (run_id, plan_version, node_id),
-              FOREIGN KEY (run_id, plan_version) REFERENCES plans(run_id, plan_version) ON DELETE CASCADE
-            )
-            """
+        """
+        CREATE TABLE IF NOT EXISTS plan_nodes (
+          run_id       TEXT NOT NULL,
+          plan_version INTEGER NOT NULL,
+          node_id      TEXT NOT NULL,
+          role         TEXT NOT NULL,
+          retries      INTEGER NOT NULL,
+          timeout_ms   INTEGER NOT NULL,
+          gates_json   TEXT NOT NULL,
+          PRIMARY KEY (run_id, plan_version, node_id),
+          FOREIGN KEY (run_id, plan_version) REFERENCES plans(run_id, plan_version) ON DELETE CASCADE
         )
-
+        """,
         # edges index (fast fan-out queries)
-        conn.execute(
-            """
-            CREATE TABLE IF NOT EXISTS plan_edges (
-              run_id       TEXT NOT NULL,
-              plan_version INTEGER NOT NULL,
-              src          TEXT NOT NULL,
-              dst          TEXT NOT NULL,
-              FOREIGN KEY (run_id, plan_version)
-                REFERENCES plans(run_id, plan_version)
-                ON DELETE CASCADE
-            )
-            """
-        )
-
-        conn.execute(
-            "CREATE INDEX IF NOT EXISTS idx_plan_edges_frontier "
-            "ON plan_edges(run_id, plan_version, src)"
+        """
+        CREATE TABLE IF NOT EXISTS plan_edges (
+          run_id       TEXT NOT NULL,
+          plan_version INTEGER NOT NULL,
+          src          TEXT NOT NULL,
+          dst          TEXT NOT NULL,
+          FOREIGN KEY (run_id, plan_version)
+            REFERENCES plans(run_id, plan_version)
+            ON DELETE CASCADE
         )
-
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_plan_edges_frontier "
+        "ON plan_edges(run_id, plan_version, src)",
         # task states per run & plan version
-        conn.execute(
-            """
-            CREATE TABLE IF NOT EXISTS run_tasks (
-              run_id       TEXT NOT NULL,
-              plan_version INTEGER NOT NULL,
-              node_id      TEXT NOT NULL,
-              status       TEXT NOT NULL,  -- pending|complete|failed
-              updated_at   TEXT NOT NULL,
-              PRIMARY KEY (run_id, plan_version, node_id),
-              FOREIGN KEY (run_id, plan_version)
-                REFERENCES plans(run_id, plan_version)
-                ON DELETE CASCADE
-            )
-            """
+        """
+        CREATE TABLE IF NOT EXISTS run_tasks (
+          run_id       TEXT NOT NULL,
+          plan_version INTEGER NOT NULL,
+          node_id      TEXT NOT NULL,
+          status       TEXT NOT NULL,  -- pending|complete|failed
+          updated_at   TEXT NOT NULL,
+          PRIMARY KEY (run_id, plan_version, node_id),
+          FOREIGN KEY (run_id, plan_version)
+            REFERENCES plans(run_id, plan_version)
+            ON DELETE CASCADE
         )
-        conn.execute(
-            "CREATE INDEX IF NOT EXISTS idx_run_tasks_status "
-            "ON run_tasks(run_id, plan_version, status)"
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_run_tasks_status "
+        "ON run_tasks(run_id, plan_version, status)",
+    ),
+    (
+        # worker leases on ready nodes (one live lease per node)
+        """
+        CREATE TABLE IF NOT EXISTS task_leases (
+          run_id       TEXT NOT NULL,
+          plan_version INTEGER NOT NULL,
+          node_id      TEXT NOT NULL,
+          lease_id     TEXT NOT NULL,
+          worker_id    TEXT NOT NULL,
+          attempts     INTEGER NOT NULL,
+          expires_at   REAL NOT NULL,  -- unix epoch seconds
+          PRIMARY KEY (run_id, plan_version, node_id),
+          FOREIGN KEY (run_id, plan_version)
+            REFERENCES plans(run_id, plan_version)
+            ON DELETE CASCADE
         )
+        """,
+    ),
+    (
+        # DAG analysis computed at seal time (-1 = not analysed, e.g. rows sealed before v3)
+        "ALTER TABLE plan_nodes ADD COLUMN topo_index INTEGER NOT NULL DEFAULT -1",
+        "ALTER TABLE plan_nodes ADD COLUMN level INTEGER NOT NULL DEFAULT -1",
+        "ALTER TABLE plan_nodes ADD COLUMN in_degree INTEGER NOT NULL DEFAULT 0",
+        "ALTER TABLE plan_nodes ADD COLUMN out_degree INTEGER NOT NULL DEFAULT 0",
+    ),
+    (
+        # content-addressed plan storage: one copy per plan_hash, referenced by `plans`
+        """
+        CREATE TABLE IF NOT EXISTS plan_bodies (
+          plan_hash    TEXT PRIMARY KEY,
+          body_z       BLOB NOT NULL,     -- zlib-compressed normalized plan JSON
+          nodes        INTEGER NOT NULL,
+          edges        INTEGER NOT NULL,
+          created_at   TEXT NOT NULL
+        ) WITHOUT ROWID
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS plan_body_nodes (
+          plan_hash    TEXT NOT NULL,
+          node_id      TEXT NOT NULL,
+          role         TEXT NOT NULL,
+          retries      INTEGER NOT NULL,
+          timeout_ms   INTEGER NOT NULL,
+          gates_mask   INTEGER NOT NULL,  -- bit i = GATE_ORDER[i]
+          topo_index   INTEGER NOT NULL,
+          level        INTEGER NOT NULL,
+          in_degree    INTEGER NOT NULL,
+          out_degree   INTEGER NOT NULL,
+          PRIMARY KEY (plan_hash, node_id),
+          FOREIGN KEY (plan_hash) REFERENCES plan_bodies(plan_hash) ON DELETE CASCADE
+        ) WITHOUT ROWID
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS plan_body_edges (
+          plan_hash    TEXT NOT NULL,
+          src          TEXT NOT NULL,
+          dst          TEXT NOT NULL,
+          PRIMARY KEY (plan_hash, src, dst),
+          FOREIGN KEY (plan_hash) REFERENCES plan_bodies(plan_hash) ON DELETE CASCADE
+        ) WITHOUT ROWID
+        """,
+        _move_plans_to_content_store,
+        "DROP TABLE plan_edges",
+        "DROP TABLE plan_nodes",
+        "DROP TABLE plan_json",
+        "CREATE INDEX IF NOT EXISTS idx_plans_hash ON plans(plan_hash)",
+    ),
+    (
+        # audit artifacts live as gzip members inside per-day segment files
+        """
+        CREATE TABLE IF NOT EXISTS plan_artifacts (
+          run_id       TEXT NOT NULL,
+          plan_version INTEGER NOT NULL,
+          kind         TEXT NOT NULL,     -- 'yaml' (raw upload) | 'json' (normalized)
+          segment      TEXT NOT NULL,     -- path relative to DATA_ROOT
+          byte_offset  INTEGER NOT NULL,
+          byte_length  INTEGER NOT NULL,  -- compressed size of the member
+          size         INTEGER NOT NULL,  -- uncompressed size
+          created_at   TEXT NOT NULL,
+          PRIMARY KEY (run_id, plan_version)
+        ) WITHOUT ROWID
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_plan_artifacts_segment ON plan_artifacts(segment)",
+    ),
+    (
+        # bumped on every run_tasks write, so a process can tell its cached frontier is stale
+        """
+        CREATE TABLE IF NOT EXISTS run_task_stamps (
+          run_id       TEXT NOT NULL,
+          plan_version INTEGER NOT NULL,
+          stamp        INTEGER NOT NULL,
+          PRIMARY KEY (run_id, plan_version)
+        ) WITHOUT ROWID
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS run_tasks_stamp_insert AFTER INSERT ON run_tasks BEGIN
+          INSERT INTO run_task_stamps(run_id, plan_version, stamp)
+          VALUES (NEW.run_id, NEW.plan_version, 1)
+          ON CONFLICT(run_id, plan_version) DO UPDATE SET stamp = stamp + 1;
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS run_tasks_stamp_update AFTER UPDATE ON run_tasks BEGIN
+          INSERT INTO run_task_stamps(run_id, plan_version, stamp)
+          VALUES (NEW.run_id, NEW.plan_version, 1)
+          ON CONFLICT(run_id, plan_version) DO UPDATE SET stamp = stamp + 1;
+        END
+        """,
+    ),
+)
+SCHEMA_VERSION: Final[int] = len(_MIGRATIONS)
+
+_SYNCHRONOUS_MODES: Final[frozenset[str]] = frozenset({"OFF", "NORMAL", "FULL", "EXTRA"})
+
+_lock = threading.Lock()
+_local = threading.local()
+_ready: set[Path] = set()
+_open: list[sqlite3.Connection] = []
+_generation = 0
+_executor: ThreadPoolExecutor | None = None
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.getenv(name, str(default)))
+    except ValueError:
+        return default
+
+
+def _db_path() -> Path:
+    return Path(os.getenv("DATA_ROOT", "./workspace")) / "db" / _DB_NAME
 
-    _LOG.info("db_ready", path=str(path))
+
+def _apply_pragmas(conn: sqlite3.Connection) -> None:
+    """Per-connection tuning, overridable via MLCP_DB_* env vars."""
+    sync = os.getenv("MLCP_DB_SYNCHRONOUS", "NORMAL").upper()
+    if sync not in _SYNCHRONOUS_MODES:
+        sync = "NORMAL"
+    conn.execute("PRAGMA foreign_keys=ON;")
+    conn.execute(f"PRAGMA synchronous={sync};")
+    conn.execute(f"PRAGMA cache_size={_env_int('MLCP_DB_CACHE_SIZE', -16000)};")
+    conn.execute(f"PRAGMA mmap_size={_env_int('MLCP_DB_MMAP_SIZE', 0)};")
+    conn.execute(f"PRAGMA busy_timeout={_env_int('MLCP_DB_BUSY_TIMEOUT_MS', 5000)};")
+
+
+def _migrate(conn: sqlite3.Connection, path: Path) -> None:
+    current = int(conn.execute("PRAGMA user_version;").fetchone()[0])
+    if current >= SCHEMA_VERSION:
+        return
+    conn.execute("BEGIN IMMEDIATE;")
+    try:
+        # re-read under the write lock: another process may have migrated meanwhile
+        current = int(conn.execute("PRAGMA user_version;").fetchone()[0])
+        for version in range(current, SCHEMA_VERSION):
+            for step in _MIGRATIONS[version]:
+                if isinstance(step, str):
+                    conn.execute(step)
+                else:
+                    step(conn)
+        conn.execute(f"PRAGMA user_version={SCHEMA_VERSION};")
+        conn.execute("COMMIT;")
+    except BaseException:
+        conn.execute("ROLLBACK;")
+        raise
+    _LOG.info("db_migrated", path=str(path), from_version=current, to_version=SCHEMA_VERSION)
+
+
+# buckets only on the aggregate series: a full histogram per statement shape multiplied
+# the /metrics payload by the number of distinct statements
+SQL_SECONDS = REGISTRY.histogram(
+    "mlcp_sql_seconds", "sqlite3 execute time over all statements.", buckets=SQL_BUCKETS
+)
+SQL_STATEMENTS = REGISTRY.counter(
+    "mlcp_sql_statements_total", "sqlite3 executes by normalized statement.", ("statement",)
+)
+SQL_STATEMENT_SECONDS = REGISTRY.counter(
+    "mlcp_sql_statement_seconds_total",
+    "sqlite3 execute time by normalized statement.",
+    ("statement",),
+)
+SQL_ERRORS = REGISTRY.counter(
+    "mlcp_sql_errors_total",
+    "sqlite3 errors by normalized statement and error class.",
+    ("statement", "error"),
+)
+_IN_LIST = re.compile(r"IN \((\?\s*,\s*)+\?\)")
+_LINE_COMMENT = re.compile(r"--[^\n]*")
+
+
+@functools.lru_cache(maxsize=1024)
+def _normalize_sql(sql: str) -> str:
+    """
+    One label per statement shape: comments dropped, whitespace collapsed, and
+    `IN (?, ?, ...)` folded to `IN (?)`.
+    """
+    return _IN_LIST.sub("IN (?)", " ".join(_LINE_COMMENT.sub("", sql).split())).rstrip(";")
+
+
+class TimedConnection(sqlite3.Connection):
+    """
+    sqlite3 connection that times every execute/executemany into SQL_SECONDS, the
+    per-statement count and time, and the current request's SQL total. Time is measured up to the first result row; rows
+    fetched later are not included.
+    """
+
+    def _timed(self, sql: str, run: Callable[[], sqlite3.Cursor]) -> sqlite3.Cursor:
+        t0 = time.perf_counter()
+        try:
+            return run()
+        except sqlite3.Error as exc:
+            SQL_ERRORS.inc(statement=_normalize_sql(sql), error=type(exc).__name__)
+            raise
+        finally:
+            elapsed = time.perf_counter() - t0
+            statement = _normalize_sql(sql)
+            SQL_SECONDS.observe(elapsed)
+            SQL_STATEMENTS.inc(statement=statement)
+            SQL_STATEMENT_SECONDS.inc(elapsed, statement=statement)
+            add_request_sql(elapsed)
+
+    def execute(self, sql: str, parameters: Any = (), /) -> sqlite3.Cursor:
+        return self._timed(sql, lambda: super(TimedConnection, self).execute(sql, parameters))
+
+    def executemany(self, sql: str, parameters: Iterable[Any], /) -> sqlite3.Cursor:
+        return self._timed(sql, lambda: super(TimedConnection, self).executemany(sql, parameters))
+
+
+def _open_connection(path: Path) -> sqlite3.Connection:
+    timed = os.getenv("MLCP_SQL_TIMING", "1") != "0"
+    conn = sqlite3.connect(
+        path,
+        check_same_thread=False,
+        isolation_level=None,
+        factory=TimedConnection if timed else sqlite3.Connection,
+    )
+    conn.row_factory = sqlite3.Row
+    _apply_pragmas(conn)
     return conn
+
+
+def init_db() -> Path:
+    """Create the database file and bring its schema up to date. Idempotent; call at startup."""
+    path = _db_path()
+    with _lock:
+        if path in _ready:
+            return path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        conn = _open_connection(path)
+        try:
+            conn.execute("PRAGMA journal_mode=WAL;")
+            _migrate(conn, path)
+        finally:
+            conn.close()
+        _ready.add(path)
+    _LOG.info("db_ready", path=str(path), schema_version=SCHEMA_VERSION)
+    return path
+
+
+def connect() -> sqlite3.Connection:
+    """Return this thread's reusable connection, bootstrapping the schema on first use."""
+    path = _db_path()
+    if path not in _ready:
+        init_db()
+    conns: dict[Path, tuple[int, sqlite3.Connection]] | None = getattr(_local, "conns", None)
+    if conns is None:
+        conns = {}
+        _local.conns = conns
+    cached = conns.get(path)
+    if cached is not None and cached[0] == _generation:
+        return cached[1]
+    conn = _open_connection(path)
+    with _lock:
+        _open.append(conn)
+        conns[path] = (_generation, conn)
+    return conn
+
+
+@contextmanager
+def transaction(conn: sqlite3.Connection) -> Iterator[sqlite3.Connection]:
+    """Explicit BEGIN IMMEDIATE ... COMMIT (connections are autocommit by default)."""
+    conn.execute("BEGIN IMMEDIATE;")
+    try:
+        yield conn
+    except BaseException:
+        conn.execute("ROLLBACK;")
+        raise
+    conn.execute("COMMIT;")
+
+
+def _db_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        with _lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=max(1, _env_int("MLCP_DB_WORKERS", 8)), thread_name_prefix="mlcp-db"
+                )
+    return _executor
+
+
+async def run_db(fn: Callable[P, R], *args: P.args, **kwargs: P.kwargs) -> R:
+    """
+    Run blocking DB work on the dedicated executor (sized by MLCP_DB_WORKERS), keeping
+    the event loop and the default threadpool free. Each worker keeps its own connection.
+    Context variables are carried over, so per-request accounting still applies.
+    """
+    loop = asyncio.get_running_loop()
+    ctx = contextvars.copy_context()
+    call = functools.partial(ctx.run, fn, *args, **kwargs)
+    return await loop.run_in_executor(_db_executor(), call)
+
+
+def close_all() -> None:
+    """Stop the DB executor and close every pooled connection (on shutdown); later calls reopen."""
+    global _generation, _executor
+    with _lock:
+        executor, _executor = _executor, None
+    if executor is not None:
+        executor.shutdown(wait=True)
+    with _lock:
+        conns = list(_open)
+        _open.clear()
+        _ready.clear()
+        _generation += 1
+    for conn in conns:
+        try:
+            conn.close()
+        except sqlite3.Error:  # pragma: no cover
+            pass
+    _LOG.info("db_closed", connections=len(conns))
@@ -0,0 +1,376 @@
+from __future__ import annotations
+
+import asyncio
+import itertools
+import os
+import threading
+from collections import deque
+from collections.abc import Callable, Iterator, Mapping
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from sqlite3 import Connection
+from typing import cast
+
+from mlcp.common.lru import LRUCache
+from mlcp.common.logger import get_logger
+
+from .db import transaction
+from .plan_codec import decode_gates
+
+_LOG = get_logger(__name__)
+
+FRONTIER_CACHE_RUNS = int(os.getenv("MLCP_FRONTIER_CACHE_RUNS", "256"))
+FRONTIER_IDLE_SEC = float(os.getenv("MLCP_FRONTIER_IDLE_SEC", "900"))
+FRONTIER_EVENT_LOG = int(os.getenv("MLCP_FRONTIER_EVENT_LOG", "4096"))
+
+DONE_STATUSES: frozenset[str] = frozenset({"complete", "failed"})
+
+_EPOCHS = itertools.count(1)
+
+
+@dataclass(frozen=True, slots=True)
+class NodeMeta:
+    role: str
+    retries: int
+    timeout_ms: int
+    gates: list[str]
+
+
+@dataclass(slots=True)
+class RunFrontier:
+    """
+    In-memory DAG state for one (run_id, plan_version).
+    `remaining[n]` counts predecessors of n that are not complete; n is ready when
+    that count is zero and n itself is neither complete nor failed.
+
+    Every node that becomes ready is appended to a bounded event log under a
+    monotonically increasing sequence number; `changes_since` turns a cursor
+    ("<epoch>.<seq>") into the nodes that became ready after it.
+
+    `stamp` is the run_task_stamps value the statuses reflect. Writers hold
+    `writing()` from before their transaction until they have applied it, so a
+    resync from SQLite never interleaves with a local commit.
+    """
+
+    meta: dict[str, NodeMeta]
+    succ: dict[str, list[str]]
+    remaining: dict[str, int]
+    status: dict[str, str]
+    ready: set[str] = field(default_factory=set[str])
+    epoch: int = field(default_factory=lambda: next(_EPOCHS))
+    seq: int = 0
+    _log: deque[tuple[int, str]] = field(
+        default_factory=lambda: deque[tuple[int, str]](maxlen=FRONTIER_EVENT_LOG)
+    )
+    _listeners: list[Callable[[], None]] = field(default_factory=list[Callable[[], None]])
+    _ordered: list[str] | None = None
+    stamp: int = 0
+    _lock: threading.Lock = field(default_factory=threading.Lock)
+    _writer: threading.Lock = field(default_factory=threading.Lock)
+
+    @classmethod
+    def build(
+        cls,
+        meta: dict[str, NodeMeta],
+        edges: list[tuple[str, str]],
+        status: dict[str, str],
+        stamp: int = 0,
+    ) -> RunFrontier:
+        succ: dict[str, list[str]] = {nid: [] for nid in meta}
+        remaining: dict[str, int] = {nid: 0 for nid in meta}
+        for a, b in set(edges):
+            succ.setdefault(a, []).append(b)
+            remaining[b] = remaining.get(b, 0) + (0 if status.get(a) == "complete" else 1)
+        rf = cls(meta=meta, succ=succ, remaining=remaining, status=dict(status), stamp=stamp)
+        rf.ready = {
+            nid for nid in meta if remaining[nid] == 0 and status.get(nid) not in DONE_STATUSES
+        }
+        return rf
+
+    def ready_ids(self) -> list[str]:
+        """Ready node ids in deterministic (node_id) order."""
+        with self._lock:
+            if self._ordered is None:
+                self._ordered = sorted(self.ready)
+            return self._ordered
+
+    def apply(self, node_id: str, status_val: str) -> list[str]:
+        """Record a status change in O(out-degree). Returns node ids that became ready."""
+        return self.update({node_id: status_val})[0]
+
+    def update(
+        self, statuses: Mapping[str, str], stamps: tuple[int, int] | None = None
+    ) -> tuple[list[str], list[str]]:
+        """
+        Apply status changes as one step and return the ready nodes it (added,
+        removed). `stamps` is the run_task_stamps value before and after the write
+        that committed them; the frontier only adopts the new stamp when it had
+        seen every earlier write, otherwise the next `FrontierCache.get` resyncs.
+        """
+        with self._lock:
+            before = set(self.ready)
+            self._update(statuses)
+            if stamps is not None and self.stamp == stamps[0]:
+                self.stamp = stamps[1]
+            added, removed = self._publish(before)
+            listeners = list(self._listeners) if added else []
+        for notify in listeners:
+            notify()
+        return added, removed
+
+    def sync(self, statuses: Mapping[str, str], stamp: int) -> None:
+        """Catch up with the statuses stored in SQLite (as of `stamp`)."""
+        with self._lock:
+            before = set(self.ready)
+            self._update(statuses)
+            self.stamp = stamp
+            added, _removed = self._publish(before)
+            listeners = list(self._listeners) if added else []
+        for notify in listeners:
+            notify()
+
+    def writing(self) -> threading.Lock:
+        """Hold around commit + `update`: orders local writes against resyncs."""
+        return self._writer
+
+    def _update(self, statuses: Mapping[str, str]) -> None:
+        for node_id, status_val in statuses.items():
+            prev = self.status.get(node_id)
+            if prev == status_val:
+                continue
+            self.status[node_id] = status_val
+            self._ordered = None
+
+            if status_val in DONE_STATUSES:
+                self.ready.discard(node_id)
+            elif self.remaining.get(node_id, 0) == 0 and node_id in self.meta:
+                self.ready.add(node_id)
+
+            if status_val == "complete":
+                for nxt in self.succ.get(node_id, []):
+                    left = self.remaining[nxt] - 1
+                    self.remaining[nxt] = left
+                    if left == 0 and nxt in self.meta and self.status.get(nxt) not in DONE_STATUSES:
+                        self.ready.add(nxt)
+            elif prev == "complete":
+                for nxt in self.succ.get(node_id, []):
+                    self.remaining[nxt] += 1
+                    self.ready.discard(nxt)
+
+    def _publish(self, before: set[str]) -> tuple[list[str], list[str]]:
+        """Log the nodes that became ready since `before` (lock held)."""
+        became = sorted(self.ready - before)
+        for nid in became:
+            self.seq += 1
+            self._log.append((self.seq, nid))
+        return became, sorted(before - self.ready)
+
+    @property
+    def cursor(self) -> str:
+        return f"{self.epoch}.{self.seq}"
+
+    def changes_since(self, cursor: str | None) -> tuple[str, list[str], bool]:
+        """
+        Return (cursor, node_ids, reset). When `cursor` is unknown, from another
+        epoch, or older than the retained log, `reset` is True and node_ids is the
+        full ready set; otherwise node_ids are the still-ready nodes that became
+        ready after `cursor`.
+        """
+        with self._lock:
+            since = self._parse_cursor(cursor)
+            oldest = self._log[0][0] if self._log else self.seq + 1
+            if since is None or since > self.seq or (since + 1 < oldest and since < self.seq):
+                if self._ordered is None:
+                    self._ordered = sorted(self.ready)
+                return self.cursor, self._ordered, True
+            fresh = {nid for seq, nid in self._log if seq > since and nid in self.ready}
+            return self.cursor, sorted(fresh), False
+
+    def _parse_cursor(self, cursor: str | None) -> int | None:
+        if not cursor:
+            return None
+        epoch, _, seq = cursor.partition(".")
+        if epoch != str(self.epoch) or not seq.isdigit():
+            return None
+        return int(seq)
+
+    def listen(self, notify: Callable[[], None]) -> None:
+        """Register a callback fired (from the updating thread) when nodes become ready."""
+        with self._lock:
+            self._listeners.append(notify)
+
+    def unlisten(self, notify: Callable[[], None]) -> None:
+        with self._lock:
+            if notify in self._listeners:
+                self._listeners.remove(notify)
+
+
+# immutable node/edge structure shared by every run sealed with the same plan_hash
+_STRUCTURE: LRUCache[str, tuple[dict[str, NodeMeta], list[tuple[str, str]]]] = LRUCache(
+    FRONTIER_CACHE_RUNS
+)
+
+
+def _load_structure(
+    conn: Connection, phash: str
+) -> tuple[dict[str, NodeMeta], list[tuple[str, str]]]:
+    cached = _STRUCTURE.get(phash)
+    if cached is not None:
+        return cached
+    node_rows = conn.execute(
+        "SELECT node_id, role, retries, timeout_ms, gates_mask "
+        "FROM plan_body_nodes WHERE plan_hash = ?",
+        (phash,),
+    ).fetchall()
+    meta: dict[str, NodeMeta] = {}
+    for r in node_rows:
+        meta[str(r["node_id"])] = NodeMeta(
+            role=str(r["role"]),
+            retries=int(cast(int, r["retries"])),
+            timeout_ms=int(cast(int, r["timeout_ms"])),
+            gates=decode_gates(int(cast(int, r["gates_mask"]))),
+        )
+    edge_rows = conn.execute(
+        "SELECT src, dst FROM plan_body_edges WHERE plan_hash = ?", (phash,)
+    ).fetchall()
+    edges = [(str(r["src"]), str(r["dst"])) for r in edge_rows]
+    _STRUCTURE.put(phash, (meta, edges))
+    return meta, edges
+
+
+def read_stamp(conn: Connection, run_id: str, version: int) -> int:
+    """How many run_tasks writes (run_id, version) has seen; 0 before the first."""
+    row = conn.execute(
+        "SELECT stamp FROM run_task_stamps WHERE run_id = ? AND plan_version = ?",
+        (run_id, version),
+    ).fetchone()
+    return 0 if row is None else int(row["stamp"])
+
+
+def _load_status(conn: Connection, run_id: str, version: int) -> dict[str, str]:
+    task_rows = conn.execute(
+        "SELECT node_id, status FROM run_tasks WHERE run_id = ? AND plan_version = ?",
+        (run_id, version),
+    ).fetchall()
+    return {str(r["node_id"]): str(r["status"]) for r in task_rows}
+
+
+def _load(conn: Connection, run_id: str, version: int) -> RunFrontier | None:
+    row = conn.execute(
+        "SELECT plan_hash FROM plans WHERE run_id = ? AND plan_version = ?", (run_id, version)
+    ).fetchone()
+    if row is None:
+        return None
+    meta, edges = _load_structure(conn, str(row["plan_hash"]))
+    # stamp first: statuses read after it are at least as new, so a gap only costs a resync
+    stamp = read_stamp(conn, run_id, version)
+    return RunFrontier.build(meta, edges, _load_status(conn, run_id, version), stamp)
+
+
+class FrontierCache:
+    """
+    Per-process cache of RunFrontier keyed by (run_id, plan_version).
+    Entries are hydrated from SQLite on first access and kept current by
+    `RunFrontier.update`, which writers call after committing a status change.
+    Every `get` also compares the entry's stamp with run_task_stamps (one primary
+    key lookup) and resyncs when another process has written since, so any
+    number of API workers can share a database.
+    """
+
+    def __init__(self, max_runs: int, idle_sec: float) -> None:
+        self._cache: LRUCache[tuple[str, int], RunFrontier] = LRUCache(
+            max_runs, idle_sec, sliding=True
+        )
+        # serialises hydration against `apply` so a commit racing a load is never lost
+        self._lock = threading.Lock()
+
+    def get(self, conn: Connection, run_id: str, version: int) -> RunFrontier | None:
+        """The current frontier of a sealed version; None when that version does not exist."""
+        key = (run_id, version)
+        rf = self._cache.get(key)
+        if rf is not None:
+            if read_stamp(conn, run_id, version) != rf.stamp:
+                self._resync(conn, run_id, version, rf)
+            return rf
+        with self._lock:
+            rf = self._cache.get(key)
+            if rf is None:
+                rf = _load(conn, run_id, version)
+                if rf is None:
+                    return None
+                self._cache.put(key, rf)
+                _LOG.debug(
+                    "frontier_hydrated", run_id=run_id, plan_version=version, nodes=len(rf.meta)
+                )
+        return rf
+
+    def _resync(self, conn: Connection, run_id: str, version: int, rf: RunFrontier) -> None:
+        with rf.writing():
+            stamp = read_stamp(conn, run_id, version)
+            if stamp == rf.stamp:
+                return  # another reader caught up first
+            rf.sync(_load_status(conn, run_id, version), stamp)
+        _LOG.debug("frontier_resynced", run_id=run_id, plan_version=version, stamp=stamp)
+
+    def invalidate(self, run_id: str, version: int) -> None:
+        with self._lock:
+            self._cache.pop((run_id, version))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._cache.clear()
+
+
+FRONTIER = FrontierCache(FRONTIER_CACHE_RUNS, FRONTIER_IDLE_SEC)
+
+
+@dataclass(slots=True)
+class StatusWrite:
+    """Statuses a writer stored, and the ready nodes they added to / removed from the frontier."""
+
+    statuses: dict[str, str] = field(default_factory=dict[str, str])
+    added: list[str] = field(default_factory=list[str])
+    removed: list[str] = field(default_factory=list[str])
+
+
+@contextmanager
+def write_statuses(
+    conn: Connection, rf: RunFrontier, run_id: str, version: int
+) -> Iterator[StatusWrite]:
+    """
+    One status transaction, applied to `rf` once it commits: the caller writes
+    run_tasks and records each status it stored in the yielded StatusWrite, whose
+    added/removed are filled in on exit. The writer lock spans commit and update,
+    so the delta is exactly this write's.
+    """
+    write = StatusWrite()
+    with rf.writing():
+        with transaction(conn):
+            before = read_stamp(conn, run_id, version)
+            yield write
+            after = read_stamp(conn, run_id, version)
+        write.added, write.removed = rf.update(write.statuses, (before, after))
+
+
+async def wait_for_change(rf: RunFrontier, cursor: str, timeout: float) -> bool:
+    """Wait (without holding a thread) until `rf` moves past `cursor`; False on timeout."""
+    loop = asyncio.get_running_loop()
+    event = asyncio.Event()
+
+    def notify() -> None:
+        try:
+            loop.call_soon_threadsafe(event.set)
+        except RuntimeError:  # pragma: no cover - loop already closed
+            pass
+
+    rf.listen(notify)
+    try:
+        if rf.cursor != cursor:
+            return True
+        await asyncio.wait_for(event.wait(), timeout)
+        return True
+    except asyncio.TimeoutError:
+        return False
+    finally:
+        rf.unlisten(notify)
+
@@ -0,0 +1,121 @@
+from __future__ import annotations
+
+import gzip
+import os
+from collections.abc import Callable, Hashable
+from dataclasses import dataclass
+from typing import Optional
+
+from fastapi.responses import Response
+
+from mlcp.common.lru import LRUCache
+
+HTTP_CACHE_ENTRIES = int(os.getenv("MLCP_HTTP_CACHE_ENTRIES", "256"))
+HTTP_GZIP_MIN_BYTES = int(os.getenv("MLCP_HTTP_GZIP_MIN_BYTES", "1024"))
+
+# a sealed (run_id, plan_version) never changes; "latest" views must revalidate
+CACHE_IMMUTABLE = "private, max-age=31536000, immutable"
+CACHE_REVALIDATE = "no-cache"
+
+
+@dataclass(slots=True)
+class CachedBody:
+    etag: str  # quoted strong validator of the identity encoding
+    body: bytes
+    media_type: str
+    gz: bytes | None = None
+
+    def gzipped(self) -> bytes:
+        if self.gz is None:
+            self.gz = gzip.compress(self.body, 6, mtime=0)
+        return self.gz
+
+
+class BodyCache:
+    """Bounded LRU of serialized response bodies; gzip variants are built on first use."""
+
+    def __init__(self, max_entries: int) -> None:
+        self._cache: LRUCache[Hashable, CachedBody] = LRUCache(max_entries)
+
+    def get_or_build(
+        self, key: Hashable, etag: str, media_type: str, build: Callable[[], bytes]
+    ) -> CachedBody:
+        entry = self._cache.get(key)
+        if entry is None or entry.etag != etag:
+            entry = CachedBody(etag=etag, body=build(), media_type=media_type)
+            self._cache.put(key, entry)
+        return entry
+
+    def stats(self) -> dict[str, int]:
+        return self._cache.stats()
+
+    def clear(self) -> None:
+        self._cache.clear()
+
+
+BODIES = BodyCache(HTTP_CACHE_ENTRIES)
+
+
+def accepts_gzip(accept_encoding: Optional[str]) -> bool:
+    for part in (accept_encoding or "").split(","):
+        coding, _, params = part.partition(";")
+        if coding.strip().lower() not in ("gzip", "*"):
+            continue
+        key, _, q = params.strip().partition("=")
+        try:
+            return key.strip() != "q" or float(q) > 0
+        except ValueError:
+            return True
+    return False
+
+
+def _gz_etag(etag: str) -> str:
+    return etag[:-1] + '-gz"'
+
+
+def match_etag(if_none_match: Optional[str], etag: str) -> Optional[str]:
+    """
+    Weak comparison (RFC 9110 §13.1.2) of If-None-Match against either encoding's
+    validator. Returns the validator to echo in the 304, or None on a miss.
+    """
+    if not if_none_match:
+        return None
+    candidates = (etag, _gz_etag(etag))
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        if tag == "*":
+            return etag
+        if tag.startswith("W/"):
+            tag = tag[2:]
+        if tag in candidates:
+            return tag
+    return None
+
+
+def not_modified(etag: str, cache_control: str) -> Response:
+    return Response(
+        status_code=304,
+        headers={"ETag": etag, "Cache-Control": cache_control, "Vary": "Accept-Encoding"},
+    )
+
+
+def cached_response(
+    entry: CachedBody,
+    *,
+    accept_encoding: Optional[str],
+    cache_control: str,
+    headers: Optional[dict[str, str]] = None,
+    etag: Optional[str] = None,
+) -> Response:
+    """
+    Serve `entry` gzip-encoded when the client accepts it and the body is worth compressing.
+    `etag` replaces the entry's validator when `headers` make the representation differ.
+    """
+    etag = etag or entry.etag
+    out = {"Cache-Control": cache_control, "Vary": "Accept-Encoding", **(headers or {})}
+    if len(entry.body) >= HTTP_GZIP_MIN_BYTES and accepts_gzip(accept_encoding):
+        out["ETag"] = _gz_etag(etag)
+        out["Content-Encoding"] = "gzip"
+        return Response(content=entry.gzipped(), media_type=entry.media_type, headers=out)
+    out["ETag"] = etag
+    return Response(content=entry.body, media_type=entry.media_type, headers=out)
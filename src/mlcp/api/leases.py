@@ -0,0 +1,166 @@
+from __future__ import annotations
+
+import uuid
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from sqlite3 import Connection
+
+from mlcp.common.logger import get_logger
+
+from .frontier import RunFrontier, write_statuses
+
+_LOG = get_logger(__name__)
+
+
+@dataclass(frozen=True, slots=True)
+class Lease:
+    node_id: str
+    lease_id: str
+    worker_id: str
+    attempt: int
+    expires_at: float
+
+
+def _utcnow() -> str:
+    return datetime.now(timezone.utc).isoformat(timespec="seconds")
+
+
+def _expiry(rf: RunFrontier, node_id: str, now: float) -> float:
+    return now + rf.meta[node_id].timeout_ms / 1000.0
+
+
+def _reap_expired(
+    conn: Connection, rf: RunFrontier, run_id: str, version: int, now: float
+) -> list[str]:
+    """
+    Fail nodes whose expired lease used up their attempts (1 + retries).
+    Other expired leases stay in place and are simply claimable again.
+    Returns the node ids marked failed.
+    """
+    rows = conn.execute(
+        "SELECT node_id, attempts FROM task_leases "
+        "WHERE run_id = ? AND plan_version = ? AND expires_at <= ?",
+        (run_id, version, now),
+    ).fetchall()
+    exhausted = [
+        str(r["node_id"])
+        for r in rows
+        if str(r["node_id"]) in rf.meta and int(r["attempts"]) > rf.meta[str(r["node_id"])].retries
+    ]
+    if exhausted:
+        ts = _utcnow()
+        conn.executemany(
+            "INSERT INTO run_tasks(run_id, plan_version, node_id, status, updated_at) "
+            "VALUES (?, ?, ?, 'failed', ?) "
+            "ON CONFLICT(run_id, plan_version, node_id) DO UPDATE SET "
+            "status = excluded.status, updated_at = excluded.updated_at",
+            [(run_id, version, nid, ts) for nid in exhausted],
+        )
+        release(conn, run_id, version, exhausted)
+        _LOG.info("lease_exhausted", run_id=run_id, plan_version=version, nodes=exhausted)
+    return exhausted
+
+
+def claim(
+    conn: Connection,
+    rf: RunFrontier,
+    run_id: str,
+    version: int,
+    worker_id: str,
+    role: str | None,
+    max_nodes: int,
+    now: float,
+) -> tuple[list[Lease], list[str]]:
+    """
+    Atomically lease up to `max_nodes` ready, unleased nodes (optionally of one role).
+    Runs under BEGIN IMMEDIATE so concurrent claimers, in any process, never
+    receive the same node. Returns (leases, node ids failed by lease exhaustion);
+    the failures are applied to `rf`.
+    """
+    with write_statuses(conn, rf, run_id, version) as write:
+        failed = _reap_expired(conn, rf, run_id, version, now)
+        write.statuses.update(dict.fromkeys(failed, "failed"))
+        candidates = [
+            nid
+            for nid in rf.ready_ids()
+            if nid not in failed and (role is None or rf.meta[nid].role == role)
+        ]
+        if not candidates:
+            return [], failed
+
+        held = {
+            str(r["node_id"])
+            for r in conn.execute(
+                "SELECT node_id FROM task_leases "
+                "WHERE run_id = ? AND plan_version = ? AND expires_at > ?",
+                (run_id, version, now),
+            ).fetchall()
+        }
+        candidates = [nid for nid in candidates if nid not in held]
+
+        # the in-memory frontier may lag writes from other processes; check the
+        # candidates in chunks until max_nodes of them are still open
+        picked: list[str] = []
+        step = max(max_nodes * 2, 64)
+        for i in range(0, len(candidates), step):
+            chunk = candidates[i : i + step]
+            placeholders = ",".join("?" * len(chunk))
+            done = {
+                str(r["node_id"])
+                for r in conn.execute(
+                    f"SELECT node_id FROM run_tasks WHERE run_id = ? AND plan_version = ? "
+                    f"AND status IN ('complete', 'failed') AND node_id IN ({placeholders})",
+                    (run_id, version, *chunk),
+                ).fetchall()
+            }
+            picked += [nid for nid in chunk if nid not in done][: max_nodes - len(picked)]
+            if len(picked) == max_nodes:
+                break
+
+        leases: list[Lease] = []
+        for nid in picked:
+            lease_id = uuid.uuid4().hex
+            expires = _expiry(rf, nid, now)
+            row = conn.execute(
+                "INSERT INTO task_leases"
+                "(run_id, plan_version, node_id, lease_id, worker_id, attempts, expires_at) "
+                "VALUES (?, ?, ?, ?, ?, 1, ?) "
+                "ON CONFLICT(run_id, plan_version, node_id) DO UPDATE SET "
+                "lease_id = excluded.lease_id, worker_id = excluded.worker_id, "
+                "attempts = task_leases.attempts + 1, expires_at = excluded.expires_at "
+                "RETURNING attempts",
+                (run_id, version, nid, lease_id, worker_id, expires),
+            ).fetchone()
+            leases.append(Lease(nid, lease_id, worker_id, int(row["attempts"]), expires))
+    return leases, failed
+
+
+def heartbeat(
+    conn: Connection,
+    rf: RunFrontier,
+    run_id: str,
+    version: int,
+    node_id: str,
+    lease_id: str,
+    now: float,
+) -> Lease | None:
+    """Extend a live lease by the node's timeout; None if the lease expired or was taken over."""
+    row = conn.execute(
+        "UPDATE task_leases SET expires_at = ? "
+        "WHERE run_id = ? AND plan_version = ? AND node_id = ? AND lease_id = ? AND expires_at > ? "
+        "RETURNING worker_id, attempts, expires_at",
+        (_expiry(rf, node_id, now), run_id, version, node_id, lease_id, now),
+    ).fetchone()
+    if row is None:
+        return None
+    return Lease(
+        node_id, lease_id, str(row["worker_id"]), int(row["attempts"]), float(row["expires_at"])
+    )
+
+
+def release(conn: Connection, run_id: str, version: int, node_ids: list[str]) -> None:
+    """Drop leases for nodes that reached a final status (call inside the status transaction)."""
+    conn.executemany(
+        "DELETE FROM task_leases WHERE run_id = ? AND plan_version = ? AND node_id = ?",
+        [(run_id, version, nid) for nid in node_ids],
+    )
@@ -0,0 +1,54 @@
+from __future__ import annotations
+
+import os
+
+from fastapi import HTTPException
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from .plan_validate import PLAN_MAX_BYTES
+
+# JSON-escaping a plan_text can roughly double it, hence the 2x default
+MAX_BODY_BYTES = int(os.getenv("MLCP_MAX_BODY_BYTES", str(2 * PLAN_MAX_BYTES)))
+
+
+class BodySizeLimitMiddleware:
+    """
+    Reject request bodies over `max_bytes` with 413 before they are buffered:
+    up front from Content-Length, otherwise as soon as the streamed body passes the limit.
+    """
+
+    def __init__(self, app: ASGIApp, max_bytes: int = MAX_BODY_BYTES) -> None:
+        self.app = app
+        self.max_bytes = max_bytes
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or self.max_bytes <= 0:
+            await self.app(scope, receive, send)
+            return
+
+        for name, value in scope.get("headers", []):
+            if name == b"content-length":
+                try:
+                    declared = int(value)
+                except ValueError:
+                    declared = 0
+                if declared > self.max_bytes:
+                    response = JSONResponse({"detail": "request_too_large"}, status_code=413)
+                    await response(scope, receive, send)
+                    return
+                break
+
+        received = 0
+
+        async def limited_receive() -> Message:
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_bytes:
+                    # FastAPI re-raises HTTPExceptions from body reading as responses
+                    raise HTTPException(status_code=413, detail="request_too_large")
+            return message
+
+        await self.app(scope, limited_receive, send)
@@ -1,27 +1,54 @@
 from __future__ import annotations
 
+import asyncio
 import os
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from starlette import status
 
 from mlcp.common.logger import get_logger
+from mlcp.common.metrics import instrument
 
+from .artifacts import ARTIFACTS
+from .db import close_all, init_db
+from .limits import BodySizeLimitMiddleware
 from .routes import runs_router
+from .routes.runs import SEAL_CONCURRENCY
 from .routes import plan as plan_router
 
 
 
 _LOG = get_logger(__name__)
 
+
+@asynccontextmanager
+async def _lifespan(_app: FastAPI) -> AsyncIterator[None]:
+    init_db()
+    # created here, on the serving loop: a module-level semaphore binds to whichever
+    # loop first waits on it and then fails under any other app or TestClient
+    _app.state.seal_slots = asyncio.Semaphore(max(1, SEAL_CONCURRENCY))
+    _app.state.frontier_streams = 0  # open SSE streams, capped per process
+    ARTIFACTS.start()  # also runs the first retention pass
+    try:
+        yield
+    finally:
+        ARTIFACTS.close()
+        close_all()
+
+
 def create_app() -> FastAPI:
-    app = FastAPI(title="MLCP API", version="0.0.1")
+    app = FastAPI(title="MLCP API", version="0.0.1", lifespan=_lifespan)
+    app.add_middleware(BodySizeLimitMiddleware)
+    instrument(app)  # outermost, so 413s are counted too
 
     app.include_router(runs_router)
     app.include_router(plan_router.router)
 
 
     @app.get("/health", status_code=status.HTTP_200_OK)
-    def health() -> dict[str, str]:                     # type: ignore[unused-function]
+    async def health() -> dict[str, str]:                     # type: ignore[unused-function]
         _LOG.info("health_check")
         return {"status": "ok"}
 
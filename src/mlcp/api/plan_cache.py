@@ -0,0 +1,65 @@
+from __future__ import annotations
+
+import json
+import os
+import time
+from hashlib import sha256
+
+from mlcp.common.lru import LRUCache
+from mlcp.common.metrics import REGISTRY
+
+from .plan_normalize import PreparedPlan, prepare_plan
+from .plan_validate import JSONDict
+
+# -------- limits from env --------
+PLAN_CACHE_SIZE = int(os.getenv("PLAN_CACHE_SIZE", "256"))
+PLAN_CACHE_TTL_SEC = float(os.getenv("PLAN_CACHE_TTL_SEC", "600"))
+
+_CACHE: LRUCache[str, PreparedPlan] = LRUCache(PLAN_CACHE_SIZE, PLAN_CACHE_TTL_SEC)
+
+PREPARE_SECONDS = REGISTRY.histogram(
+    "mlcp_plan_prepare_seconds", "Parse + validate + normalize time per plan (cache misses only)."
+)
+PREPARE_CACHE = REGISTRY.counter(
+    "mlcp_plan_prepare_cache_total", "Prepared-plan cache lookups.", ("result",)
+)
+
+
+def _prepare_timed(plan: JSONDict | None, plan_text: str | None) -> PreparedPlan:
+    t0 = time.perf_counter()
+    try:
+        return prepare_plan(plan, plan_text)
+    finally:
+        PREPARE_SECONDS.observe(time.perf_counter() - t0)
+
+
+def content_key(plan: JSONDict | None, plan_text: str | None) -> str:
+    """sha256 of the payload `prepare_plan` would read: canonical JSON for `plan`, else raw text."""
+    if plan is not None:
+        canonical = json.dumps(plan, sort_keys=True, separators=(",", ":"), default=str)
+        return "json:" + sha256(canonical.encode("utf-8")).hexdigest()
+    if plan_text is not None:
+        return "text:" + sha256(plan_text.encode("utf-8")).hexdigest()
+    return "none"
+
+
+def prepare_plan_cached(plan: JSONDict | None, plan_text: str | None) -> PreparedPlan:
+    """`prepare_plan` memoized by content; results (errors included) are shared, not copied."""
+    if PLAN_CACHE_SIZE <= 0:
+        return _prepare_timed(plan, plan_text)
+    key = content_key(plan, plan_text)
+    hit = _CACHE.get(key)
+    PREPARE_CACHE.inc(result="miss" if hit is None else "hit")
+    if hit is not None:
+        return hit
+    prepared = _prepare_timed(plan, plan_text)
+    _CACHE.put(key, prepared)
+    return prepared
+
+
+def cache_stats() -> dict[str, int]:
+    return _CACHE.stats()
+
+
+def clear_cache() -> None:
+    _CACHE.clear()
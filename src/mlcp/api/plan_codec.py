@@ -0,0 +1,28 @@
+from __future__ import annotations
+
+import zlib
+
+from .plan_validate import GATE_ORDER
+
+_GATE_BIT: dict[str, int] = {g: 1 << i for i, g in enumerate(GATE_ORDER)}
+
+
+def encode_gates(gates: list[str]) -> int:
+    """Pack gate names into a bitmask (bit i = GATE_ORDER[i]); unknown gates are dropped."""
+    mask = 0
+    for g in gates:
+        mask |= _GATE_BIT.get(g, 0)
+    return mask
+
+
+def decode_gates(mask: int) -> list[str]:
+    """Inverse of `encode_gates`; returns gate names sorted, as in NodeNorm.gates."""
+    return sorted(g for g, bit in _GATE_BIT.items() if mask & bit)
+
+
+def compress_body(body_json: str) -> bytes:
+    return zlib.compress(body_json.encode("utf-8"), 6)
+
+
+def decompress_body(blob: bytes) -> str:
+    return zlib.decompress(blob).decode("utf-8")
@@ -0,0 +1,99 @@
+from __future__ import annotations
+
+from collections.abc import Callable
+from dataclasses import dataclass
+from typing import Any, TypeVar
+
+from .plan_graph import analyze
+from .plan_normalize import EdgeList, NodeNorm, PlanNorm
+
+T = TypeVar("T")
+
+
+@dataclass(frozen=True, slots=True)
+class PlanDiff:
+    nodes_added: list[str]
+    nodes_removed: list[str]
+    nodes_changed: list[str]
+    edges_added: EdgeList
+    edges_removed: EdgeList
+    stable: list[str]  # same definition and same (transitively stable) ancestors in both versions
+
+
+def _merge(
+    old: list[T], new: list[T], key: Callable[[T], Any]
+) -> tuple[list[T], list[T], list[tuple[T, T]]]:
+    """
+    Merge-join two lists sorted by `key`.
+    Returns (only_old, only_new, matched pairs) in one linear pass.
+    """
+    only_old: list[T] = []
+    only_new: list[T] = []
+    both: list[tuple[T, T]] = []
+    i = j = 0
+    while i < len(old) and j < len(new):
+        ko, kn = key(old[i]), key(new[j])
+        if ko == kn:
+            both.append((old[i], new[j]))
+            i += 1
+            j += 1
+        elif ko < kn:
+            only_old.append(old[i])
+            i += 1
+        else:
+            only_new.append(new[j])
+            j += 1
+    only_old.extend(old[i:])
+    only_new.extend(new[j:])
+    return only_old, only_new, both
+
+
+def _node_id(n: NodeNorm) -> str:
+    return n.id
+
+
+def _edge_key(e: tuple[str, str]) -> tuple[str, str]:
+    return e
+
+
+def _dedup(edges: EdgeList) -> EdgeList:
+    out: EdgeList = []
+    for e in edges:
+        if not out or out[-1] != e:
+            out.append(e)
+    return out
+
+
+def diff_plans(old: PlanNorm, new: PlanNorm) -> PlanDiff:
+    """
+    Node/edge diff between two normalized plans (both already sorted by PlanNorm).
+    A node is stable when it exists in both with an identical definition, has the
+    same direct predecessors, and every predecessor is stable, i.e. its whole
+    ancestor subgraph is unchanged. Only stable nodes may keep completed state.
+    """
+    removed, added, matched = _merge(old.nodes, new.nodes, _node_id)
+    changed = [n.id for o, n in matched if o != n]
+    same_def = {n.id for o, n in matched if o == n}
+
+    old_edges = _dedup(old.edges)
+    new_edges = _dedup(new.edges)
+    edges_removed, edges_added, _ = _merge(old_edges, new_edges, _edge_key)
+
+    touched = {b for _, b in edges_removed} | {b for _, b in edges_added}
+    preds: dict[str, list[str]] = {}
+    for a, b in new_edges:
+        preds.setdefault(b, []).append(a)
+
+    stable: set[str] = set()
+    for nid in analyze([n.id for n in new.nodes], new_edges).order:
+        if nid in same_def and nid not in touched and all(p in stable for p in preds.get(nid, [])):
+            stable.add(nid)
+
+    return PlanDiff(
+        nodes_added=[n.id for n in added],
+        nodes_removed=[n.id for n in removed],
+        nodes_changed=changed,
+        edges_added=edges_added,
+        edges_removed=edges_removed,
+        stable=sorted(stable),
+    )
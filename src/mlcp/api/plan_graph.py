@@ -0,0 +1,114 @@
+from __future__ import annotations
+
+from collections import deque
+from dataclasses import dataclass
+
+
+@dataclass(frozen=True, slots=True)
+class PlanTopology:
+    order: list[str]  # topological order; excludes nodes on or behind a cycle
+    level: dict[str, int]  # 0 for sources, else 1 + max(level of predecessors)
+    in_degree: dict[str, int]
+    out_degree: dict[str, int]
+
+    @property
+    def acyclic(self) -> bool:
+        return len(self.order) == len(self.in_degree)
+
+    @property
+    def depth(self) -> int:
+        return 1 + max(self.level.values()) if self.level else 0
+
+
+def analyze(nodes: list[str], edges: list[tuple[str, str]]) -> PlanTopology:
+    """
+    Kahn's algorithm in O(V + E), iterative so chain depth is unbounded.
+    Duplicate edges count once. Endpoints missing from `nodes` are treated as nodes.
+    Ties are broken by input order, so the result is deterministic for sorted input.
+    """
+    succ: dict[str, list[str]] = {n: [] for n in nodes}
+    indeg: dict[str, int] = {n: 0 for n in nodes}
+    for a, b in dict.fromkeys(edges):
+        succ.setdefault(a, []).append(b)
+        succ.setdefault(b, [])
+        indeg.setdefault(a, 0)
+        indeg[b] = indeg.get(b, 0) + 1
+    out_degree = {n: len(vs) for n, vs in succ.items()}
+    in_degree = dict(indeg)
+
+    level: dict[str, int] = {}
+    queue: deque[str] = deque()
+    for n, d in indeg.items():
+        if d == 0:
+            queue.append(n)
+            level[n] = 0
+    order: list[str] = []
+    while queue:
+        u = queue.popleft()
+        order.append(u)
+        nxt_level = level[u] + 1
+        for v in succ[u]:
+            if level.get(v, -1) < nxt_level:
+                level[v] = nxt_level
+            indeg[v] -= 1
+            if indeg[v] == 0:
+                queue.append(v)
+
+    placed = set(order)
+    return PlanTopology(
+        order=order,
+        level={n: lv for n, lv in level.items() if n in placed},
+        in_degree=in_degree,
+        out_degree=out_degree,
+    )
+
+
+def find_cycles(nodes: list[str], edges: list[tuple[str, str]], limit: int = 3) -> list[list[str]]:
+    """
+    Depth-first cycle listing with an explicit stack. Visits nodes and edges in the
+    given order and reports each cycle as [v, ..., u, v] for a back edge u -> v.
+    """
+    graph: dict[str, list[str]] = {n: [] for n in nodes}
+    for a, b in edges:
+        graph.setdefault(a, []).append(b)
+
+    visiting: set[str] = set()
+    visited: set[str] = set()
+    parent: dict[str, str | None] = {n: None for n in nodes}
+    cycles: list[list[str]] = []
+
+    for root in nodes:
+        if root in visited:
+            continue
+        visiting.add(root)
+        stack = [(root, iter(graph.get(root, [])))]
+        while stack:
+            if len(cycles) >= limit:
+                return cycles
+            u, it = stack[-1]
+            descended = False
+            for v in it:
+                if v in visiting:
+                    # reconstruct simple cycle: v .. u -> v
+                    path: list[str] = [v]
+                    cur: str | None = u
+                    while cur is not None and cur != v:
+                        path.append(cur)
+                        cur = parent.get(cur)
+                    path.append(v)
+                    path.reverse()
+                    if not cycles or cycles[-1] != path:
+                        cycles.append(path)
+                elif v not in visited:
+                    parent[v] = u
+                    visiting.add(v)
+                    stack.append((v, iter(graph.get(v, []))))
+                    descended = True
+                    break
+            if not descended:
+                stack.pop()
+                visiting.remove(u)
+                visited.add(u)
+        if len(cycles) >= limit:
+            break
+    return cycles
@@ -5,7 +5,16 @@ from dataclasses import dataclass, asdict
 from hashlib import sha256
 from typing import TypeAlias
 
-from .plan_validate import JSONDict, JSONVal, ALLOWED_GATES, ALLOWED_ROLES
+from .plan_validate import (
+    ALLOWED_GATES,
+    ALLOWED_ROLES,
+    ErrorItem,
+    JSONDict,
+    JSONVal,
+    PlanStats,
+    _safe_parse,
+    _validate_data,
+)
 
 NodeList: TypeAlias = list[JSONDict]
 EdgeList: TypeAlias = list[tuple[str, str]]
@@ -30,6 +39,15 @@ class PlanNorm:
     stats_edges: int
 
 
+@dataclass(frozen=True, slots=True)
+class PreparedPlan:
+    """Outcome of `prepare_plan`: errors, or stats plus the ready-to-store normalized plan."""
+    ok: bool
+    errors: list[ErrorItem]
+    stats: PlanStats | None
+    norm: PlanNorm | None
+
+
 def _compact_space(s: str) -> str:
     return " ".join(s.split())
 
@@ -42,6 +60,41 @@ def _norm_int(v: JSONVal, default: int, min_value: int) -> int:
     return max(min_value, out)
 
 
+def _normalize_node(n: JSONDict) -> NodeNorm:
+    nid = _compact_space(str(n.get("id", "")).strip())
+    name = _compact_space(str(n.get("name", "")).strip())
+    role = str(n.get("role", "developer")).strip()
+    retries = _norm_int(n.get("retries", 1), default=1, min_value=0)
+    timeout_ms = _norm_int(n.get("timeout_ms", 120_000), default=120_000, min_value=1_000)
+
+    gates_in = n.get("gates", [])
+    gates: list[str] = []
+    if isinstance(gates_in, list):
+        for g in gates_in:
+            gstr = str(g).strip()
+            if gstr in ALLOWED_GATES:
+                gates.append(gstr)
+    # sanify role (validator already warned; here we just clamp)
+    if role not in ALLOWED_ROLES:
+        role = "developer"
+
+    return NodeNorm(id=nid, name=name, role=role, retries=retries, timeout_ms=timeout_ms,
+                    gates=sorted(set(gates)))
+
+
+def _build_norm(data: JSONDict, nodes: list[NodeNorm], edges: EdgeList) -> PlanNorm:
+    nodes_sorted = sorted(nodes, key=lambda x: x.id)
+    edges_sorted = sorted(edges, key=lambda p: (p[0], p[1]))
+
+    return PlanNorm(
+        schema_version=str(data.get("schema_version", "1")),
+        nodes=nodes_sorted,
+        edges=edges_sorted,
+        stats_nodes=len(nodes_sorted),
+        stats_edges=len(edges_sorted),
+    )
+
+
 def normalize_plan(data: JSONDict) -> PlanNorm:
     # nodes
     raw_nodes = data.get("nodes", [])
@@ -50,25 +103,7 @@ def normalize_plan(data: JSONDict) -> PlanNorm:
         for n in raw_nodes:
             if not isinstance(n, dict):
                 continue
-            nid = _compact_space(str(n.get("id", "")).strip())
-            name = _compact_space(str(n.get("name", "")).strip())
-            role = str(n.get("role", "developer")).strip()
-            retries = _norm_int(n.get("retries", 1), default=1, min_value=0)
-            timeout_ms = _norm_int(n.get("timeout_ms", 120_000), default=120_000, min_value=1_000)
-
-            gates_in = n.get("gates", [])
-            gates: list[str] = []
-            if isinstance(gates_in, list):
-                for g in gates_in:
-                    gstr = str(g).strip()
-                    if gstr in ALLOWED_GATES:
-                        gates.append(gstr)
-            # sanify role (validator already warned; here we just clamp)
-            if role not in ALLOWED_ROLES:
-                role = "developer"
-
-            nodes.append(NodeNorm(id=nid, name=name, role=role, retries=retries, timeout_ms=timeout_ms,
-                                  gates=sorted(set(gates))))
+            nodes.append(_normalize_node(n))
 
     # edges
     raw_edges = data.get("edges", [])
@@ -80,18 +115,49 @@ def normalize_plan(data: JSONDict) -> PlanNorm:
                 b = str(e[1]).strip()
                 edges.append((a, b))
 
-    nodes_sorted = sorted(nodes, key=lambda x: x.id)
-    edges_sorted = sorted(edges, key=lambda p: (p[0], p[1]))
+    return _build_norm(data, nodes, edges)
 
-    return PlanNorm(
-        schema_version=str(data.get("schema_version", "1")),
-        nodes=nodes_sorted,
-        edges=edges_sorted,
-        stats_nodes=len(nodes_sorted),
-        stats_edges=len(edges_sorted),
+
+def prepare_plan(plan: JSONDict | None, plan_text: str | None) -> PreparedPlan:
+    """
+    Fused validate + normalize: parses the payload once and walks nodes and edges
+    once, normalizing each node as it is accepted. On success `norm` equals
+    `normalize_plan` of the same input.
+    """
+    data, parse_errors = _safe_parse(plan, plan_text)
+    if parse_errors:
+        return PreparedPlan(ok=False, errors=parse_errors, stats=None, norm=None)
+    assert data is not None
+
+    nodes: list[NodeNorm] = []
+    errors, _node_ids, edge_list = _validate_data(
+        data, on_node=lambda n: nodes.append(_normalize_node(n))
+    )
+    if errors:
+        return PreparedPlan(ok=False, errors=errors, stats=None, norm=None)
+
+    norm = _build_norm(data, nodes, edge_list)
+    return PreparedPlan(
+        ok=True,
+        errors=[],
+        stats=PlanStats(nodes=norm.stats_nodes, edges=norm.stats_edges),
+        norm=norm,
     )
 
 
 def plan_hash(norm: PlanNorm) -> str:
     payload = json.dumps(asdict(norm), sort_keys=True, separators=(",", ":")).encode("utf-8")
     return sha256(payload).hexdigest()
+
+
+def norm_from_json(body_json: str) -> PlanNorm:
+    """Rebuild a PlanNorm from its stored JSON body (inverse of `asdict` + `json.dumps`)."""
+    raw = json.loads(body_json)
+    return PlanNorm(
+        schema_version=str(raw["schema_version"]),
+        nodes=[NodeNorm(**n) for n in raw["nodes"]],
+        edges=[(str(a), str(b)) for a, b in raw["edges"]],
+        stats_nodes=int(raw["stats_nodes"]),
+        stats_edges=int(raw["stats_edges"]),
+    )
+
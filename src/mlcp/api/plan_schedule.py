@@ -0,0 +1,167 @@
+from __future__ import annotations
+
+import os
+from dataclasses import dataclass
+from sqlite3 import Connection
+
+from mlcp.common.lru import LRUCache
+
+from .plan_graph import analyze
+
+SCHEDULE_CACHE_SIZE = int(os.getenv("MLCP_SCHEDULE_CACHE_SIZE", "128"))
+
+
+@dataclass(frozen=True, slots=True)
+class NodeSchedule:
+    node_id: str
+    role: str
+    duration_ms: int
+    level: int
+    earliest_start_ms: int
+    latest_start_ms: int
+
+    @property
+    def slack_ms(self) -> int:
+        return self.latest_start_ms - self.earliest_start_ms
+
+
+@dataclass(frozen=True, slots=True)
+class RoleLoad:
+    role: str
+    nodes: int
+    work_ms: int
+    max_parallel: int  # peak concurrency of this role in the earliest-start schedule
+
+
+@dataclass(frozen=True, slots=True)
+class PlanSchedule:
+    makespan_ms: int
+    critical_path: list[str]
+    nodes: list[NodeSchedule]  # topological order
+    level_width: list[int]  # nodes per topological level
+    roles: list[RoleLoad]  # sorted by role
+    max_parallel: int
+
+
+def _peak(intervals: list[tuple[int, int]]) -> int:
+    """Maximum overlap of half-open [start, end) intervals."""
+    events = sorted([(s, 1) for s, _ in intervals] + [(e, -1) for _, e in intervals])
+    peak = cur = 0
+    for _, delta in events:
+        cur += delta
+        if cur > peak:
+            peak = cur
+    return peak
+
+
+def compute_schedule(
+    nodes: list[tuple[str, str, int]], edges: list[tuple[str, str]]
+) -> PlanSchedule:
+    """
+    Critical-path method over an acyclic plan, with each node's timeout_ms as its
+    duration. `nodes` are (node_id, role, duration_ms).
+    The forward/backward passes are O(V + E) over the topological order; the
+    per-role concurrency sweep adds a sort (O(V log V)).
+    Raises ValueError when the graph has a cycle.
+    """
+    topo = analyze([n[0] for n in nodes], edges)
+    if not topo.acyclic:
+        raise ValueError("plan_not_acyclic")
+    order = topo.order
+    idx = {nid: i for i, nid in enumerate(order)}
+    info = {nid: (role, dur) for nid, role, dur in nodes}
+    n = len(order)
+    dur = [info[nid][1] for nid in order]
+    succ: list[list[int]] = [[] for _ in range(n)]
+    preds: list[list[int]] = [[] for _ in range(n)]
+    for a, b in dict.fromkeys(edges):
+        ia, ib = idx[a], idx[b]
+        succ[ia].append(ib)
+        preds[ib].append(ia)
+
+    # forward pass: earliest start
+    es = [0] * n
+    for i in range(n):
+        finish = es[i] + dur[i]
+        for j in succ[i]:
+            if es[j] < finish:
+                es[j] = finish
+    makespan = max((es[i] + dur[i] for i in range(n)), default=0)
+
+    # backward pass: latest finish, then latest start
+    lf = [makespan] * n
+    for i in range(n - 1, -1, -1):
+        start = lf[i] - dur[i]
+        for p in preds[i]:
+            if lf[p] > start:
+                lf[p] = start
+    ls = [lf[i] - dur[i] for i in range(n)]
+
+    # critical path: walk back from the first node finishing at the makespan
+    path: list[int] = []
+    cur = next((i for i in range(n) if es[i] + dur[i] == makespan), None)
+    while cur is not None:
+        path.append(cur)
+        tight = [p for p in preds[cur] if es[p] + dur[p] == es[cur]]
+        cur = min(tight) if tight else None
+    path.reverse()
+
+    widths = [0] * topo.depth
+    for lv in topo.level.values():
+        widths[lv] += 1
+
+    by_role: dict[str, list[int]] = {}
+    for i, nid in enumerate(order):
+        by_role.setdefault(info[nid][0], []).append(i)
+    roles = [
+        RoleLoad(
+            role=role,
+            nodes=len(members),
+            work_ms=sum(dur[i] for i in members),
+            max_parallel=_peak([(es[i], es[i] + dur[i]) for i in members]),
+        )
+        for role, members in sorted(by_role.items())
+    ]
+
+    return PlanSchedule(
+        makespan_ms=makespan,
+        critical_path=[order[i] for i in path],
+        nodes=[
+            NodeSchedule(
+                node_id=nid,
+                role=info[nid][0],
+                duration_ms=dur[i],
+                level=topo.level[nid],
+                earliest_start_ms=es[i],
+                latest_start_ms=ls[i],
+            )
+            for i, nid in enumerate(order)
+        ],
+        level_width=widths,
+        roles=roles,
+        max_parallel=_peak([(es[i], es[i] + dur[i]) for i in range(n)]),
+    )
+
+
+_SCHEDULES: LRUCache[str, PlanSchedule] = LRUCache(SCHEDULE_CACHE_SIZE)
+
+
+def load_schedule(conn: Connection, phash: str) -> PlanSchedule:
+    """Schedule for a stored plan body; computed once per plan_hash."""
+    cached = _SCHEDULES.get(phash)
+    if cached is not None:
+        return cached
+    node_rows = conn.execute(
+        "SELECT node_id, role, timeout_ms FROM plan_body_nodes "
+        "WHERE plan_hash = ? ORDER BY node_id",
+        (phash,),
+    ).fetchall()
+    edge_rows = conn.execute(
+        "SELECT src, dst FROM plan_body_edges WHERE plan_hash = ? ORDER BY src, dst", (phash,)
+    ).fetchall()
+    schedule = compute_schedule(
+        [(str(r["node_id"]), str(r["role"]), int(r["timeout_ms"])) for r in node_rows],
+        [(str(r["src"]), str(r["dst"])) for r in edge_rows],
+    )
+    _SCHEDULES.put(phash, schedule)
+    return schedule
@@ -1,20 +1,43 @@
 from __future__ import annotations
 
 import json
+import os
 from dataclasses import asdict
 from datetime import datetime, timezone
-from pathlib import Path
+from sqlite3 import Connection
 from typing import Tuple
 
-from .db import connect
-from .plan_normalize import PlanNorm, plan_hash
+from .artifacts import ARTIFACTS
+from .db import connect, transaction
+from .frontier import FRONTIER
+from mlcp.common.logger import get_logger
+from mlcp.common.lru import LRUCache
+from mlcp.common.metrics import REGISTRY
+
+from .plan_codec import compress_body, decompress_body, encode_gates
+from .plan_diff import diff_plans
+from .plan_graph import analyze
+from .plan_normalize import PlanNorm, norm_from_json, plan_hash
+
+_LOG = get_logger(__name__)
+
+PLANS_SEALED = REGISTRY.counter(
+    "mlcp_plans_sealed_total",
+    "Plan versions sealed, by whether the body was new or deduplicated.",
+    ("body",),
+)
+
+# (run_id, plan_version) -> plan_hash; sealed versions never change, so entries never go stale
+_VERSION_HASHES: LRUCache[tuple[str, int], str] = LRUCache(
+    int(os.getenv("MLCP_VERSION_HASH_CACHE", "4096"))
+)
+
 
 def _utcnow() -> str:
     return datetime.now(timezone.utc).isoformat(timespec="seconds")
 
 
-def _next_version(run_id: str) -> int:
-    conn = connect()
+def _next_version(conn: Connection, run_id: str) -> int:
     row = conn.execute(
         "SELECT COALESCE(MAX(plan_version), 0) AS v FROM plans WHERE run_id = ?", (run_id,)
     ).fetchone()
@@ -22,69 +45,165 @@ def _next_version(run_id: str) -> int:
     return int(row["v"]) + 1
 
 
-def persist_plan(run_id: str, norm: PlanNorm, data_root: Path, raw_text: str | None) -> Tuple[int, str]:
-    """
-    Stores the normalized plan and indexes. Returns (plan_version, plan_hash).
-    Optionally writes the raw upload to workspace for audit.
-    """
-    version = _next_version(run_id)
-    phash = plan_hash(norm)
-    conn = connect()
-
-    body_json = json.dumps(asdict(norm), separators=(",", ":"))
-    now = _utcnow()
+def _store_body(conn: Connection, phash: str, norm: PlanNorm, body_json: str, now: str) -> bool:
+    """Insert the plan body and its node/edge indexes once per plan_hash. Returns True if new."""
+    seen = conn.execute("SELECT 1 FROM plan_bodies WHERE plan_hash = ?", (phash,)).fetchone()
+    if seen is not None:
+        return False
 
+    topo = analyze([n.id for n in norm.nodes], norm.edges)
+    topo_index = {nid: i for i, nid in enumerate(topo.order)}
     nodes_rows = [
         (
-            run_id,
-            version,
+            phash,
             n.id,
             n.role,
             int(n.retries),
             int(n.timeout_ms),
-            json.dumps(n.gates, separators=(",", ":")),
+            encode_gates(n.gates),
+            topo_index.get(n.id, -1),
+            topo.level.get(n.id, -1),
+            topo.in_degree.get(n.id, 0),
+            topo.out_degree.get(n.id, 0),
         )
         for n in norm.nodes
     ]
-    edges_rows = [(run_id, version, a, b) for (a, b) in norm.edges]
+    edges_rows = [(phash, a, b) for (a, b) in norm.edges]
+
+    conn.execute(
+        "INSERT INTO plan_bodies(plan_hash, body_z, nodes, edges, created_at) "
+        "VALUES (?, ?, ?, ?, ?)",
+        (phash, compress_body(body_json), norm.stats_nodes, norm.stats_edges, now),
+    )
+    conn.executemany(
+        "INSERT INTO plan_body_nodes(plan_hash, node_id, role, retries, timeout_ms, gates_mask,"
+        " topo_index, level, in_degree, out_degree)"
+        " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        nodes_rows,
+    )
+    if edges_rows:
+        # duplicate edges collapse here; the full list stays in the body
+        conn.executemany(
+            "INSERT OR IGNORE INTO plan_body_edges(plan_hash, src, dst) VALUES (?, ?, ?)",
+            edges_rows,
+        )
+    return True
+
+
+def resolve_version(conn: Connection, run_id: str, version: int | None) -> tuple[int, str] | None:
+    """(plan_version, plan_hash) for `version`, or for the latest version when None."""
+    if version is not None:
+        cached = _VERSION_HASHES.get((run_id, version))
+        if cached is not None:
+            return version, cached
+        row = conn.execute(
+            "SELECT plan_version, plan_hash FROM plans WHERE run_id = ? AND plan_version = ?",
+            (run_id, version),
+        ).fetchone()
+    else:
+        row = conn.execute(
+            "SELECT plan_version, plan_hash FROM plans "
+            "WHERE run_id = ? ORDER BY plan_version DESC LIMIT 1",
+            (run_id,),
+        ).fetchone()
+    if row is None:
+        return None
+    ver, phash = int(row["plan_version"]), str(row["plan_hash"])
+    _VERSION_HASHES.put((run_id, ver), phash)
+    return ver, phash
+
+
+def load_body_json(conn: Connection, phash: str) -> str:
+    row = conn.execute("SELECT body_z FROM plan_bodies WHERE plan_hash = ?", (phash,)).fetchone()
+    assert row is not None
+    return decompress_body(bytes(row["body_z"]))
+
+
+def load_norm(conn: Connection, run_id: str, version: int) -> tuple[str, PlanNorm] | None:
+    """(plan_hash, PlanNorm) for a sealed version, or None if it does not exist."""
+    row = conn.execute(
+        "SELECT p.plan_hash, b.body_z FROM plans p JOIN plan_bodies b ON b.plan_hash = p.plan_hash "
+        "WHERE p.run_id = ? AND p.plan_version = ?",
+        (run_id, version),
+    ).fetchone()
+    if row is None:
+        return None
+    return str(row["plan_hash"]), norm_from_json(decompress_body(bytes(row["body_z"])))
+
+
+def _carry_over(
+    conn: Connection, run_id: str, version: int, phash: str, norm: PlanNorm, now: str
+) -> int:
+    """
+    Copy `complete` task states from the previous version for nodes whose definition
+    and ancestors are unchanged, so a re-seal does not re-run finished work.
+    """
+    if version <= 1:
+        return 0
+    done = [
+        str(r["node_id"])
+        for r in conn.execute(
+            "SELECT node_id FROM run_tasks "
+            "WHERE run_id = ? AND plan_version = ? AND status = 'complete'",
+            (run_id, version - 1),
+        ).fetchall()
+    ]
+    if not done:
+        return 0
+    prev = load_norm(conn, run_id, version - 1)
+    if prev is None:  # pragma: no cover
+        return 0
+    prev_hash, prev_norm = prev
+    if prev_hash == phash:
+        stable = {n.id for n in norm.nodes}
+    else:
+        stable = set(diff_plans(prev_norm, norm).stable)
+    carried = [nid for nid in done if nid in stable]
+    conn.executemany(
+        "INSERT INTO run_tasks(run_id, plan_version, node_id, status, updated_at) "
+        "VALUES (?, ?, ?, 'complete', ?)",
+        [(run_id, version, nid, now) for nid in carried],
+    )
+    return len(carried)
 
-    with conn:
+
+def persist_plan(run_id: str, norm: PlanNorm, raw_text: str | None) -> Tuple[int, str, int]:
+    """
+    Stores the normalized plan and indexes. Returns (plan_version, plan_hash, carried_over),
+    where carried_over counts completed tasks kept from the previous version.
+    Bodies are content-addressed: re-sealing a plan that is already stored (for
+    this or any other run) only adds a `plans` row.
+    Queues the raw upload (or normalized JSON) with the artifact store.
+    """
+    phash = plan_hash(norm)
+    conn = connect()
+
+    body_json = json.dumps(asdict(norm), separators=(",", ":"))
+    now = _utcnow()
+
+    with transaction(conn):
+        version = _next_version(conn, run_id)
+        new_body = _store_body(conn, phash, norm, body_json, now)
         conn.execute(
             "INSERT INTO plans(run_id, plan_version, plan_hash, created_at) VALUES (?, ?, ?, ?)",
             (run_id, version, phash, now),
         )
-        conn.execute(
-            "INSERT INTO plan_json(run_id, plan_version, body_json) VALUES (?, ?, ?)",
-            (run_id, version, body_json),
-        )
-        conn.executemany(
-            "INSERT INTO plan_nodes(run_id, plan_version, node_id, role, retries, timeout_ms, gates_json)"
-            " VALUES (?, ?, ?, ?, ?, ?, ?)",
-            nodes_rows,
-        )
-        if edges_rows:
-             conn.executemany(
-                "INSERT INTO plan_edges(run_id, plan_version, src, dst) VALUES (?, ?, ?, ?)",
-                edges_rows,
-            )
+        carried = _carry_over(conn, run_id, version, phash, norm, now)
         # flip run state
         conn.execute(
             "UPDATE runs SET plan_sealed = 1, state = 'AWAITING_EXECUTION', updated_at = ? WHERE run_id = ?",
             (now, run_id),
         )
+    PLANS_SEALED.inc(body="new" if new_body else "shared")
+    # drop any entry hydrated before this version existed
+    FRONTIER.invalidate(run_id, version)
+    if carried:
+        _LOG.info("plan_carry_over", run_id=run_id, plan_version=version, completed=carried)
 
-    # optional audit artifact
-    plan_dir = data_root / "layers" / "plans" / run_id
-    plan_dir = data_root / "layers" / "plans" / run_id
-    plan_dir.mkdir(parents=True, exist_ok=True)
-
+    # audit artifact: the raw upload when there was one, else the normalized JSON
     if raw_text is not None:
-        # The user uploaded text (YAML or JSON string). Preserve as YAML artifact.
-        artifact = plan_dir / f"v{version}.yaml"
-        artifact.write_text(raw_text, encoding="utf-8")
+        ARTIFACTS.submit(run_id, version, "yaml", raw_text)
     else:
-        # We received structured JSON -> persist the normalized JSON artifact.
-        artifact = plan_dir / f"v{version}.json"
-        artifact.write_text(body_json, encoding="utf-8")
+        ARTIFACTS.submit(run_id, version, "json", body_json)
 
-    return version, phash
\ No newline at end of file
+    return version, phash, carried
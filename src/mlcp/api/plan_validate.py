@@ -1,11 +1,16 @@
 from __future__ import annotations
 
+from collections.abc import Callable
 from dataclasses import dataclass
-from typing import Any, TypeAlias, Union
+from typing import Any, TypeAlias, Union, cast
 
+import json
 import os
+import re
 import yaml
 
+from .plan_graph import analyze, find_cycles
+
 # Type aliases for JSON-like values
 JSONScalar: TypeAlias = Union[str, int, float, bool, None]
 JSONList: TypeAlias = list['JSONVal']
@@ -18,8 +23,13 @@ PLAN_MAX_BYTES = int(os.getenv("PLAN_MAX_BYTES", "1000000"))
 PLAN_MAX_NODES = int(os.getenv("PLAN_MAX_NODES", "500"))
 PLAN_MAX_EDGES = int(os.getenv("PLAN_MAX_EDGES", "1500"))
 
+# libyaml-backed loader when available (same safe semantics, much faster)
+_YAML_LOADER: Any = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
 ALLOWED_ROLES: set[str] = {"developer", "product_owner", "tester"}
-ALLOWED_GATES: set[str] = {"review"}
+# append-only: a gate's index is its bit in stored gate masks (see plan_codec)
+GATE_ORDER: tuple[str, ...] = ("review",)
+ALLOWED_GATES: set[str] = set(GATE_ORDER)
 
 
 @dataclass(frozen=True, slots=True)
@@ -51,6 +61,28 @@ def _coerce_to_str_object_dict_loaded(src: Any) -> JSONDict:
     return {str(k): coerce_value(v) for k, v in src.items()}  # type: ignore
 
 
+def _as_json_map(src: dict[Any, Any]) -> JSONMap:
+    """Use `src` as-is when its keys are already strings (e.g. parsed via `_safe_parse`)."""
+    if all(isinstance(k, str) for k in src):
+        return cast(JSONMap, src)
+    return _coerce_to_str_object_dict_loaded(src)
+
+
+# \u escapes of UTF-16 surrogates: valid JSON, but a scanner error in YAML
+_SURROGATE_ESCAPE = re.compile(r"\\u[dD][89a-fA-F]")
+
+
+def _yaml_float(text: str) -> float | str:
+    """
+    A JSON float as YAML 1.1 resolves the same text: a float only with a `.` and,
+    if it has an exponent, a signed one ("1.5e+3"); otherwise ("1e3") a string.
+    """
+    mantissa, _, exponent = text.lower().partition("e")
+    if "." in mantissa and exponent[:1] in ("", "+", "-"):
+        return float(text)
+    return text
+
+
 def _safe_parse(
     plan: JSONDict | None,
     plan_text: str | None,
@@ -59,6 +91,7 @@ def _safe_parse(
     Return (data, errors).
     - If JSON `plan` is provided, trust it and copy (already dict[str, object]).
     - If `plan_text` is provided, YAML safe-load with a size check and coerce keys to str.
+      Text that looks like a JSON object is tried with the stdlib JSON parser first.
     """
     if plan is not None:
         return dict(plan), []  # keep as dict[str, object]
@@ -70,8 +103,22 @@ def _safe_parse(
     if len(raw) > PLAN_MAX_BYTES:
         return None, [ErrorItem("plan_too_large", str(len(raw)))]
 
+    # JSON text is also YAML; the fast path must load it exactly as YAML would, so the
+    # normalized plan and plan_hash do not depend on which parser handled the upload
+    if plan_text.lstrip()[:1] == "{" and not _SURROGATE_ESCAPE.search(plan_text):
+        try:
+            loaded_json: JSONDict = json.loads(
+                plan_text,
+                parse_float=_yaml_float,
+                parse_constant=str,  # NaN / Infinity / -Infinity are plain strings in YAML
+            )
+        except ValueError:
+            pass  # not strict JSON (e.g. YAML flow mapping); fall through to YAML
+        else:
+            return loaded_json, []  # a JSON object: str keys, JSON values; nothing to coerce
+
     try:
-        loaded = yaml.safe_load(plan_text)  # type: ignore[no-untyped-call]
+        loaded = yaml.load(plan_text, Loader=_YAML_LOADER)
     except Exception as exc:  # pragma: no cover
         return None, [ErrorItem("invalid_format", f"yaml_parse_error:{exc}")]
 
@@ -83,60 +130,21 @@ def _safe_parse(
 
 
 def _collect_cycles(nodes: list[str], edges: list[tuple[str, str]], limit: int = 3) -> list[list[str]]:
-    graph: dict[str, list[str]] = {n: [] for n in nodes}
-    for a, b in edges:
-        graph.setdefault(a, []).append(b)
-
-    visiting: set[str] = set()
-    visited: set[str] = set()
-    parent: dict[str, str | None] = {n: None for n in nodes}
-    cycles: list[list[str]] = []
-
-    def dfs(u: str) -> None:
-        if len(cycles) >= limit:
-            return
-        visiting.add(u)
-        for v in graph.get(u, []):
-            if v in visiting:
-                # reconstruct simple cycle: v .. u -> v
-                path: list[str] = [v]
-                cur: str | None = u
-                while cur is not None and cur != v:
-                    path.append(cur)
-                    cur = parent.get(cur)
-                path.append(v)
-                path.reverse()
-                if not cycles or cycles[-1] != path:
-                    cycles.append(path)
-            elif v not in visited:
-                parent[v] = u
-                dfs(v)
-                if len(cycles) >= limit:
-                    return
-        visiting.remove(u)
-        visited.add(u)
-
-    for n in nodes:
-        if n not in visited:
-            dfs(n)
-            if len(cycles) >= limit:
-                break
-    return cycles
+    # linear Kahn pass first; the DFS listing only runs when a cycle exists
+    if analyze(nodes, edges).acyclic:
+        return []
+    return find_cycles(nodes, edges, limit=limit)
 
 
-def validate_plan(
-    plan: JSONDict | None,
-    plan_text: str | None,
-) -> tuple[bool, list[ErrorItem], PlanStats | None]:
+def _validate_data(
+    data: JSONDict,
+    on_node: Callable[[JSONMap], None] | None = None,
+) -> tuple[list[ErrorItem], list[str], list[tuple[str, str]]]:
     """
-    Validate structure, references, and acyclicity.
-    Returns: (ok, errors, stats) where errors is a list and stats is None when ok=False.
+    Single pass over nodes and edges. `on_node` is called with every accepted node
+    so callers can build derived forms without walking the plan again.
+    Returns (errors, node_ids, edges).
     """
-    data, parse_errors = _safe_parse(plan, plan_text)
-    if parse_errors:
-        return False, parse_errors, None
-    assert data is not None
-
     errors: list[ErrorItem] = []
 
     # --- schema_version ---
@@ -150,13 +158,13 @@ def validate_plan(
     edges_raw: JSONVal = data.get("edges", [])
 
     if isinstance(nodes_raw, list):
-        nodes_seq: list[JSONVal] = list(nodes_raw)
+        nodes_seq: list[JSONVal] = nodes_raw
     else:
         errors.append(ErrorItem("invalid_format", "nodes must be a list"))
         nodes_seq = []
 
     if isinstance(edges_raw, list):
-        edges_seq: list[JSONVal] = list(edges_raw)
+        edges_seq: list[JSONVal] = edges_raw
     else:
         errors.append(ErrorItem("invalid_format", "edges must be a list"))
         edges_seq = []
@@ -170,8 +178,7 @@ def validate_plan(
             errors.append(ErrorItem("invalid_format", f"nodes[{idx}] must be an object"))
             continue
 
-        # build a typed dict[str, object] without relying on generic .get of Unknown
-        node_map: JSONMap = _coerce_to_str_object_dict_loaded(node_any)
+        node_map: JSONMap = _as_json_map(node_any)
 
         nid = str(node_map.get("id", "")).strip()
         name = str(node_map.get("name", "")).strip()
@@ -198,6 +205,8 @@ def validate_plan(
 
         seen.add(nid)
         node_ids.append(nid)
+        if on_node is not None:
+            on_node(node_map)
 
     if len(node_ids) > PLAN_MAX_NODES:
         errors.append(ErrorItem("too_many_nodes", str(len(node_ids))))
@@ -235,6 +244,23 @@ def validate_plan(
     for cyc in _collect_cycles(node_ids, edge_list, limit=3):
         errors.append(ErrorItem("cycle_detected", " -> ".join(cyc)))
 
+    return errors, node_ids, edge_list
+
+
+def validate_plan(
+    plan: JSONDict | None,
+    plan_text: str | None,
+) -> tuple[bool, list[ErrorItem], PlanStats | None]:
+    """
+    Validate structure, references, and acyclicity.
+    Returns: (ok, errors, stats) where errors is a list and stats is None when ok=False.
+    """
+    data, parse_errors = _safe_parse(plan, plan_text)
+    if parse_errors:
+        return False, parse_errors, None
+    assert data is not None
+
+    errors, node_ids, edge_list = _validate_data(data)
     if errors:
         return False, errors, None
 
@@ -4,9 +4,13 @@ import time
 import uuid
 from typing import Optional
 
+from mlcp.common.metrics import REGISTRY
+
 from .db import connect
 from .models import RunCreate, RunRecord, utcnow
 
+RUNS_CREATED = REGISTRY.counter("mlcp_runs_created_total", "Runs created.")
+
 
 def _mk_run_id() -> str:
     """Generate a run ID with timestamp + short UUID for ordering & uniqueness."""
@@ -28,6 +32,7 @@ def create_run(payload: RunCreate) -> RunRecord:
         )
         row = conn.execute("SELECT * FROM runs WHERE run_id = ?", (run_id,)).fetchone()
     assert row is not None
+    RUNS_CREATED.inc()
     return RunRecord(**dict(row))
 
 
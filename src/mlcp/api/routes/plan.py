@@ -6,7 +6,7 @@ from typing import Any, Optional
 from fastapi import APIRouter, status
 from pydantic import BaseModel, Field
 
-from ..plan_validate import validate_plan
+from ..plan_cache import prepare_plan_cached
 
 router = APIRouter(prefix="/v1", tags=["plan"])
 
@@ -18,8 +18,9 @@ class PlanValidateBody(BaseModel):
 
 @router.post("/plan:validate", status_code=status.HTTP_200_OK)  # type: ignore[unused-function]
 def plan_validate(body: PlanValidateBody) -> dict[str, Any]:
-    ok, errors, stats = validate_plan(plan=body.plan, plan_text=body.plan_text)
-    if not ok:
-        return {"ok": False, "errors": [asdict(e) for e in errors]}
+    prepared = prepare_plan_cached(plan=body.plan, plan_text=body.plan_text)
+    if not prepared.ok:
+        return {"ok": False, "errors": [asdict(e) for e in prepared.errors]}
+    stats = prepared.stats
     assert stats is not None
     return {"ok": True, "nodes": stats.nodes, "edges": stats.edges}
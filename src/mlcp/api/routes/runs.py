@@ -1,26 +1,68 @@
 from __future__ import annotations
 
-import os
+import asyncio
 import json
-from dataclasses import asdict, dataclass
+import os
+import time
+from collections.abc import AsyncIterator
+from dataclasses import asdict
 from datetime import datetime, timezone
-from pathlib import Path
-from typing import Any, Optional, cast
+from typing import Any, Literal, Optional
 from sqlite3 import Connection
 
-from fastapi import APIRouter, HTTPException, Query, status
-from fastapi.responses import Response
+from fastapi import APIRouter, Header, HTTPException, Query, Request, status
+from fastapi.responses import Response, StreamingResponse
 from pydantic import BaseModel, Field
 
-from ..db import connect
+from mlcp.common.metrics import REGISTRY
+
+from ..artifacts import ARTIFACTS, MEDIA_TYPES, StoredArtifact
+from ..db import connect, run_db
+from ..frontier import FRONTIER, RunFrontier, wait_for_change, write_statuses
+from ..http_cache import (
+    BODIES,
+    CACHE_IMMUTABLE,
+    CACHE_REVALIDATE,
+    accepts_gzip,
+    cached_response,
+    match_etag,
+    not_modified,
+)
+from ..leases import Lease, claim, heartbeat, release
 from ..models import RunCreate, RunRecord
 from ..repo import create_run
-from ..plan_normalize import normalize_plan
-from ..plan_store import persist_plan
-from ..plan_validate import JSONDict, validate_plan
+from ..plan_cache import prepare_plan_cached
+from ..plan_diff import diff_plans
+from ..plan_schedule import load_schedule
+from ..plan_store import load_body_json, load_norm, persist_plan, resolve_version
 
 router = APIRouter(prefix="/v1/runs", tags=["runs"])
 
+FRONTIER_HEARTBEAT_SEC = float(os.getenv("MLCP_FRONTIER_HEARTBEAT_SEC", "15"))
+# how often an idle poll/stream rechecks SQLite for status writes made by other processes
+FRONTIER_RESYNC_SEC = float(os.getenv("MLCP_FRONTIER_RESYNC_SEC", "1"))
+# open SSE streams per API process: N uvicorn workers admit N x this many in total
+FRONTIER_MAX_STREAMS = int(os.getenv("MLCP_FRONTIER_MAX_STREAMS", "256"))
+TASK_BATCH_MAX = int(os.getenv("MLCP_TASK_BATCH_MAX", "500"))
+SEAL_CONCURRENCY = int(os.getenv("MLCP_SEAL_CONCURRENCY", "4"))
+TASKS_FINISHED = REGISTRY.counter(
+    "mlcp_tasks_finished_total",
+    "Task status updates by resulting status (leases exhausted count as failed).",
+    ("status",),
+)
+
+
+def seal_slots(request: Request) -> asyncio.Semaphore:
+    """
+    The app's seal semaphore. Seals are CPU-heavy (parse + validate + hash); capping
+    them keeps bursts from occupying every DB worker and starving cheap reads. It is
+    created per app in the lifespan, so it binds to that app's event loop only.
+    """
+    slots: asyncio.Semaphore | None = getattr(request.app.state, "seal_slots", None)
+    if slots is None:  # app served without its lifespan
+        slots = request.app.state.seal_slots = asyncio.Semaphore(max(1, SEAL_CONCURRENCY))
+    return slots
+
 class PlanSealBody(BaseModel):
     plan: Optional[dict[str, Any]] = Field(default=None, description="JSON plan object")
     plan_text: Optional[str] = Field(default=None, description="YAML or JSON as text")
@@ -33,6 +75,47 @@ class PlanSealResponse(BaseModel):
     plan_hash: str
     nodes: int
     edges: int
+    carried_over: int = 0
+
+class PlanDiffResponse(BaseModel):
+    run_id: str
+    from_version: int
+    to_version: int
+    from_hash: str
+    to_hash: str
+    nodes_added: list[str]
+    nodes_removed: list[str]
+    nodes_changed: list[str]
+    edges_added: list[tuple[str, str]]
+    edges_removed: list[tuple[str, str]]
+    carry_over: list[str]
+
+class NodeScheduleItem(BaseModel):
+    node_id: str
+    role: str
+    level: int
+    duration_ms: int
+    earliest_start_ms: int
+    latest_start_ms: int
+    slack_ms: int
+    critical: bool
+
+class RoleParallelismItem(BaseModel):
+    role: str
+    nodes: int
+    work_ms: int
+    max_parallel: int
+
+class PlanAnalysisResponse(BaseModel):
+    run_id: str
+    plan_version: int
+    plan_hash: str
+    makespan_ms: int
+    critical_path: list[str]
+    max_parallel: int
+    level_width: list[int]
+    roles: list[RoleParallelismItem]
+    nodes: list[NodeScheduleItem]
 
 class PlanVersionItem(BaseModel):
     version: int
@@ -46,6 +129,12 @@ class FrontierItem(BaseModel):
     timeout_ms: int
     gates: list[str]
 
+class FrontierChanges(BaseModel):
+    plan_version: int
+    cursor: str
+    reset: bool
+    nodes: list[FrontierItem]
+
 class TaskUpdateResponse(BaseModel):
     ok: bool = True
     run_id: str
@@ -54,12 +143,31 @@ class TaskUpdateResponse(BaseModel):
     status: str
     updated_at: str
 
-@dataclass(frozen=True, slots=True)
-class _NodeMeta:
-    role: str
-    retries: int
-    timeout_ms: int
-    gates: list[str]
+class LeaseItem(FrontierItem):
+    lease_id: str
+    worker_id: str
+    attempt: int
+    expires_at: str
+
+class ClaimResponse(BaseModel):
+    ok: bool = True
+    run_id: str
+    plan_version: int
+    leases: list[LeaseItem]
+    exhausted: list[str]
+
+class TaskStatusItem(BaseModel):
+    node_id: str = Field(min_length=1)
+    status: Literal["complete", "failed"]
+
+class TaskBatchResponse(BaseModel):
+    ok: bool = True
+    run_id: str
+    plan_version: int
+    updated_at: str
+    tasks: list[TaskStatusItem]
+    frontier_added: list[FrontierItem]
+    frontier_removed: list[str]
 
 def _utcnow() -> str:
     return datetime.now(timezone.utc).isoformat(timespec="seconds")
@@ -81,7 +189,8 @@ def _ensure_run_exists(run_id: str) -> None:
     
 def _ensure_node_exists(conn: Connection, run_id: str, version: int, node_id: str) -> None:
     row = conn.execute(
-        "SELECT 1 FROM plan_nodes WHERE run_id = ? AND plan_version = ? AND node_id = ?",
+        "SELECT 1 FROM plans p JOIN plan_body_nodes n ON n.plan_hash = p.plan_hash "
+        "WHERE p.run_id = ? AND p.plan_version = ? AND n.node_id = ?",
         (run_id, version, node_id),
     ).fetchone()
     if row is None:
@@ -90,59 +199,40 @@ def _ensure_node_exists(conn: Connection, run_id: str, version: int, node_id: st
 def _upsert_task_status(run_id: str, version: int, node_id: str, status_val: str) -> TaskUpdateResponse:
     conn = connect()
     ts = _utcnow()
-    with conn:
+    rf = _cached_frontier(conn, run_id, version)
+    with write_statuses(conn, rf, run_id, version) as write:
         conn.execute(
             "INSERT INTO run_tasks(run_id, plan_version, node_id, status, updated_at) "
             "VALUES (?, ?, ?, ?, ?) "
             "ON CONFLICT(run_id, plan_version, node_id) DO UPDATE SET status = excluded.status, updated_at = excluded.updated_at",
             (run_id, version, node_id, status_val, ts),
         )
+        release(conn, run_id, version, [node_id])
+        write.statuses[node_id] = status_val
+    TASKS_FINISHED.inc(status=status_val)
     return TaskUpdateResponse(ok=True, run_id=run_id, plan_version=version, node_id=node_id, status=status_val, updated_at=ts)
 
 
 @router.post("", response_model=RunRecord, status_code=status.HTTP_201_CREATED)  # type: ignore
-def _create_run(body: RunCreate) -> RunRecord:  # pyright: ignore[reportUnusedFunction]
-    return create_run(body)
+async def _create_run(body: RunCreate) -> RunRecord:  # pyright: ignore[reportUnusedFunction]
+    return await run_db(create_run, body)
 
 
-@router.post("/{run_id}/plan:seal", response_model=PlanSealResponse)  # type: ignore[unused-function]
-def plan_seal(run_id: str, body: PlanSealBody) -> PlanSealResponse:
+def _plan_seal(run_id: str, body: PlanSealBody) -> PlanSealResponse:
     _ensure_run_exists(run_id)
 
-    ok, errors, _stats = validate_plan(plan=body.plan, plan_text=body.plan_text)
-    if not ok:
+    prepared = prepare_plan_cached(plan=body.plan, plan_text=body.plan_text)
+    if not prepared.ok:
         raise HTTPException(
             status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
-            detail=[asdict(e) for e in errors],
+            detail=[asdict(e) for e in prepared.errors],
         )
+    norm = prepared.norm
+    assert norm is not None
+    # raw uploads are kept as the audit artifact; structured JSON stores the normalized form
+    raw_text: str | None = body.plan_text if body.plan is None else None
 
-    # normalize + store
-    raw_text: str | None = None
-    if body.plan is not None:
-        data: JSONDict = cast(JSONDict, dict(body.plan))
-    else:
-        assert body.plan_text is not None
-        import yaml 
-
-        loaded = yaml.safe_load(body.plan_text)  # type: ignore[no-untyped-call]
-        if not isinstance(loaded, dict):
-            raise HTTPException(
-                status_code=422,
-                detail=[{"code": "invalid_format", "detail": "root must be object"}],
-            )
-        # Build a typed dict[str, JSONVal] explicitly (avoids Unknown types for k/v)
-        data: JSONDict = {}
-        for k_obj, v in loaded.items():  # type: ignore[dict-item]
-            k = k_obj if isinstance(k_obj, str) else str(k_obj)  # type: ignore[arg-type]
-            data[k] = v
-        raw_text = body.plan_text
-
-    norm = normalize_plan(data)
-
-    data_root = Path(os.getenv("DATA_ROOT", "./workspace")).resolve()
-    data_root.mkdir(parents=True, exist_ok=True)
-
-    version, phash = persist_plan(run_id=run_id, norm=norm, data_root=data_root, raw_text=raw_text)
+    version, phash, carried = persist_plan(run_id=run_id, norm=norm, raw_text=raw_text)
 
     return PlanSealResponse(
         ok=True,
@@ -151,139 +241,488 @@ def plan_seal(run_id: str, body: PlanSealBody) -> PlanSealResponse:
         plan_hash=phash,
         nodes=norm.stats_nodes,
         edges=norm.stats_edges,
+        carried_over=carried,
     )
 
-@router.get("/{run_id}/plan:versions", response_model=list[PlanVersionItem])  # type: ignore[unused-function]
-def list_plan_versions(run_id: str) -> list[PlanVersionItem]:
-    _ensure_run_exists(run_id)
+@router.post("/{run_id}/plan:seal", response_model=PlanSealResponse)  # type: ignore[unused-function]
+async def plan_seal(run_id: str, body: PlanSealBody, request: Request) -> PlanSealResponse:
+    async with seal_slots(request):
+        return await run_db(_plan_seal, run_id, body)
+
+def _list_plan_versions(
+    run_id: str, if_none_match: Optional[str], accept_encoding: Optional[str]
+) -> Response:
     conn = connect()
-    rows = conn.execute(
-        "SELECT plan_version, plan_hash, created_at FROM plans "
-        "WHERE run_id = ? ORDER BY plan_version ASC",
-        (run_id,),
-    ).fetchall()
-    out: list[PlanVersionItem] = []
-    for r in rows:
-        out.append(
+    latest = resolve_version(conn, run_id, None)
+    if latest is None:
+        _ensure_run_exists(run_id)
+        latest = (0, "")
+    # versions are append-only, so the newest one identifies the whole list
+    etag = f'"v{latest[0]}-{latest[1][:16]}"'
+    hit = match_etag(if_none_match, etag)
+    if hit is not None:
+        return not_modified(hit, CACHE_REVALIDATE)
+
+    def build() -> bytes:
+        rows = conn.execute(
+            "SELECT plan_version, plan_hash, created_at FROM plans "
+            "WHERE run_id = ? ORDER BY plan_version ASC",
+            (run_id,),
+        ).fetchall()
+        items = [
             PlanVersionItem(
                 version=int(r["plan_version"]),
                 plan_hash=str(r["plan_hash"]),
                 created_at=str(r["created_at"]),
-            )
-        )
-    return out
+            ).model_dump()
+            for r in rows
+        ]
+        return json.dumps(items, separators=(",", ":")).encode("utf-8")
 
-@router.get("/{run_id}/plan:norm.json")  # type: ignore[unused-function]
-def get_plan_norm_json(run_id: str, version: Optional[int] = Query(default=None)) -> Response:
+    entry = BODIES.get_or_build(("versions", run_id), etag, "application/json", build)
+    return cached_response(entry, accept_encoding=accept_encoding, cache_control=CACHE_REVALIDATE)
+
+@router.get("/{run_id}/plan:versions", response_model=list[PlanVersionItem])  # type: ignore[unused-function]
+async def list_plan_versions(
+    run_id: str,
+    if_none_match: Optional[str] = Header(default=None),
+    accept_encoding: Optional[str] = Header(default=None),
+) -> Response:
+    return await run_db(_list_plan_versions, run_id, if_none_match, accept_encoding)
+
+def _get_plan_diff(
+    run_id: str, from_version: Optional[int], to_version: Optional[int]
+) -> PlanDiffResponse:
     _ensure_run_exists(run_id)
     conn = connect()
+    to_ver = _latest_version(run_id, conn) if to_version is None else to_version
+    from_ver = max(to_ver - 1, 1) if from_version is None else from_version
+    old = load_norm(conn, run_id, from_ver)
+    new = load_norm(conn, run_id, to_ver)
+    if old is None or new is None:
+        raise HTTPException(status_code=404, detail="plan_not_found")
+    d = diff_plans(old[1], new[1])
+    return PlanDiffResponse(
+        run_id=run_id,
+        from_version=from_ver,
+        to_version=to_ver,
+        from_hash=old[0],
+        to_hash=new[0],
+        nodes_added=d.nodes_added,
+        nodes_removed=d.nodes_removed,
+        nodes_changed=d.nodes_changed,
+        edges_added=d.edges_added,
+        edges_removed=d.edges_removed,
+        carry_over=d.stable,
+    )
+
+@router.get("/{run_id}/plan:diff", response_model=PlanDiffResponse)  # type: ignore[unused-function]
+async def get_plan_diff(
+    run_id: str,
+    from_version: Optional[int] = Query(default=None, alias="from", ge=1),
+    to_version: Optional[int] = Query(default=None, alias="to", ge=1),
+) -> PlanDiffResponse:
+    """Diff two sealed versions (default: latest against the one before it)."""
+    return await run_db(_get_plan_diff, run_id, from_version, to_version)
+
+def _get_plan_analysis(run_id: str, version: Optional[int]) -> PlanAnalysisResponse:
+    conn = connect()
+    resolved = resolve_version(conn, run_id, version)
+    if resolved is None:
+        _ensure_run_exists(run_id)
+        raise HTTPException(status_code=404, detail="plan_not_found")
+    ver, phash = resolved
+    sched = load_schedule(conn, phash)
+    return PlanAnalysisResponse(
+        run_id=run_id,
+        plan_version=ver,
+        plan_hash=phash,
+        makespan_ms=sched.makespan_ms,
+        critical_path=sched.critical_path,
+        max_parallel=sched.max_parallel,
+        level_width=sched.level_width,
+        roles=[
+            RoleParallelismItem(
+                role=r.role, nodes=r.nodes, work_ms=r.work_ms, max_parallel=r.max_parallel
+            )
+            for r in sched.roles
+        ],
+        nodes=[
+            NodeScheduleItem(
+                node_id=n.node_id,
+                role=n.role,
+                level=n.level,
+                duration_ms=n.duration_ms,
+                earliest_start_ms=n.earliest_start_ms,
+                latest_start_ms=n.latest_start_ms,
+                slack_ms=n.slack_ms,
+                critical=n.slack_ms == 0,
+            )
+            for n in sched.nodes
+        ],
+    )
+
+@router.get("/{run_id}/plan:analysis", response_model=PlanAnalysisResponse)  # type: ignore[unused-function]
+async def get_plan_analysis(
+    run_id: str, version: Optional[int] = Query(default=None)
+) -> PlanAnalysisResponse:
+    """
+    Schedule properties with timeout_ms as each node's duration: critical path and
+    makespan, earliest/latest start and slack per node, nodes per topological level,
+    and per role the peak concurrency of the earliest-start schedule (the worker
+    count that role needs to never delay the plan).
+    """
+    return await run_db(_get_plan_analysis, run_id, version)
+
+def _get_plan_norm_json(
+    run_id: str,
+    version: Optional[int],
+    if_none_match: Optional[str],
+    accept_encoding: Optional[str],
+) -> Response:
+    conn = connect()
+    resolved = resolve_version(conn, run_id, version)
+    if resolved is None:
+        _ensure_run_exists(run_id)
+        raise HTTPException(status_code=404, detail="plan_not_found")
+    ver, phash = resolved
+    body_etag = f'"{phash}"'
     if version is None:
-        row = conn.execute(
-            "SELECT plan_version, body_json FROM plan_json WHERE run_id = ? "
-            "ORDER BY plan_version DESC LIMIT 1",
-            (run_id,),
-        ).fetchone()
+        # the latest view also carries X-Plan-Version, which changes on an identical re-seal
+        etag, cache_control = f'"v{ver}-{phash}"', CACHE_REVALIDATE
     else:
-        row = conn.execute(
-            "SELECT plan_version, body_json FROM plan_json WHERE run_id = ? AND plan_version = ?",
-            (run_id, version),
-        ).fetchone()
-    if row is None:
-        raise HTTPException(status_code=404, detail="plan_not_found")
-    body_json = str(row["body_json"])
-    return Response(content=body_json, media_type="application/json")
+        etag, cache_control = body_etag, CACHE_IMMUTABLE
+    hit = match_etag(if_none_match, etag)
+    if hit is not None:
+        return not_modified(hit, cache_control)
+    # bodies are content-addressed, so runs sealed with the same plan share one entry
+    entry = BODIES.get_or_build(
+        ("norm", phash),
+        body_etag,
+        "application/json",
+        lambda: load_body_json(conn, phash).encode("utf-8"),
+    )
+    return cached_response(
+        entry,
+        accept_encoding=accept_encoding,
+        cache_control=cache_control,
+        headers={"X-Plan-Version": str(ver)},
+        etag=etag,
+    )
 
-@router.get("/{run_id}/frontier", response_model=list[FrontierItem])  # type: ignore[unused-function]
-def get_frontier(run_id: str, version: Optional[int] = Query(default=None)) -> list[FrontierItem]:
+@router.get("/{run_id}/plan:norm.json")  # type: ignore[unused-function]
+async def get_plan_norm_json(
+    run_id: str,
+    version: Optional[int] = Query(default=None),
+    if_none_match: Optional[str] = Header(default=None),
+    accept_encoding: Optional[str] = Header(default=None),
+) -> Response:
+    """
+    Normalized plan JSON. A pinned `version` is served as immutable with the plan_hash
+    as ETag; the latest view's ETag also names the version, and it must revalidate
+    (cheaply, via If-None-Match).
+    """
+    return await run_db(_get_plan_norm_json, run_id, version, if_none_match, accept_encoding)
+
+def _open_plan_artifact(run_id: str, version: Optional[int]) -> tuple[int, StoredArtifact]:
     _ensure_run_exists(run_id)
+    ver = _latest_version(run_id, connect()) if version is None else int(version)
+    art = ARTIFACTS.open(run_id, ver)
+    if art is None:
+        raise HTTPException(status_code=404, detail="artifact_not_found")
+    return ver, art
+
+@router.get("/{run_id}/plan:artifact")  # type: ignore[unused-function]
+async def get_plan_artifact(
+    run_id: str,
+    version: Optional[int] = Query(default=None),
+    accept_encoding: Optional[str] = Header(default=None),
+) -> StreamingResponse:
+    """
+    Stream the audit artifact of a sealed version (the raw upload, or the normalized
+    JSON for structured seals). Clients that accept gzip get the stored bytes as-is.
+    """
+    ver, art = await run_db(_open_plan_artifact, run_id, version)
+    gz = accepts_gzip(accept_encoding)
+    headers = {"X-Plan-Version": str(ver), "Vary": "Accept-Encoding"}
+    if gz:
+        headers["Content-Encoding"] = "gzip"
+    return StreamingResponse(
+        art.iter_bytes(compressed=gz), media_type=MEDIA_TYPES[art.kind], headers=headers
+    )
+
+def _cached_frontier(conn: Connection, run_id: str, version: int) -> RunFrontier:
+    rf = FRONTIER.get(conn, run_id, version)
+    if rf is None:
+        raise HTTPException(status_code=404, detail="plan_not_found")
+    return rf
 
+def _frontier_for(run_id: str, version: Optional[int]) -> tuple[RunFrontier, int]:
+    _ensure_run_exists(run_id)
     conn = connect()
     ver = _latest_version(run_id, conn) if version is None else int(version)
+    return _cached_frontier(conn, run_id, ver), ver
+
+def _frontier_items(rf: RunFrontier, node_ids: list[str]) -> list[FrontierItem]:
+    items: list[FrontierItem] = []
+    for nid in node_ids:
+        m = rf.meta[nid]
+        items.append(
+            FrontierItem(
+                node_id=nid,
+                role=m.role,
+                retries=m.retries,
+                timeout_ms=m.timeout_ms,
+                gates=m.gates,
+            )
+        )
+    return items
 
+@router.get("/{run_id}/frontier", response_model=list[FrontierItem])  # type: ignore[unused-function]
+async def get_frontier(
+    run_id: str, version: Optional[int] = Query(default=None)
+) -> list[FrontierItem]:
+    rf, _ver = await run_db(_frontier_for, run_id, version)
+    # deterministic order by node_id (string)
+    return _frontier_items(rf, rf.ready_ids())
+
+@router.get("/{run_id}/frontier:poll", response_model=FrontierChanges)  # type: ignore[unused-function]
+async def poll_frontier(
+    run_id: str,
+    since: Optional[str] = Query(default=None, description="cursor from a previous response"),
+    timeout_sec: float = Query(default=25.0, ge=0.0, le=60.0),
+    version: Optional[int] = Query(default=None),
+) -> FrontierChanges:
+    """
+    Long-poll: return nodes that became ready after `since`, waiting up to
+    `timeout_sec` for one. Without a valid cursor the full frontier is returned
+    with reset=true.
+    """
+    rf, ver = await run_db(_frontier_for, run_id, version)
+    cursor, ids, reset = rf.changes_since(since)
+    deadline = time.monotonic() + timeout_sec
+    while not ids and not reset:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            break
+        if not await wait_for_change(rf, cursor, min(remaining, FRONTIER_RESYNC_SEC)):
+            # writes from other processes only show up when the frontier is read
+            rf, _ = await run_db(_frontier_for, run_id, ver)
+        cursor, ids, reset = rf.changes_since(since)
+    return FrontierChanges(
+        plan_version=ver, cursor=cursor, reset=reset, nodes=_frontier_items(rf, ids)
+    )
 
-    # Load node metadata with concrete types
-    node_rows = conn.execute(
-        "SELECT node_id, role, retries, timeout_ms, gates_json "
-        "FROM plan_nodes WHERE run_id = ? AND plan_version = ?",
-        (run_id, ver),
-    ).fetchall()
-    meta: dict[str, _NodeMeta] = {}
-    for r in node_rows:
-        node_id = str(r["node_id"])
-        role = str(r["role"])
-        retries = int(cast(int, r["retries"]))
-        timeout_ms = int(cast(int, r["timeout_ms"]))
+def _sse(event: str, cursor: str, ver: int, items: list[FrontierItem]) -> str:
+    data = json.dumps(
+        {"plan_version": ver, "nodes": [i.model_dump() for i in items]}, separators=(",", ":")
+    )
+    return f"event: {event}\nid: {cursor}\ndata: {data}\n\n"
+
+@router.get("/{run_id}/frontier:stream")  # type: ignore[unused-function]
+async def stream_frontier(
+    request: Request,
+    run_id: str,
+    since: Optional[str] = Query(default=None),
+    version: Optional[int] = Query(default=None),
+    last_event_id: Optional[str] = Header(default=None),
+) -> StreamingResponse:
+    """
+    Server-Sent Events: a `snapshot` event with the full frontier, then a `ready`
+    event whenever nodes become ready. Event ids are cursors, so reconnecting with
+    Last-Event-ID resumes without gaps; a client that falls behind the retained
+    event log gets a fresh `snapshot` instead of an unbounded backlog. Each API
+    process serves at most MLCP_FRONTIER_MAX_STREAMS streams at once.
+    """
+    state = request.app.state
+    # reserve the slot before the first await, so concurrent opens cannot all pass the check
+    if getattr(state, "frontier_streams", 0) >= FRONTIER_MAX_STREAMS:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="too_many_streams"
+        )
+    state.frontier_streams = getattr(state, "frontier_streams", 0) + 1
+    try:
+        rf, ver = await run_db(_frontier_for, run_id, version)
+    except BaseException:
+        state.frontier_streams -= 1
+        raise
+
+    async def events() -> AsyncIterator[str]:
+        nonlocal rf
+        cursor = since or last_event_id
         try:
-            gates_raw = json.loads(str(r["gates_json"]))
-            gates_list: list[str] = [x for x in cast(list[str], gates_raw)] if isinstance(gates_raw, list) else []
-        except Exception:
-            gates_list = []
-        meta[node_id] = _NodeMeta(role=role, retries=retries, timeout_ms=timeout_ms, gates=gates_list)
-
-    # Build predecessor map
-    pred: dict[str, set[str]] = {nid: set[str]() for nid in meta.keys()}
-    edge_rows = conn.execute(
-        "SELECT src, dst FROM plan_edges WHERE run_id = ? AND plan_version = ?",
-        (run_id, ver),
-    ).fetchall()
-    for r in edge_rows:
-        a = str(r["src"])
-        b = str(r["dst"])
-        if b not in pred:
-            pred[b] = set[str]()
-        if a not in pred:
-            pred[a] = set[str]()
-        pred[b].add(a)
-
-    # Completed/failed
-    done_rows = conn.execute(
-        "SELECT node_id, status FROM run_tasks WHERE run_id = ? AND plan_version = ?",
-        (run_id, ver),
-    ).fetchall()
-    completed: set[str] = set()
-    failed: set[str] = set()
-    for r in done_rows:
-        nid = str(r["node_id"])
-        st = str(r["status"])
-        if st == "complete":
-            completed.add(nid)
-        elif st == "failed":
-            failed.add(nid)
-
-    # Ready = not completed/failed and all predecessors completed
-    ready: list[FrontierItem] = []
-    for nid, m in meta.items():
-        if nid in completed or nid in failed:
-            continue
-        preds = pred.get(nid, set[str]())
-        if all(p in completed for p in preds):
-            ready.append(
-                FrontierItem(
-                    node_id=nid,
-                    role=m.role,
-                    retries=m.retries,
-                    timeout_ms=m.timeout_ms,
-                    gates=m.gates,
-                )
-            )
+            yield f"retry: {int(FRONTIER_HEARTBEAT_SEC * 1000)}\n\n"
+            last_sent = time.monotonic()
+            while not await request.is_disconnected():
+                new_cursor, ids, reset = rf.changes_since(cursor)
+                if ids or reset:
+                    event = "snapshot" if reset else "ready"
+                    yield _sse(event, new_cursor, ver, _frontier_items(rf, ids))
+                    last_sent = time.monotonic()
+                cursor = new_cursor
+                wait = min(FRONTIER_RESYNC_SEC, FRONTIER_HEARTBEAT_SEC)
+                if not await wait_for_change(rf, cursor, wait):
+                    # resync with writes from other processes; after an eviction this
+                    # rehydrates, and the epoch change forces a snapshot
+                    rf, _ = await run_db(_frontier_for, run_id, ver)
+                    if time.monotonic() - last_sent >= FRONTIER_HEARTBEAT_SEC:
+                        yield ": ping\n\n"
+                        last_sent = time.monotonic()
+        finally:
+            state.frontier_streams -= 1
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
-    # deterministic order by node_id (string)
-    ready.sort(key=lambda item: item.node_id)
-    return ready
+def _lease_item(rf: RunFrontier, lease: Lease) -> LeaseItem:
+    m = rf.meta[lease.node_id]
+    return LeaseItem(
+        node_id=lease.node_id,
+        role=m.role,
+        retries=m.retries,
+        timeout_ms=m.timeout_ms,
+        gates=m.gates,
+        lease_id=lease.lease_id,
+        worker_id=lease.worker_id,
+        attempt=lease.attempt,
+        expires_at=datetime.fromtimestamp(lease.expires_at, timezone.utc).isoformat(
+            timespec="milliseconds"
+        ),
+    )
 
-@router.post("/{run_id}/tasks/{node_id}:complete", response_model=TaskUpdateResponse)  # type: ignore[unused-function]
-def task_complete(run_id: str, node_id: str, version: Optional[int] = Query(default=None)) -> TaskUpdateResponse:
+def _frontier_claim(
+    run_id: str, role: Optional[str], max_nodes: int, worker_id: str, version: Optional[int]
+) -> ClaimResponse:
+    rf, ver = _frontier_for(run_id, version)
+    leases, exhausted = claim(connect(), rf, run_id, ver, worker_id, role, max_nodes, time.time())
+    if exhausted:
+        TASKS_FINISHED.inc(len(exhausted), status="failed")
+    return ClaimResponse(
+        run_id=run_id,
+        plan_version=ver,
+        leases=[_lease_item(rf, lease) for lease in leases],
+        exhausted=exhausted,
+    )
+
+@router.post("/{run_id}/frontier:claim", response_model=ClaimResponse)  # type: ignore[unused-function]
+async def frontier_claim(
+    run_id: str,
+    role: Optional[str] = Query(default=None),
+    max_nodes: int = Query(default=1, ge=1, le=100, alias="max"),
+    worker_id: str = Query(default="worker", min_length=1),
+    version: Optional[int] = Query(default=None),
+) -> ClaimResponse:
+    """
+    Lease up to `max` ready nodes to `worker_id`. A lease expires after the node's
+    timeout_ms unless extended via :heartbeat; expired leases are re-queued until
+    the node has used 1 + retries attempts, after which it is marked failed.
+    """
+    return await run_db(_frontier_claim, run_id, role, max_nodes, worker_id, version)
+
+def _task_heartbeat(run_id: str, node_id: str, lease_id: str, version: Optional[int]) -> LeaseItem:
+    rf, ver = _frontier_for(run_id, version)
+    if node_id not in rf.meta:
+        raise HTTPException(status_code=404, detail="node_not_found")
+    lease = heartbeat(connect(), rf, run_id, ver, node_id, lease_id, time.time())
+    if lease is None:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="lease_lost")
+    return _lease_item(rf, lease)
+
+@router.post("/{run_id}/tasks/{node_id}:heartbeat", response_model=LeaseItem)  # type: ignore[unused-function]
+async def task_heartbeat(
+    run_id: str,
+    node_id: str,
+    lease_id: str = Query(min_length=1),
+    version: Optional[int] = Query(default=None),
+) -> LeaseItem:
+    return await run_db(_task_heartbeat, run_id, node_id, lease_id, version)
+
+def _set_task_status(
+    run_id: str, node_id: str, version: Optional[int], status_val: str
+) -> TaskUpdateResponse:
     _ensure_run_exists(run_id)
     conn = connect()
     ver = _latest_version(run_id, conn) if version is None else int(version)
     _ensure_node_exists(conn, run_id, ver, node_id)
-    return _upsert_task_status(run_id, ver, node_id, "complete")
+    return _upsert_task_status(run_id, ver, node_id, status_val)
+
+
+@router.post("/{run_id}/tasks/{node_id}:complete", response_model=TaskUpdateResponse)  # type: ignore[unused-function]
+async def task_complete(
+    run_id: str, node_id: str, version: Optional[int] = Query(default=None)
+) -> TaskUpdateResponse:
+    return await run_db(_set_task_status, run_id, node_id, version, "complete")
 
 
 @router.post("/{run_id}/tasks/{node_id}:fail", response_model=TaskUpdateResponse)  # type: ignore[unused-function]
-def task_fail(run_id: str, node_id: str, version: Optional[int] = Query(default=None)) -> TaskUpdateResponse:
-    _ensure_run_exists(run_id)
+async def task_fail(
+    run_id: str, node_id: str, version: Optional[int] = Query(default=None)
+) -> TaskUpdateResponse:
+    return await run_db(_set_task_status, run_id, node_id, version, "failed")
+
+
+def _task_batch(
+    run_id: str, body: list[TaskStatusItem], version: Optional[int]
+) -> TaskBatchResponse:
+    rf, ver = _frontier_for(run_id, version)
+    updates = {item.node_id: item.status for item in body}  # last update per node wins
+
     conn = connect()
-    ver = _latest_version(run_id, conn) if version is None else int(version)
-    _ensure_node_exists(conn, run_id, ver, node_id)
-    return _upsert_task_status(run_id, ver, node_id, "failed")
\ No newline at end of file
+    ids = list(updates)
+    ts = _utcnow()
+    # the delta comes from applying exactly this commit, under the frontier's writer lock
+    with write_statuses(conn, rf, run_id, ver) as write:
+        placeholders = ",".join("?" * len(ids))
+        found = {
+            str(r["node_id"])
+            for r in conn.execute(
+                "SELECT n.node_id FROM plans p JOIN plan_body_nodes n ON n.plan_hash = p.plan_hash "
+                f"WHERE p.run_id = ? AND p.plan_version = ? AND n.node_id IN ({placeholders})",
+                (run_id, ver, *ids),
+            ).fetchall()
+        }
+        unknown = [nid for nid in ids if nid not in found]
+        if unknown:
+            raise HTTPException(
+                status_code=404,
+                detail=[{"code": "node_not_found", "detail": n} for n in unknown],
+            )
+        conn.executemany(
+            "INSERT INTO run_tasks(run_id, plan_version, node_id, status, updated_at) "
+            "VALUES (?, ?, ?, ?, ?) "
+            "ON CONFLICT(run_id, plan_version, node_id) DO UPDATE SET "
+            "status = excluded.status, updated_at = excluded.updated_at",
+            [(run_id, ver, nid, st, ts) for nid, st in updates.items()],
+        )
+        release(conn, run_id, ver, ids)
+        write.statuses.update(updates)
+
+    for st in updates.values():
+        TASKS_FINISHED.inc(status=st)
+    return TaskBatchResponse(
+        run_id=run_id,
+        plan_version=ver,
+        updated_at=ts,
+        tasks=[TaskStatusItem(node_id=nid, status=st) for nid, st in updates.items()],
+        frontier_added=_frontier_items(rf, write.added),
+        frontier_removed=write.removed,
+    )
+
+
+@router.post("/{run_id}/tasks:batch", response_model=TaskBatchResponse)  # type: ignore[unused-function]
+async def task_batch(
+    run_id: str, body: list[TaskStatusItem], version: Optional[int] = Query(default=None)
+) -> TaskBatchResponse:
+    """Apply many status updates in one transaction and return the resulting frontier delta."""
+    if not body:
+        raise HTTPException(
+            status_code=422, detail=[{"code": "empty_batch", "detail": "no updates"}]
+        )
+    if len(body) > TASK_BATCH_MAX:
+        raise HTTPException(
+            status_code=422, detail=[{"code": "batch_too_large", "detail": str(len(body))}]
+        )
+    return await run_db(_task_batch, run_id, body, version)
@@ -0,0 +1,40 @@
+from __future__ import annotations
+
+import os
+from functools import lru_cache
+from pathlib import Path
+from typing import Any
+
+import yaml
+
+from mlcp.common.logger import get_logger
+
+_LOG = get_logger(__name__)
+
+CONFIG_DIR = Path(os.getenv("MLCP_CONFIG_DIR", str(Path(__file__).resolve().parents[3] / "config")))
+
+
+@lru_cache(maxsize=None)
+def load_config(name: str = "mlcp.yaml") -> dict[str, Any]:
+    """
+    Parse a YAML file from the config directory (MLCP_CONFIG_DIR, default <repo>/config)
+    once per process. A missing or non-mapping file yields {}.
+    """
+    path = CONFIG_DIR / name
+    try:
+        with path.open(encoding="utf-8") as f:
+            data = yaml.safe_load(f)
+    except FileNotFoundError:
+        _LOG.warning("config_missing", path=str(path))
+        return {}
+    return data if isinstance(data, dict) else {}
+
+
+def config_value(dotted: str, default: Any = None, name: str = "mlcp.yaml") -> Any:
+    """Look up a dotted key such as "mlcp.temporal.retain_days"; `default` when absent."""
+    node: Any = load_config(name)
+    for part in dotted.split("."):
+        if not isinstance(node, dict) or part not in node:
+            return default
+        node = node[part]
+    return node
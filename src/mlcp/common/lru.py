@@ -0,0 +1,92 @@
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable
+from typing import Generic, TypeVar
+
+K = TypeVar("K")
+V = TypeVar("V")
+
+
+class LRUCache(Generic[K, V]):
+    """
+    Thread-safe bounded LRU with optional time-based expiry.
+    `ttl_sec` counts from insertion, or from last access when `sliding=True`.
+    """
+
+    def __init__(
+        self,
+        max_entries: int,
+        ttl_sec: float | None = None,
+        *,
+        sliding: bool = False,
+        on_evict: Callable[[K, V], None] | None = None,
+    ) -> None:
+        self.max_entries = max(1, max_entries)
+        self.ttl_sec = ttl_sec if ttl_sec and ttl_sec > 0 else None
+        self.sliding = sliding
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._on_evict = on_evict
+        self._data: OrderedDict[K, tuple[float, V]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def _expired(self, stamp: float, now: float) -> bool:
+        return self.ttl_sec is not None and now - stamp > self.ttl_sec
+
+    def _evict(self, key: K, value: V) -> None:
+        self.evictions += 1
+        if self._on_evict is not None:
+            self._on_evict(key, value)
+
+    def get(self, key: K) -> V | None:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            stamp, value = entry
+            if self._expired(stamp, now):
+                del self._data[key]
+                self._evict(key, value)
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            if self.sliding:
+                self._data[key] = (now, value)
+            self.hits += 1
+            return value
+
+    def put(self, key: K, value: V) -> None:
+        now = time.monotonic()
+        with self._lock:
+            self._data[key] = (now, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                old_key, (_, old_value) = self._data.popitem(last=False)
+                self._evict(old_key, old_value)
+
+    def pop(self, key: K) -> V | None:
+        with self._lock:
+            entry = self._data.pop(key, None)
+        return None if entry is None else entry[1]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "entries": len(self._data),
+            "capacity": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
@@ -0,0 +1,249 @@
+from __future__ import annotations
+
+import math
+import os
+import re
+from bisect import bisect_left
+from collections.abc import Mapping
+from dataclasses import dataclass, field
+from functools import partial
+from itertools import accumulate
+from typing import Any, Final
+
+from mlcp.common.lru import LRUCache
+
+from mlcp.context.fragments import Fragment, FragmentCache, canonical
+
+TOKEN_CACHE_SIZE = int(os.getenv("MLCP_TOKEN_CACHE_SIZE", "65536"))
+
+# letters ~4 chars/token, digits ~3, every other non-space char (punctuation, CJK, ...) ~1
+_PIECES = re.compile(r"[A-Za-z]+|[0-9]+|[^\sA-Za-z0-9]")
+
+
+def estimate_tokens(text: str) -> int:
+    """Fast local approximation of a BPE token count; no tokenizer dependency."""
+    n = 0
+    for piece in _PIECES.findall(text):
+        c = piece[0]
+        if c.isascii() and c.isalpha():
+            n += (len(piece) + 3) // 4
+        elif c.isascii() and c.isdigit():
+            n += (len(piece) + 2) // 3
+        else:
+            n += 1
+    return n
+
+
+class TokenEstimator:
+    """Token estimates per fragment, cached by (layer, version): shared layers count once."""
+
+    def __init__(self, max_entries: int = TOKEN_CACHE_SIZE) -> None:
+        self._cache: LRUCache[tuple[str, str], int] = LRUCache(max_entries)
+        self._items: LRUCache[tuple[str, str, tuple[str, ...]], list[int]] = LRUCache(max_entries)
+
+    def fragment(self, frag: Fragment) -> int:
+        """Tokens for `"layer":<fragment>` as it appears in the packet."""
+        key = (frag.layer, frag.version)
+        hit = self._cache.get(key)
+        if hit is not None:
+            return hit
+        n = estimate_tokens(f'"{frag.layer}":') + estimate_tokens(frag.raw.decode("utf-8")) + 1
+        self._cache.put(key, n)
+        return n
+
+    def item_costs(self, frag: Fragment, path: tuple[str, ...], items: list[Any]) -> list[int]:
+        """Running token totals of the list at `path`: entry i costs its first i+1 items."""
+        key = (frag.layer, frag.version, path)
+        hit = self._items.get(key)
+        if hit is not None:
+            return hit
+        costs = list(
+            accumulate(estimate_tokens(canonical(item).decode("utf-8")) + 1 for item in items)
+        )
+        self._items.put(key, costs)
+        return costs
+
+    def stats(self) -> dict[str, int]:
+        return self._cache.stats()
+
+
+@dataclass(frozen=True, slots=True)
+class TrimStep:
+    """One trimming move. `path` is relative to the layer; None drops the whole layer."""
+
+    layer: str
+    path: tuple[str, ...] | None
+    oldest_first: bool = False  # trim a list from the front instead of dropping the key
+
+
+# Applied in order until the packet fits; operational, security, global and task
+# essentials are never trimmed.
+TRIM_POLICY: Final[tuple[TrimStep, ...]] = (
+    TrimStep("telemetry", None),
+    TrimStep("temporal", ("previous_context_ids",), oldest_first=True),
+    TrimStep("temporal", ("forecast",)),
+    TrimStep("task", ("metadata",)),
+    TrimStep("agent", ("memory_id",)),
+)
+
+
+@dataclass(slots=True)
+class TokenAccount:
+    budget: int | None
+    budget_source: str | None
+    header: int
+    layers: dict[str, int] = field(default_factory=dict)
+    trimmed: list[dict[str, Any]] = field(default_factory=list)
+
+    @property
+    def total(self) -> int:
+        return self.header + sum(self.layers.values())
+
+    @property
+    def fits(self) -> bool:
+        return self.budget is None or self.total <= self.budget
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "budget": self.budget,
+            "budget_source": self.budget_source,
+            "total": self.total,
+            "fits": self.fits,
+            "header": self.header,
+            "layers": dict(self.layers),
+            "trimmed": list(self.trimmed),
+        }
+
+
+_MAX_BUDGET = 2**53  # larger budgets are effectively unbounded; keeps float() exact
+
+
+def _number(data: Any, *path: str) -> float | None:
+    node = data
+    for part in path:
+        if not isinstance(node, Mapping):
+            return None
+        node = node.get(part)
+    if not isinstance(node, (int, float)) or isinstance(node, bool):
+        return None
+    try:
+        value = float(node)
+    except OverflowError:  # an int too large for a float
+        return None
+    return value if math.isfinite(value) else None
+
+
+def packet_budget(
+    layers: Mapping[str, Fragment], max_tokens: int | None = None
+) -> tuple[int | None, str | None]:
+    """
+    Tightest of: the remaining operational budget (token_budget - current_usage),
+    the model's max_context_window, and an explicit per-request max_tokens.
+    """
+    candidates: list[tuple[float, str]] = []
+    op = layers.get("operational")
+    if op is not None:
+        budget = _number(op.data, "token_budget")
+        if budget is not None:
+            used = _number(op.data, "current_usage") or 0.0
+            candidates.append((budget - used, "operational.token_budget"))
+    agent = layers.get("agent")
+    if agent is not None:
+        window = _number(agent.data, "model_info", "max_context_window")
+        if window is not None:
+            candidates.append((window, "agent.model_info.max_context_window"))
+    if max_tokens is not None:
+        candidates.append((float(min(max_tokens, _MAX_BUDGET)), "request.max_tokens"))
+    if not candidates:
+        return None, None
+    value, source = min(candidates)
+    return max(0, int(value)), source
+
+
+def _trimmed(data: Any, path: tuple[str, ...], drop: int | None) -> Any:
+    """
+    Copy of `data` minus the first `drop` items of the list at `path`, or minus the
+    key itself when drop is None.
+    """
+    if not isinstance(data, dict):
+        return data
+    out = dict(data)
+    head, rest = path[0], path[1:]
+    if head not in out:
+        return out
+    if rest:
+        out[head] = _trimmed(out[head], rest, drop)
+    elif drop is None:
+        del out[head]
+    else:
+        out[head] = list(out[head])[drop:]
+    return out
+
+
+def _lookup(data: Any, path: tuple[str, ...]) -> Any:
+    node = data
+    for part in path:
+        if not isinstance(node, dict) or part not in node:
+            return None
+        node = node[part]
+    return node
+
+
+def fit(
+    frags: dict[str, Fragment],
+    header: int,
+    budget: int | None,
+    budget_source: str | None,
+    estimator: TokenEstimator,
+    fragments: FragmentCache,
+) -> tuple[dict[str, Fragment], TokenAccount]:
+    """
+    Trim `frags` (rendered, in packet order) along TRIM_POLICY until the estimate fits
+    `budget`. Trimmed variants are memoized fragments, so repeated packets over the
+    same content trim for free. Returns the fragments to send and the accounting.
+    """
+    layers = {name: estimator.fragment(frag) for name, frag in frags.items()}
+    account = TokenAccount(budget, budget_source, header, layers)
+    if account.fits:
+        return frags, account
+    out = dict(frags)
+    for step in TRIM_POLICY:
+        if account.fits:
+            break
+        frag = out.get(step.layer)
+        if frag is None:
+            continue
+        before = account.layers[step.layer]
+        if step.path is None:
+            del out[step.layer]
+            del account.layers[step.layer]
+            account.trimmed.append(
+                {"layer": step.layer, "action": "drop_layer", "tokens_saved": before}
+            )
+            continue
+        value = _lookup(frag.data, step.path)
+        if value is None:
+            continue
+        drop: int | None = None
+        if step.oldest_first and isinstance(value, list) and value:
+            # per-item estimates are additive enough to pick how many to drop in one pass
+            excess = account.total - budget if budget is not None else 0
+            costs = estimator.item_costs(frag, step.path, value)
+            drop = min(len(value), bisect_left(costs, excess) + 1)
+        path = step.path
+        trimmed = fragments.derive(
+            frag, ("trim", path, drop), partial(_trimmed, path=path, drop=drop)
+        )
+        out[step.layer] = trimmed
+        account.layers[step.layer] = estimator.fragment(trimmed)
+        account.trimmed.append({
+            "layer": step.layer,
+            "path": ".".join(path),
+            "action": "drop_key" if drop is None else "drop_oldest",
+            **({} if drop is None else {"items": drop}),
+            "tokens_saved": before - account.layers[step.layer],
+        })
+    return out, account
+
+
+ESTIMATOR = TokenEstimator()
@@ -0,0 +1,126 @@
+from __future__ import annotations
+
+import os
+from collections.abc import Mapping
+from typing import Any
+
+from mlcp.common.lru import LRUCache
+
+from mlcp.context.fragments import LAYERS, Fragment
+
+DELTA_CACHE_SIZE = int(os.getenv("MLCP_DELTA_CACHE_SIZE", "8192"))
+
+Op = dict[str, Any]
+
+
+def _token(key: str) -> str:
+    """Escape one JSON Pointer reference token (RFC 6901)."""
+    return key.replace("~", "~0").replace("/", "~1")
+
+
+def _same(a: Any, b: Any) -> bool:
+    """JSON equality: `==` rejects most differences fast, but True == 1 == 1.0 in Python."""
+    if type(a) is not type(b) or a != b:
+        return False
+    if isinstance(a, dict):
+        return all(_same(v, b[k]) for k, v in a.items())
+    if isinstance(a, list):
+        return all(map(_same, a, b))
+    return True
+
+
+def _diff_list(a: list[Any], b: list[Any], path: str, ops: list[Op]) -> None:
+    # the common handoff shape: oldest entries dropped from the front, new ones appended
+    if a and b:
+        try:
+            k = a.index(b[0])
+        except ValueError:
+            k = -1
+        if k > 0 and len(a) - k <= len(b) and all(map(_same, a[k:], b[: len(a) - k])):
+            ops.extend({"op": "remove", "path": f"{path}/0"} for _ in range(k))
+            ops.extend({"op": "add", "path": f"{path}/-", "value": v} for v in b[len(a) - k :])
+            return
+
+    p = 0
+    while p < len(a) and p < len(b) and _same(a[p], b[p]):
+        p += 1
+    s = 0
+    while s < len(a) - p and s < len(b) - p and _same(a[-1 - s], b[-1 - s]):
+        s += 1
+    mid_a, mid_b = a[p : len(a) - s], b[p : len(b) - s]
+    if len(mid_a) == len(mid_b):
+        for i, (x, y) in enumerate(zip(mid_a, mid_b)):
+            diff_values(x, y, f"{path}/{p + i}", ops)
+        return
+    ops.extend({"op": "remove", "path": f"{path}/{p}"} for _ in mid_a)
+    ops.extend({"op": "add", "path": f"{path}/{p + i}", "value": v} for i, v in enumerate(mid_b))
+
+
+def diff_values(a: Any, b: Any, path: str, ops: list[Op]) -> None:
+    """Append RFC 6902 operations turning `a` into `b` (rooted at `path`) to `ops`."""
+    if _same(a, b):
+        return
+    if isinstance(a, dict) and isinstance(b, dict):
+        for key in a:
+            if key not in b:
+                ops.append({"op": "remove", "path": f"{path}/{_token(key)}"})
+        for key, value in b.items():
+            sub = f"{path}/{_token(key)}"
+            if key not in a:
+                ops.append({"op": "add", "path": sub, "value": value})
+            else:
+                diff_values(a[key], value, sub, ops)
+    elif isinstance(a, list) and isinstance(b, list):
+        _diff_list(a, b, path, ops)
+    else:
+        ops.append({"op": "replace", "path": path, "value": b})
+
+
+class DeltaEncoder:
+    """
+    Structural diffs between two packets' rendered layers. Layers are content
+    addressed, so an unchanged layer is skipped by comparing versions, and the diff
+    of a changed one is memoized by (layer, base version, target version): a long
+    handoff chain re-diffs only what actually changed.
+    """
+
+    def __init__(self, max_entries: int = DELTA_CACHE_SIZE) -> None:
+        self._cache: LRUCache[tuple[str, str, str], list[Op]] = LRUCache(max_entries)
+
+    def layer_ops(self, base: Fragment, target: Fragment) -> list[Op]:
+        key = (target.layer, base.version, target.version)
+        hit = self._cache.get(key)
+        if hit is not None:
+            return hit
+        ops: list[Op] = []
+        diff_values(base.data, target.data, f"/{_token(target.layer)}", ops)
+        self._cache.put(key, ops)
+        return ops
+
+    def diff(
+        self,
+        base_head: Mapping[str, Any],
+        base_layers: Mapping[str, Fragment],
+        head: Mapping[str, Any],
+        layers: Mapping[str, Fragment],
+    ) -> list[Op]:
+        ops: list[Op] = []
+        diff_values(dict(base_head), dict(head), "", ops)
+        for name in LAYERS:
+            a, b = base_layers.get(name), layers.get(name)
+            if a is None and b is None:
+                continue
+            if a is None:
+                assert b is not None
+                ops.append({"op": "add", "path": f"/{name}", "value": b.data})
+            elif b is None:
+                ops.append({"op": "remove", "path": f"/{name}"})
+            elif a.version != b.version:
+                ops.extend(self.layer_ops(a, b))
+        return ops
+
+    def stats(self) -> dict[str, int]:
+        return self._cache.stats()
+
+
+DELTAS = DeltaEncoder()
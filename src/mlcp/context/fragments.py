@@ -0,0 +1,112 @@
+from __future__ import annotations
+
+import copy
+import json
+import os
+from collections.abc import Callable, Hashable
+from dataclasses import dataclass
+from hashlib import sha256
+from typing import Any, Final
+
+from mlcp.common.lru import LRUCache
+
+FRAGMENT_CACHE_SIZE = int(os.getenv("MLCP_FRAGMENT_CACHE_SIZE", "16384"))
+
+# Layer order of config/context_packet.yaml; packets serialize layers in this order.
+LAYERS: Final[tuple[str, ...]] = (
+    "global", "task", "agent", "operational", "temporal", "security", "telemetry",
+)
+
+REDACTED: Final[str] = "[redacted]"
+
+
+def canonical(data: Any) -> bytes:
+    """Stable JSON encoding: sorted keys, no whitespace, UTF-8. NaN/Infinity raise ValueError."""
+    return json.dumps(
+        data, sort_keys=True, separators=(",", ":"), ensure_ascii=False, allow_nan=False
+    ).encode("utf-8")
+
+
+@dataclass(frozen=True, slots=True)
+class Fragment:
+    """
+    One layer's content, serialized once. `version` is the sha256 of `raw` unless the
+    caller supplied its own (e.g. a task revision). `data` is shared between every
+    packet that uses the fragment and must be treated as read-only.
+    """
+
+    layer: str
+    version: str
+    data: Any
+    raw: bytes
+
+
+class VersionConflict(ValueError):
+    """A caller-supplied version is already registered with different content."""
+
+
+class FragmentCache:
+    """
+    Memo of serialized layer fragments keyed by (layer, version). Registering content
+    costs one serialization, plus a hash when the caller passes no version; a known
+    caller version must come with the same bytes. Derived variants (redactions, and
+    later trims) are memoized by (layer, version, tag).
+    """
+
+    def __init__(self, max_entries: int = FRAGMENT_CACHE_SIZE) -> None:
+        self._cache: LRUCache[tuple[str, str], Fragment] = LRUCache(max_entries)
+        self._derived: LRUCache[tuple[str, str, Hashable], Fragment] = LRUCache(max_entries)
+
+    def get(self, layer: str, version: str) -> Fragment | None:
+        return self._cache.get((layer, version))
+
+    def intern(self, layer: str, data: Any, version: str | None = None) -> Fragment:
+        raw = canonical(data)
+        if version is not None:
+            hit = self._cache.get((layer, version))
+            if hit is not None:
+                if hit.raw != raw:
+                    raise VersionConflict(
+                        f"{layer}@{version} is already registered with other content"
+                    )
+                return hit
+        else:
+            version = sha256(raw).hexdigest()
+            hit = self._cache.get((layer, version))
+            if hit is not None:
+                return hit
+        frag = Fragment(layer, version, data, raw)
+        self._cache.put((layer, version), frag)
+        return frag
+
+    def derive(self, frag: Fragment, tag: Hashable, fn: Callable[[Any], Any]) -> Fragment:
+        """Memoized `fn(frag.data)` as a new content-addressed fragment of the same layer."""
+        key = (frag.layer, frag.version, tag)
+        hit = self._derived.get(key)
+        if hit is not None:
+            return hit
+        data = fn(frag.data)
+        raw = canonical(data)
+        out = Fragment(frag.layer, sha256(raw).hexdigest(), data, raw)
+        self._derived.put(key, out)
+        return out
+
+    def stats(self) -> dict[str, dict[str, int]]:
+        return {"fragments": self._cache.stats(), "derived": self._derived.stats()}
+
+
+def redact(data: Any, paths: tuple[tuple[str, ...], ...]) -> Any:
+    """Copy of `data` with each dotted path (relative to the layer) replaced by REDACTED."""
+    out = copy.deepcopy(data)
+    for path in paths:
+        node = out
+        for part in path[:-1]:
+            node = node.get(part) if isinstance(node, dict) else None
+            if node is None:
+                break
+        if isinstance(node, dict) and path[-1] in node:
+            node[path[-1]] = REDACTED
+    return out
+
+
+FRAGMENTS = FragmentCache()
@@ -0,0 +1,52 @@
+from __future__ import annotations
+
+from functools import lru_cache
+from hashlib import sha256
+from typing import Any
+
+from mlcp.common.config import CONFIG_DIR, config_value, load_config
+from mlcp.common.logger import get_logger
+
+from mlcp.context.fragments import Fragment, canonical
+
+_LOG = get_logger(__name__)
+
+GLOBAL_CONTEXT_FILE = "global_context.yaml"
+_LIST_FIELDS = ("org_guidelines", "values", "features_enabled")
+
+
+class GlobalLayerError(ValueError):
+    pass
+
+
+def _validate(data: Any) -> dict[str, Any]:
+    if not isinstance(data, dict):
+        raise GlobalLayerError("global layer must be a mapping")
+    if not isinstance(data.get("protocol_version"), str):
+        raise GlobalLayerError("global.protocol_version must be a string")
+    for name in _LIST_FIELDS:
+        value = data.get(name, [])
+        if not isinstance(value, list) or not all(isinstance(v, str) for v in value):
+            raise GlobalLayerError(f"global.{name} must be a list of strings")
+    return data
+
+
+@lru_cache(maxsize=1)
+def global_fragment() -> Fragment:
+    """
+    The global layer, validated, serialized and hashed once per process. Read from
+    config/global_context.yaml when present, else from the `global` section of
+    config/context_packet.yaml. It is never mutated at runtime, so every packet shares
+    this one fragment and its bytes.
+    """
+    source = GLOBAL_CONTEXT_FILE
+    doc = load_config(GLOBAL_CONTEXT_FILE) if (CONFIG_DIR / GLOBAL_CONTEXT_FILE).exists() else {}
+    data = doc.get("global", doc) if doc else None
+    if not data:
+        source = "context_packet.yaml"
+        data = config_value("context_packet.global", None, name="context_packet.yaml")
+    layer = _validate(data)
+    raw = canonical(layer)
+    frag = Fragment("global", sha256(raw).hexdigest(), layer, raw)
+    _LOG.info("global_layer_loaded", source=source, version=frag.version, bytes=len(raw))
+    return frag
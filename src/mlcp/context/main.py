@@ -1,16 +1,211 @@
 from __future__ import annotations
 
-from fastapi import FastAPI, status
+import json
+import math
+from typing import Any
+
+from fastapi import FastAPI, HTTPException, Request, status
 from mlcp.common.boot import ensure_workspace
 from mlcp.common.logger import get_logger
+from mlcp.common.metrics import instrument
+from mlcp.context.budget import ESTIMATOR
+from mlcp.context.delta import DELTAS
+from mlcp.context.fragments import FRAGMENTS
+from mlcp.context.global_layer import global_fragment
+from mlcp.context.packets import BUILDER, HEADER_FIELDS, Packet, PacketError
+from starlette.responses import Response
 
 ensure_workspace()
 log = get_logger("context")
+global_fragment()  # validate the global layer at startup, not on the first packet
 
 app = FastAPI(title="Carbon Context Engine", version="0.1.0")
+instrument(app)
 
 
 @app.get("/health", status_code=status.HTTP_200_OK)
 def health() -> dict[str, bool | str]:
     log.debug("health ping")
     return {"ok": True, "service": "context"}
+
+
+def _error(exc: PacketError) -> HTTPException:
+    return HTTPException(
+        status_code=exc.status_code, detail=[{"code": exc.code, "detail": exc.detail}]
+    )
+
+
+class _NonFinite(ValueError):
+    pass
+
+
+def _finite(text: str) -> float:
+    value = float(text)
+    if not math.isfinite(value):
+        raise _NonFinite(text)
+    return value
+
+
+def _no_constant(name: str) -> Any:
+    raise _NonFinite(name)
+
+
+async def _json_body(request: Request) -> Any:
+    """The body as JSON; NaN, Infinity and overflowing floats (not valid in a packet) give 422."""
+    try:
+        return json.loads(await request.body(), parse_float=_finite, parse_constant=_no_constant)
+    except _NonFinite as exc:
+        raise HTTPException(
+            status_code=422,
+            detail=[{"code": "invalid_number", "detail": f"non-finite number not allowed: {exc}"}],
+        ) from None
+    except ValueError:
+        raise HTTPException(
+            status_code=400, detail=[{"code": "invalid_json", "detail": "body must be JSON"}]
+        ) from None
+
+
+def _packet_response(
+    packet: Packet, status_code: int = 200, *, accounting: bool = False
+) -> Response:
+    """The packet as-is, or {"packet": ..., "tokens": ...} with the per-layer accounting."""
+    tokens = packet.tokens
+    body = packet.raw
+    if accounting:
+        accounted = json.dumps(tokens.as_dict()).encode("utf-8")
+        body = b'{"packet":' + body + b',"tokens":' + accounted + b"}"
+    headers = {
+        "X-Packet-Id": packet.id,
+        "X-Packet-Digest": packet.digest,
+        "X-Token-Estimate": str(tokens.total),
+    }
+    if tokens.budget is not None:
+        headers["X-Token-Budget"] = str(tokens.budget)
+    return Response(body, status_code=status_code, media_type="application/json", headers=headers)
+
+
+@app.get("/v1/layers/global")
+def get_global_layer(request: Request) -> Response:
+    frag = global_fragment()
+    etag = f'"{frag.version}"'
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers={"ETag": etag})
+    return Response(frag.raw, media_type="application/json", headers={"ETag": etag})
+
+
+@app.post("/v1/layers/{layer}", status_code=status.HTTP_201_CREATED)
+async def register_layer(
+    layer: str, request: Request, version: str | None = None
+) -> dict[str, Any]:
+    """
+    Register layer content once and get back its version (the content hash, or the
+    caller's own `version`). Packets can then reference it as {"$ref": version}.
+    """
+    data = await _json_body(request)
+    try:
+        frag = BUILDER.register(layer, data, version)
+    except PacketError as exc:
+        raise _error(exc) from None
+    return {"layer": frag.layer, "version": frag.version, "bytes": len(frag.raw)}
+
+
+@app.post("/v1/packets:build")
+async def build_packet(request: Request, accounting: bool = False) -> Response:
+    """
+    Assemble a context packet. Body: {"base"?: packet id, "source_agent_id"?,
+    "target_agent_id"?, "task_id"?, "max_tokens"?, "layers": {layer: data |
+    {"$ref": version} | null}}. With `base`, only the listed layers change; null drops
+    a layer. The packet is trimmed to fit its token budget; `?accounting=true` wraps
+    it with the per-layer token estimates and what was trimmed.
+    """
+    body = await _json_body(request)
+    if not isinstance(body, dict) or not isinstance(body.get("layers", {}), dict):
+        raise HTTPException(
+            status_code=422,
+            detail=[{"code": "invalid_request", "detail": "expected an object with a layers map"}],
+        )
+    base = body.get("base")
+    if base is not None and not isinstance(base, str):
+        raise HTTPException(
+            status_code=422,
+            detail=[{"code": "invalid_request", "detail": "base must be a packet id"}],
+        )
+    header = {k: body[k] for k in HEADER_FIELDS if k in body}
+    bad = [k for k, v in header.items() if v is not None and not isinstance(v, str)]
+    if bad:
+        raise HTTPException(
+            status_code=422,
+            detail=[
+                {"code": "invalid_request", "detail": f"{k} must be a string or null"}
+                for k in bad
+            ],
+        )
+    max_tokens = body.get("max_tokens")
+    if max_tokens is not None and (type(max_tokens) is not int or max_tokens < 0):
+        raise HTTPException(
+            status_code=422,
+            detail=[
+                {"code": "invalid_request", "detail": "max_tokens must be a non-negative integer"}
+            ],
+        )
+    try:
+        packet = BUILDER.build(
+            body.get("layers", {}),
+            base=base,
+            header=header,
+            max_tokens=max_tokens,
+        )
+    except PacketError as exc:
+        raise _error(exc) from None
+    return _packet_response(packet, status.HTTP_201_CREATED, accounting=accounting)
+
+
+# registered before /v1/packets/{packet_id}, which would otherwise match "<id>:delta"
+@app.get("/v1/packets/{packet_id}:delta")
+def get_packet_delta(packet_id: str, base: str) -> Response:
+    """
+    The packet as a JSON Patch (RFC 6902) against `base`, a packet the caller already
+    holds: 226 IM Used with `IM: json-patch` (RFC 3229 delta encoding). Falls back to
+    the full packet (200, `X-Delta: full`) when `base` is no longer stored or the
+    patch would not be smaller.
+    """
+    packet = BUILDER.get(packet_id)
+    if packet is None:
+        raise HTTPException(status_code=404, detail="packet_not_found")
+    prev = BUILDER.get(base)
+    if prev is not None:
+        ops = DELTAS.diff(prev.head, prev.rendered, packet.head, packet.rendered)
+        body = json.dumps(ops, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+        if len(body) < packet.size:
+            return Response(
+                body,
+                status_code=226,
+                media_type="application/json-patch+json",
+                headers={
+                    "IM": "json-patch",
+                    "Delta-Base": base,
+                    "X-Packet-Id": packet.id,
+                    "X-Packet-Digest": packet.digest,
+                },
+            )
+    response = _packet_response(packet)
+    response.headers["X-Delta"] = "full"
+    return response
+
+
+@app.get("/v1/packets/{packet_id}")
+def get_packet(packet_id: str, accounting: bool = False) -> Response:
+    packet = BUILDER.get(packet_id)
+    if packet is None:
+        raise HTTPException(status_code=404, detail="packet_not_found")
+    return _packet_response(packet, accounting=accounting)
+
+
+@app.get("/v1/fragments:stats")
+def fragment_stats() -> dict[str, dict[str, int]]:
+    return {
+        **FRAGMENTS.stats(),
+        "token_estimates": ESTIMATOR.stats(),
+        "deltas": DELTAS.stats(),
+        "packets": BUILDER.packets.stats(),
+    }
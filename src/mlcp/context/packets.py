@@ -0,0 +1,254 @@
+from __future__ import annotations
+
+import json
+import os
+import uuid
+from collections.abc import Mapping
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from functools import partial
+from hashlib import sha256
+from typing import Any, Final
+
+from mlcp.common.config import config_value
+from mlcp.common.lru import LRUCache
+
+from mlcp.context.budget import (
+    ESTIMATOR,
+    TokenAccount,
+    TokenEstimator,
+    estimate_tokens,
+    fit,
+    packet_budget,
+)
+from mlcp.context.fragments import (
+    FRAGMENTS,
+    LAYERS,
+    Fragment,
+    FragmentCache,
+    VersionConflict,
+    redact,
+)
+from mlcp.context.global_layer import global_fragment
+
+PACKET_CACHE_SIZE = int(os.getenv("MLCP_PACKET_CACHE_SIZE", "4096"))
+
+HEADER_FIELDS: Final[tuple[str, ...]] = ("source_agent_id", "target_agent_id", "task_id")
+REF_KEY: Final[str] = "$ref"
+
+
+class PacketError(ValueError):
+    def __init__(self, code: str, detail: str, status_code: int = 422) -> None:
+        super().__init__(detail)
+        self.code = code
+        self.detail = detail
+        self.status_code = status_code
+
+
+def _immutable_global() -> PacketError:
+    return PacketError(
+        "immutable_layer", "the global layer comes from config and cannot be set", 403
+    )
+
+
+@dataclass(frozen=True, slots=True)
+class Packet:
+    """
+    An assembled context packet. `layers` holds the source fragments (before
+    redaction and trimming), so a later packet can overlay this one and share every
+    layer it does not replace; `rendered` holds the fragments actually sent.
+    `head_raw` is the serialized `head`, and `tokens` the per-layer estimate against
+    the budget. The packet body itself is not stored: `raw` splices it on demand.
+    """
+
+    id: str
+    timestamp: str
+    header: Mapping[str, str | None]
+    layers: Mapping[str, Fragment]
+    head_raw: bytes
+    tokens: TokenAccount
+    head: Mapping[str, Any]
+    rendered: Mapping[str, Fragment]
+
+    @property
+    def raw(self) -> bytes:
+        """The serialized packet: `head` followed by the rendered layers' stored bytes."""
+        parts = [self.head_raw[:-1]]
+        for name, frag in self.rendered.items():
+            parts.append(b',"' + name.encode() + b'":' + frag.raw)
+        parts.append(b"}")
+        return b"".join(parts)
+
+    @property
+    def size(self) -> int:
+        """len(self.raw), without splicing."""
+        return len(self.head_raw) + sum(
+            len(name) + 4 + len(frag.raw) for name, frag in self.rendered.items()
+        )
+
+    @property
+    def digest(self) -> str:
+        """Content address of the packet body: identical rendered layers give the same digest."""
+        return body_digest(self.rendered)
+
+
+def body_digest(rendered: Mapping[str, Fragment]) -> str:
+    versions = "\n".join(f"{name}:{frag.version}" for name, frag in rendered.items())
+    return sha256(versions.encode()).hexdigest()
+
+
+class PacketStore:
+    """
+    Recent packets by id (bounded LRU). Packets do not own their bodies: each holds
+    its small serialized head plus references to interned fragments, and the body is
+    spliced from them when sent. Every packet in a handoff chain therefore shares the
+    layer bytes it did not change, and a long chain costs little more than its deltas.
+    """
+
+    def __init__(self, max_packets: int = PACKET_CACHE_SIZE) -> None:
+        self._packets: LRUCache[str, Packet] = LRUCache(max_packets)
+
+    def put(self, packet: Packet) -> None:
+        self._packets.put(packet.id, packet)
+
+    def get(self, packet_id: str) -> Packet | None:
+        return self._packets.get(packet_id)
+
+    def stats(self) -> dict[str, int]:
+        return self._packets.stats()
+
+
+def _enabled_layers() -> frozenset[str]:
+    flags = config_value("mlcp.enabled_layers", {}) or {}
+    return frozenset(name for name in LAYERS if flags.get(name, True) is not False)
+
+
+def _redactions(security: Fragment | None) -> dict[str, tuple[tuple[str, ...], ...]]:
+    """security.redact_fields ("task.priority", ...) grouped by layer."""
+    if security is None or not isinstance(security.data, dict):
+        return {}
+    fields = security.data.get("redact_fields") or []
+    grouped: dict[str, list[tuple[str, ...]]] = {}
+    for f in fields:
+        if isinstance(f, str) and "." in f:
+            layer, *path = f.split(".")
+            grouped.setdefault(layer, []).append(tuple(path))
+    return {layer: tuple(sorted(paths)) for layer, paths in grouped.items()}
+
+
+class PacketBuilder:
+    """
+    Builds packets as copy-on-write overlays of fragments. The global layer is the
+    pinned, pre-hashed fragment from config; other layers arrive inline (serialized
+    once and content-addressed) or as {"$ref": version} to a fragment registered
+    earlier. With `base`, unchanged layers are taken from a previous packet as-is.
+    The packet body is the pre-serialized fragment bytes spliced behind a small
+    head, so no layer is re-encoded unless its content changed. Before splicing,
+    the layers are trimmed to the packet's token budget (see budget.TRIM_POLICY).
+    """
+
+    def __init__(
+        self,
+        fragments: FragmentCache = FRAGMENTS,
+        max_packets: int = PACKET_CACHE_SIZE,
+        estimator: TokenEstimator = ESTIMATOR,
+    ) -> None:
+        self.fragments = fragments
+        self.estimator = estimator
+        self.packets = PacketStore(max_packets)
+        self._enabled = _enabled_layers()
+
+    def get(self, packet_id: str) -> Packet | None:
+        return self.packets.get(packet_id)
+
+    def register(self, layer: str, data: Any, version: str | None = None) -> Fragment:
+        if layer not in LAYERS:
+            raise PacketError("unknown_layer", f"unknown layer: {layer}")
+        if layer == "global":
+            raise _immutable_global()
+        try:
+            return self.fragments.intern(layer, data, version)
+        except VersionConflict as exc:
+            raise PacketError("version_conflict", str(exc), 409) from None
+
+    def _resolve(self, layer: str, spec: Any) -> Fragment:
+        if isinstance(spec, dict) and spec.keys() == {REF_KEY}:
+            version = spec[REF_KEY]
+            frag = self.fragments.get(layer, str(version))
+            if frag is None:
+                raise PacketError(
+                    "unknown_fragment", f"{layer}@{version} is not registered (or was evicted)", 404
+                )
+            return frag
+        return self.register(layer, spec)
+
+    def build(
+        self,
+        layers: Mapping[str, Any],
+        *,
+        base: str | None = None,
+        header: Mapping[str, str | None] | None = None,
+        max_tokens: int | None = None,
+    ) -> Packet:
+        prev = None
+        if base is not None:
+            prev = self.packets.get(base)
+            if prev is None:
+                raise PacketError("base_not_found", f"packet {base} is not available", 404)
+
+        sources: dict[str, Fragment] = dict(prev.layers) if prev is not None else {}
+        sources["global"] = global_fragment()
+        for name, spec in layers.items():
+            if name == "global":
+                raise _immutable_global()
+            if name not in LAYERS:
+                raise PacketError("unknown_layer", f"unknown layer: {name}")
+            if spec is None:
+                sources.pop(name, None)
+            else:
+                sources[name] = self._resolve(name, spec)
+
+        fields = dict(prev.header) if prev is not None else {}
+        for key, value in (header or {}).items():
+            if key in HEADER_FIELDS:
+                fields[key] = value
+        return self._assemble(sources, fields, max_tokens)
+
+    def _render(self, sources: Mapping[str, Fragment]) -> dict[str, Fragment]:
+        """Fragments as they go out: enabled layers only, redactions applied (memoized)."""
+        redactions = _redactions(sources.get("security"))
+        out: dict[str, Fragment] = {}
+        for name in LAYERS:
+            frag = sources.get(name)
+            if frag is None or name not in self._enabled:
+                continue
+            paths = redactions.get(name)
+            if paths:
+                frag = self.fragments.derive(frag, ("redact", paths), partial(redact, paths=paths))
+            out[name] = frag
+        return out
+
+    def _assemble(
+        self, sources: dict[str, Fragment], fields: dict[str, str | None], max_tokens: int | None
+    ) -> Packet:
+        packet_id = f"ctx-{uuid.uuid4()}"
+        stamp = datetime.now(timezone.utc).isoformat(timespec="milliseconds").replace("+00:00", "Z")
+        head = {"id": packet_id, "timestamp": stamp, **{k: fields.get(k) for k in HEADER_FIELDS}}
+        head_raw = json.dumps(head, separators=(",", ":"), ensure_ascii=False)
+        budget, source = packet_budget(sources, max_tokens)
+        rendered, tokens = fit(
+            self._render(sources),
+            estimate_tokens(head_raw),
+            budget,
+            source,
+            self.estimator,
+            self.fragments,
+        )
+        packet = Packet(
+            packet_id, stamp, fields, sources, head_raw.encode("utf-8"), tokens, head, rendered
+        )
+        self.packets.put(packet)
+        return packet
+
+
+BUILDER = PacketBuilder()
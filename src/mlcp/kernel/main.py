@@ -1,16 +1,68 @@
 from __future__ import annotations
 
+import os
+from typing import Any
+
 from fastapi import FastAPI, status
 from mlcp.common.boot import ensure_workspace
 from mlcp.common.logger import get_logger
+from mlcp.common.metrics import REGISTRY, instrument
+from mlcp.kernel.policy import POLICY, PolicyTable
+from pydantic import BaseModel, Field
+
+AUTHORIZE_BATCH_MAX = int(os.getenv("MLCP_AUTHORIZE_BATCH_MAX", "1000"))
 
 ensure_workspace()
 log = get_logger("kernel")
+POLICY.current()  # compile at startup: a broken config fails the boot, not the first syscall
 
 app = FastAPI(title="Zimmerman Kernel", version="0.1.0")
+instrument(app)
+
+DECISIONS_TOTAL = REGISTRY.counter(
+    "mlcp_syscall_decisions_total", "Syscall authorization decisions.", ("decision",)
+)
 
 
 @app.get("/health", status_code=status.HTTP_200_OK)
 def health() -> dict[str, bool | str]:
     log.debug("health ping")
     return {"ok": True, "service": "kernel"}
+
+
+class SyscallCheck(BaseModel):
+    role: str
+    syscall: str
+    layer: str | None = Field(
+        default=None, description="Context layer, for readContext/updateContext"
+    )
+    path: str | None = Field(default=None, description="File path, for read/write")
+
+
+class SyscallBatch(BaseModel):
+    checks: list[SyscallCheck] = Field(max_length=AUTHORIZE_BATCH_MAX)
+
+
+def _decide(table: PolicyTable, check: SyscallCheck) -> dict[str, Any]:
+    decision = table.authorize(check.role, check.syscall, layer=check.layer, path=check.path)
+    DECISIONS_TOTAL.inc(decision="allow" if decision.allowed else "deny")
+    return decision.as_dict()
+
+
+@app.post("/v1/syscalls:authorize")
+def authorize(body: SyscallCheck) -> dict[str, Any]:
+    """Whether `role` may make `syscall` (on `layer` / `path`), under the current policy."""
+    table = POLICY.current()
+    return {**_decide(table, body), "policy": table.version}
+
+
+@app.post("/v1/syscalls:batchAuthorize")
+def authorize_batch(body: SyscallBatch) -> dict[str, Any]:
+    """Decisions for many checks, in order, all against the same policy version."""
+    table = POLICY.current()
+    return {"policy": table.version, "results": [_decide(table, check) for check in body.checks]}
+
+
+@app.get("/v1/policy")
+def policy() -> dict[str, Any]:
+    return POLICY.current().describe()
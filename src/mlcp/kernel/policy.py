@@ -0,0 +1,300 @@
+from __future__ import annotations
+
+import os
+import posixpath
+import re
+import threading
+import time
+from collections.abc import Mapping
+from dataclasses import dataclass
+from hashlib import sha256
+from pathlib import Path
+from typing import Any, Final
+
+import yaml
+
+from mlcp.common.config import CONFIG_DIR
+from mlcp.common.logger import get_logger
+from mlcp.common.metrics import REGISTRY
+
+KERNEL_CONFIG = Path(os.getenv("MLCP_KERNEL_CONFIG", str(CONFIG_DIR / "agentic_kernel.yaml")))
+RELOAD_CHECK_SEC = float(os.getenv("MLCP_KERNEL_RELOAD_SEC", "1"))
+
+_LOG = get_logger(__name__)
+
+# syscalls that carry a context layer / a file path, and the access they need
+LAYER_SYSCALLS: Final[dict[str, str]] = {"readContext": "read", "updateContext": "write"}
+FILE_SYSCALLS: Final[dict[str, str]] = {"read": "read", "write": "write"}
+
+RELOADS_TOTAL = REGISTRY.counter(
+    "mlcp_kernel_policy_reloads_total", "Kernel policy compilations by result.", ("result",)
+)
+
+
+class PolicyError(ValueError):
+    """The kernel config cannot be compiled; the previous policy stays in force."""
+
+
+@dataclass(frozen=True, slots=True)
+class Decision:
+    allowed: bool
+    reason: str | None = None
+
+    def as_dict(self) -> dict[str, Any]:
+        return {"allowed": self.allowed, "reason": self.reason}
+
+
+ALLOW: Final = Decision(True)
+
+
+def _glob_regex(pattern: str) -> str:
+    """
+    Regex source for a path glob: `*` and `?` stay within one path segment, `**`
+    spans segments, and a trailing `/**` also matches the directory itself.
+    """
+    if pattern.startswith("./"):
+        pattern = pattern[2:]
+    out: list[str] = []
+    i = 0
+    while i < len(pattern):
+        if pattern.startswith("/**", i) and i + 3 == len(pattern):
+            out.append("(?:/.*)?")
+            i += 3
+        elif pattern.startswith("**/", i):
+            out.append("(?:.*/)?")
+            i += 3
+        elif pattern.startswith("**", i):
+            out.append(".*")
+            i += 2
+        elif pattern[i] == "*":
+            out.append("[^/]*")
+            i += 1
+        elif pattern[i] == "?":
+            out.append("[^/]")
+            i += 1
+        else:
+            out.append(re.escape(pattern[i]))
+            i += 1
+    return "".join(out)
+
+
+def _matcher(patterns: list[str]) -> re.Pattern[str] | None:
+    """All globs of one kind folded into a single alternation, compiled once."""
+    if not patterns:
+        return None
+    return re.compile("|".join(f"(?:{_glob_regex(p)})" for p in patterns))
+
+
+@dataclass(frozen=True, slots=True)
+class FileGrant:
+    """Compiled file_access globs for one mode; relative and absolute paths match separately."""
+
+    relative: re.Pattern[str] | None
+    absolute: re.Pattern[str] | None
+
+    def allows(self, path: str) -> bool:
+        if path.startswith("/"):
+            return self.absolute is not None and self.absolute.fullmatch(path) is not None
+        return self.relative is not None and self.relative.fullmatch(path) is not None
+
+
+_NO_FILES: Final = FileGrant(None, None)
+
+
+@dataclass(frozen=True, slots=True)
+class RolePolicy:
+    syscalls: int
+    layers_read: int
+    layers_write: int
+    files: Mapping[str, FileGrant]
+
+
+@dataclass(frozen=True, slots=True)
+class PolicyTable:
+    """
+    agentic_kernel.yaml compiled to lookup tables: every syscall and layer name gets
+    a bit, each role holds one syscall bitset plus layer read/write masks, and its
+    file_access globs are pre-compiled regexes. A check is a few dict lookups and
+    bit tests (plus one regex match for file syscalls).
+    """
+
+    version: str
+    syscall_bits: Mapping[str, int]
+    layer_bits: Mapping[str, int]
+    roles: Mapping[str, RolePolicy]
+    pwd_restricted: frozenset[str]
+
+    def authorize(
+        self, role: str, syscall: str, *, layer: str | None = None, path: str | None = None
+    ) -> Decision:
+        policy = self.roles.get(role)
+        if policy is None:
+            return Decision(False, "unknown_role")
+        bit = self.syscall_bits.get(syscall)
+        if bit is None:
+            return Decision(False, "unknown_syscall")
+        if not policy.syscalls & bit:
+            return Decision(False, "syscall_not_allowed")
+        mode = LAYER_SYSCALLS.get(syscall)
+        if mode is not None:
+            if layer is None:
+                return Decision(False, "layer_required")
+            mask = policy.layers_read if mode == "read" else policy.layers_write
+            if not mask & self.layer_bits.get(layer, 0):
+                return Decision(False, "layer_not_permitted")
+        elif layer is not None:
+            return Decision(False, "layer_not_applicable")
+        mode = FILE_SYSCALLS.get(syscall)
+        if mode is not None:
+            if path is None:
+                return Decision(False, "path_required")
+            norm = posixpath.normpath(path)
+            if syscall in self.pwd_restricted and (norm == ".." or norm.startswith("../")):
+                return Decision(False, "outside_pwd")
+            if not policy.files.get(mode, _NO_FILES).allows(norm):
+                return Decision(False, "path_not_permitted")
+        elif path is not None:
+            return Decision(False, "path_not_applicable")
+        return ALLOW
+
+    def describe(self) -> dict[str, Any]:
+        """The compiled table decoded back to names, for inspection."""
+
+        def names(bits: Mapping[str, int], mask: int) -> list[str]:
+            return [name for name, bit in bits.items() if mask & bit]
+
+        return {
+            "version": self.version,
+            "roles": {
+                role: {
+                    "syscalls": names(self.syscall_bits, p.syscalls),
+                    "layers": {
+                        "read": names(self.layer_bits, p.layers_read),
+                        "write": names(self.layer_bits, p.layers_write),
+                    },
+                    "file_access": sorted(p.files),
+                }
+                for role, p in self.roles.items()
+            },
+        }
+
+
+def _names(value: Any, where: str) -> list[str]:
+    if value is None:
+        return []
+    if not isinstance(value, list) or not all(isinstance(v, str) for v in value):
+        raise PolicyError(f"{where} must be a list of strings")
+    return value
+
+
+def compile_policy(raw: bytes) -> PolicyTable:
+    try:
+        doc = yaml.safe_load(raw) or {}
+    except yaml.YAMLError as exc:
+        raise PolicyError(f"invalid YAML: {exc}") from None
+    roles_doc = doc.get("agent_roles") if isinstance(doc, dict) else None
+    if not isinstance(roles_doc, dict):
+        raise PolicyError("agent_roles must be a mapping")
+
+    syscall_bits: dict[str, int] = {}
+    layer_bits: dict[str, int] = {}
+
+    def mask(bits: dict[str, int], names: list[str]) -> int:
+        out = 0
+        for name in names:
+            out |= bits.setdefault(name, 1 << len(bits))
+        return out
+
+    roles: dict[str, RolePolicy] = {}
+    for role, spec in roles_doc.items():
+        if not isinstance(spec, dict):
+            raise PolicyError(f"agent_roles.{role} must be a mapping")
+        layers = spec.get("permitted_layers") or {}
+        files = spec.get("file_access") or {}
+        if not isinstance(layers, dict) or not isinstance(files, dict):
+            raise PolicyError(f"agent_roles.{role}: permitted_layers/file_access must be mappings")
+        grants: dict[str, FileGrant] = {}
+        for mode in ("read", "write"):
+            globs = _names(files.get(mode), f"agent_roles.{role}.file_access.{mode}")
+            try:
+                grants[mode] = FileGrant(
+                    _matcher([g for g in globs if not g.startswith("/")]),
+                    _matcher([g for g in globs if g.startswith("/")]),
+                )
+            except re.error as exc:
+                raise PolicyError(f"agent_roles.{role}.file_access.{mode}: {exc}") from None
+        where = f"agent_roles.{role}"
+        roles[str(role)] = RolePolicy(
+            syscalls=mask(
+                syscall_bits, _names(spec.get("allowed_syscalls"), f"{where}.allowed_syscalls")
+            ),
+            layers_read=mask(
+                layer_bits, _names(layers.get("read"), f"{where}.permitted_layers.read")
+            ),
+            layers_write=mask(
+                layer_bits, _names(layers.get("write"), f"{where}.permitted_layers.write")
+            ),
+            files={mode: grant for mode, grant in grants.items() if grant != _NO_FILES},
+        )
+
+    policies = doc.get("syscall_policies") or {}
+    if not isinstance(policies, dict):
+        raise PolicyError("syscall_policies must be a mapping")
+    restricted = frozenset(
+        name
+        for name, p in policies.items()
+        if isinstance(p, dict) and p.get("restrict_outside_pwd") is True
+    )
+    return PolicyTable(sha256(raw).hexdigest()[:16], syscall_bits, layer_bits, roles, restricted)
+
+
+class PolicyCache:
+    """
+    The compiled table for one config file. `current()` stats the file at most once
+    per RELOAD_CHECK_SEC and recompiles only when its mtime or size changed; a config
+    that fails to compile is logged and the previous table stays in force.
+    """
+
+    def __init__(self, path: Path = KERNEL_CONFIG, check_sec: float = RELOAD_CHECK_SEC) -> None:
+        self.path = path
+        self.check_sec = check_sec
+        self._table: PolicyTable | None = None
+        self._stamp: tuple[int, int] | None = None
+        self._checked = 0.0
+        self._lock = threading.Lock()
+
+    def current(self) -> PolicyTable:
+        table = self._table
+        if table is not None and time.monotonic() - self._checked < self.check_sec:
+            return table
+        return self._refresh()
+
+    def _refresh(self) -> PolicyTable:
+        with self._lock:
+            self._checked = time.monotonic()
+            try:
+                st = self.path.stat()
+            except FileNotFoundError:
+                if self._table is None:
+                    raise PolicyError(f"kernel config not found: {self.path}") from None
+                return self._table
+            stamp = (st.st_mtime_ns, st.st_size)
+            if self._table is not None and stamp == self._stamp:
+                return self._table
+            try:
+                table = compile_policy(self.path.read_bytes())
+            except (OSError, PolicyError) as exc:
+                RELOADS_TOTAL.inc(result="error")
+                if self._table is None:
+                    raise
+                _LOG.warning("kernel_policy_rejected", path=str(self.path), error=str(exc))
+                self._stamp = stamp  # do not retry until the file changes again
+                return self._table
+            RELOADS_TOTAL.inc(result="ok")
+            if self._table is not None:
+                _LOG.info("kernel_policy_reloaded", version=table.version, roles=len(table.roles))
+            self._table, self._stamp = table, stamp
+            return table
+
+
+POLICY = PolicyCache()
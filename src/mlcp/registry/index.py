@@ -0,0 +1,298 @@
+from __future__ import annotations
+
+import heapq
+import threading
+from bisect import bisect_left, insort
+from collections.abc import Iterable, Mapping
+from dataclasses import dataclass
+from typing import Any
+
+from mlcp.common.config import config_value
+
+
+class RegistryError(ValueError):
+    def __init__(self, code: str, detail: str, status_code: int = 422) -> None:
+        super().__init__(detail)
+        self.code = code
+        self.detail = detail
+        self.status_code = status_code
+
+
+def skill_key(name: str) -> str:
+    """Index key of a skill name: "React", " react " and "REACT" are the same skill."""
+    return " ".join(name.split()).casefold()
+
+
+def role_limits() -> dict[str, int]:
+    """max_instances per role from mlcp.agent_roles; a role without one is unbounded."""
+    roles = config_value("mlcp.agent_roles", {}) or {}
+    return {
+        name: int(spec["max_instances"])
+        for name, spec in roles.items()
+        if isinstance(spec, dict) and isinstance(spec.get("max_instances"), int)
+    }
+
+
+@dataclass(frozen=True, slots=True)
+class AgentProfile:
+    """A registered agent. `skills` maps skill_key -> (display name, rating)."""
+
+    agent_id: str
+    role_category: str
+    skills: Mapping[str, tuple[str, int]]
+    model_info: Mapping[str, Any]
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "agent_id": self.agent_id,
+            "role_category": self.role_category,
+            "skill_profile": [
+                {"name": name, "rating": rating} for name, rating in self.skills.values()
+            ],
+            "model_info": dict(self.model_info),
+        }
+
+
+@dataclass(frozen=True, slots=True)
+class Candidate:
+    agent: AgentProfile
+    score: int
+    matched: dict[str, int]
+    missing: list[str]
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "agent_id": self.agent.agent_id,
+            "role_category": self.agent.role_category,
+            "score": self.score,
+            "matched": self.matched,
+            "missing": self.missing,
+        }
+
+
+# posting entry: (-rating, agent_id), so a plain sorted list is best-rated first
+_Posting = list[tuple[int, str]]
+# top-k min-heap entry: (score, descending id key, agent_id); the root is the weakest kept
+_Entry = tuple[int, tuple[int, ...], str]
+
+
+class AgentIndex:
+    """
+    Agent profiles with an inverted index skill -> agents sorted by rating, kept once
+    for all roles and once per role, so a match only reads the posting lists of the
+    skills it asks for. Role instance counts are checked against
+    mlcp.agent_roles.<role>.max_instances on registration.
+    """
+
+    def __init__(self, limits: Mapping[str, int] | None = None) -> None:
+        self._limits = dict(role_limits() if limits is None else limits)
+        self._agents: dict[str, AgentProfile] = {}
+        self._postings: dict[tuple[str | None, str], _Posting] = {}
+        self._roles: dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._agents)
+
+    def get(self, agent_id: str) -> AgentProfile | None:
+        return self._agents.get(agent_id)
+
+    def _index(self, agent: AgentProfile) -> None:
+        for key, (_, rating) in agent.skills.items():
+            for scope in (None, agent.role_category):
+                insort(self._postings.setdefault((scope, key), []), (-rating, agent.agent_id))
+        self._roles[agent.role_category] = self._roles.get(agent.role_category, 0) + 1
+
+    def _unindex(self, agent: AgentProfile) -> None:
+        for key, (_, rating) in agent.skills.items():
+            for scope in (None, agent.role_category):
+                posting = self._postings[(scope, key)]
+                del posting[bisect_left(posting, (-rating, agent.agent_id))]
+                if not posting:
+                    del self._postings[(scope, key)]
+        self._roles[agent.role_category] -= 1
+
+    def register(self, agent: AgentProfile) -> bool:
+        """Add or replace a profile; True when the agent is new. Raises when its role is full."""
+        with self._lock:
+            prev = self._agents.get(agent.agent_id)
+            moving = prev is None or prev.role_category != agent.role_category
+            limit = self._limits.get(agent.role_category)
+            if moving and limit is not None and self._roles.get(agent.role_category, 0) >= limit:
+                raise RegistryError(
+                    "role_at_capacity",
+                    f"{agent.role_category} is at max_instances={limit}",
+                    409,
+                )
+            if prev is not None:
+                self._unindex(prev)
+            self._agents[agent.agent_id] = agent
+            self._index(agent)
+            return prev is None
+
+    def remove(self, agent_id: str) -> bool:
+        with self._lock:
+            agent = self._agents.pop(agent_id, None)
+            if agent is None:
+                return False
+            self._unindex(agent)
+            return True
+
+    def capacity(self) -> dict[str, dict[str, int | None]]:
+        """Instances per role against its max_instances (None = unbounded)."""
+        with self._lock:
+            roles = sorted(set(self._limits) | {r for r, n in self._roles.items() if n})
+            out: dict[str, dict[str, int | None]] = {}
+            for role in roles:
+                used, limit = self._roles.get(role, 0), self._limits.get(role)
+                out[role] = {
+                    "instances": used,
+                    "max_instances": limit,
+                    "available": None if limit is None else max(0, limit - used),
+                }
+            return out
+
+    def match(
+        self,
+        requires: Iterable[str],
+        *,
+        role: str | None = None,
+        limit: int = 5,
+        require_all: bool = False,
+        min_rating: int = 0,
+    ) -> tuple[list[Candidate], int]:
+        """
+        Top `limit` agents for the required skills, scored by the sum of their ratings
+        (a missing skill, or one rated below min_rating, counts 0). Returns the
+        candidates, best first with ties broken by agent_id, and how many agents were
+        examined.
+
+        The skills' posting lists are read in rating order in lock step (Fagin's
+        threshold algorithm): the walk stops as soon as the current `limit`-th
+        candidate beats the best score an agent not yet seen could have, so the
+        result is the same as scoring every agent. With require_all it also stops
+        once the shortest list is exhausted, since every qualifying agent is on it.
+        """
+        keys: dict[str, str] = {}
+        for name in requires:
+            keys.setdefault(skill_key(name), name)
+        if not keys or limit <= 0:
+            return [], 0
+        with self._lock:
+            lists = [self._postings.get((role, key), []) for key in keys]
+            if require_all and not all(lists):
+                return [], 0
+            heap, examined = self._top(tuple(keys), lists, limit, require_all, min_rating)
+            ranked = sorted(heap, key=lambda e: (-e[0], e[2]))
+            candidates = [self._candidate(agent_id, keys, min_rating) for _, _, agent_id in ranked]
+            return candidates, examined
+
+    def _top(
+        self,
+        keys: tuple[str, ...],
+        lists: list[_Posting],
+        limit: int,
+        require_all: bool,
+        min_rating: int,
+    ) -> tuple[list[_Entry], int]:
+        agents = self._agents
+        shortest = min(len(p) for p in lists)
+        heap: list[_Entry] = []
+        seen: set[str] = set()
+        depth = 0
+        while not (require_all and depth >= shortest):
+            threshold = 0
+            frontier = ""
+            active = False
+            for posting in lists:
+                if depth >= len(posting):
+                    continue
+                neg, agent_id = posting[depth]
+                if -neg < min_rating:
+                    continue  # sorted: nothing further down this list qualifies either
+                active = True
+                threshold -= neg
+                # an unseen agent tying the threshold ranks after the current entry only
+                # where that entry is rated: a 0 there is also matched by lacking the skill
+                if neg < 0 and agent_id > frontier:
+                    frontier = agent_id
+                if agent_id in seen:
+                    continue
+                seen.add(agent_id)
+                skills = agents[agent_id].skills
+                score = 0
+                matched = 0
+                for key in keys:
+                    hit = skills.get(key)
+                    if hit is not None and hit[1] >= min_rating:
+                        score += hit[1]
+                        matched += 1
+                    elif require_all:
+                        matched = 0
+                        break
+                if not matched or (require_all and matched < len(keys)):
+                    continue
+                if len(heap) < limit:
+                    heapq.heappush(heap, (score, _desc(agent_id), agent_id))
+                elif score >= heap[0][0]:
+                    entry = (score, _desc(agent_id), agent_id)
+                    if entry > heap[0]:
+                        heapq.heapreplace(heap, entry)
+            if not active:
+                break
+            if len(heap) >= limit:
+                # an unseen agent scoring exactly `threshold` sits below every current
+                # rated list position, so its id is above `frontier` and it loses the
+                # tie; with no rated position (threshold 0) nothing bounds its id
+                weakest, _, weakest_id = heap[0]
+                if weakest > threshold or (weakest == threshold > 0 and weakest_id <= frontier):
+                    break
+            depth += 1
+        return heap, len(seen)
+
+    def _candidate(self, agent_id: str, keys: Mapping[str, str], min_rating: int) -> Candidate:
+        agent = self._agents[agent_id]
+        matched: dict[str, int] = {}
+        missing: list[str] = []
+        for key, name in keys.items():
+            hit = agent.skills.get(key)
+            if hit is not None and hit[1] >= min_rating:
+                matched[name] = hit[1]
+            else:
+                missing.append(name)
+        return Candidate(agent, sum(matched.values()), matched, missing)
+
+
+def _desc(agent_id: str) -> tuple[int, ...]:
+    """Sort key ordering agent ids descending, so the smaller id wins a score tie on the heap."""
+    return tuple(-ord(c) for c in agent_id) + (0,)
+
+
+def profile_from(data: Mapping[str, Any]) -> AgentProfile:
+    """
+    Build a profile from the agent layer's shape (agent_id, role_category,
+    skill_profile, model_info).
+    """
+    agent_id = data.get("agent_id")
+    role = data.get("role_category")
+    if not isinstance(agent_id, str) or not agent_id:
+        raise RegistryError("invalid_agent", "agent_id must be a non-empty string")
+    if not isinstance(role, str) or not role:
+        raise RegistryError("invalid_agent", "role_category must be a non-empty string")
+    skills: dict[str, tuple[str, int]] = {}
+    for item in data.get("skill_profile") or []:
+        name = item.get("name") if isinstance(item, dict) else None
+        rating = item.get("rating") if isinstance(item, dict) else None
+        if not isinstance(name, str) or not name.strip() or type(rating) is not int or rating < 0:
+            raise RegistryError(
+                "invalid_agent",
+                "skill_profile entries need a name and a non-negative integer rating",
+            )
+        skills[skill_key(name)] = (name.strip(), rating)
+    model_info = data.get("model_info") or {}
+    if not isinstance(model_info, dict):
+        raise RegistryError("invalid_agent", "model_info must be an object")
+    return AgentProfile(agent_id, role, skills, model_info)
+
+
+AGENTS = AgentIndex()
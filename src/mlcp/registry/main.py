@@ -1,16 +1,123 @@
 from __future__ import annotations
 
-from fastapi import FastAPI, status
+import os
+import time
+from typing import Any
+
+from fastapi import FastAPI, HTTPException, Response, status
 from mlcp.common.boot import ensure_workspace
 from mlcp.common.logger import get_logger
+from mlcp.common.metrics import REGISTRY, instrument
+from mlcp.registry.index import AGENTS, RegistryError, profile_from
+from pydantic import BaseModel, Field
+
+MATCH_LIMIT_MAX = int(os.getenv("MLCP_MATCH_LIMIT_MAX", "100"))
 
 ensure_workspace()
 log = get_logger("registry")
 
 app = FastAPI(title="M.A.D Registry", version="0.1.0")
+instrument(app)
+
+MATCH_SECONDS = REGISTRY.histogram(
+    "mlcp_agent_match_seconds", "Time to rank agents for a skill match (index lookup only).",
+    buckets=(0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01),
+)
 
 
 @app.get("/health", status_code=status.HTTP_200_OK)
 def health() -> dict[str, bool | str]:
     log.debug("health ping")
     return {"ok": True, "service": "registry"}
+
+
+def _error(exc: RegistryError) -> HTTPException:
+    return HTTPException(
+        status_code=exc.status_code, detail=[{"code": exc.code, "detail": exc.detail}]
+    )
+
+
+class MatchBody(BaseModel):
+    requires: list[str] | None = Field(
+        default=None, description="Skills to match; defaults to task.metadata.requires"
+    )
+    task: dict[str, Any] | None = Field(default=None, description="A task layer")
+    role_category: str | None = None
+    limit: int = Field(default=5, ge=1, le=MATCH_LIMIT_MAX)
+    require_all: bool = False
+    min_rating: int = Field(default=0, ge=0)
+
+
+@app.post("/v1/agents", status_code=status.HTTP_201_CREATED)
+def register_agent(payload: dict[str, Any], response: Response) -> dict[str, Any]:
+    """Register (or replace) an agent profile shaped like the packet's agent layer."""
+    try:
+        agent = profile_from(payload)
+        created = AGENTS.register(agent)
+    except RegistryError as exc:
+        raise _error(exc) from None
+    if not created:
+        response.status_code = status.HTTP_200_OK
+    return agent.as_dict()
+
+
+@app.get("/v1/agents/{agent_id}")
+def get_agent(agent_id: str) -> dict[str, Any]:
+    agent = AGENTS.get(agent_id)
+    if agent is None:
+        raise HTTPException(status_code=404, detail="agent_not_found")
+    return agent.as_dict()
+
+
+@app.delete("/v1/agents/{agent_id}", status_code=status.HTTP_204_NO_CONTENT)
+def remove_agent(agent_id: str) -> Response:
+    if not AGENTS.remove(agent_id):
+        raise HTTPException(status_code=404, detail="agent_not_found")
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
+
+
+@app.get("/v1/roles")
+def roles() -> dict[str, dict[str, int | None]]:
+    return AGENTS.capacity()
+
+
+@app.post("/v1/agents:match")
+def match_agents(body: MatchBody) -> dict[str, Any]:
+    """
+    Rank agents for a task's required skills (`requires`, or the task layer's
+    metadata.requires) by the sum of their skill ratings, optionally within one
+    role. Reads only the posting lists of the required skills; `examined` is how
+    many agents the ranking looked at.
+    """
+    requires = body.requires
+    if requires is None:
+        metadata = (body.task or {}).get("metadata")
+        requires = metadata.get("requires") if isinstance(metadata, dict) else None
+    if not isinstance(requires, list) or not all(isinstance(s, str) for s in requires):
+        raise HTTPException(
+            status_code=422,
+            detail=[
+                {
+                    "code": "invalid_request",
+                    "detail": "requires (or task.metadata.requires) must be a list of skills",
+                }
+            ],
+        )
+    started = time.perf_counter()
+    candidates, examined = AGENTS.match(
+        requires,
+        role=body.role_category,
+        limit=body.limit,
+        require_all=body.require_all,
+        min_rating=body.min_rating,
+    )
+    MATCH_SECONDS.observe(time.perf_counter() - started)
+    out: dict[str, Any] = {
+        "requires": requires,
+        "candidates": [c.as_dict() for c in candidates],
+        "examined": examined,
+        "registered": len(AGENTS),
+    }
+    if body.role_category is not None:
+        out["capacity"] = AGENTS.capacity().get(body.role_category)
+    return out
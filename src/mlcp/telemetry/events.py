@@ -0,0 +1,124 @@
+from __future__ import annotations
+
+import json
+import math
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, TypeAlias
+
+# Column order of the `events` table; rows travel through the buffer as plain tuples.
+COLUMNS: tuple[str, ...] = (
+    "ts", "agent_id", "task_id", "sprint_id", "run_id", "model_name",
+    "tokens_used", "latency_ms", "outcome_rating", "attrs",
+)
+EventRow: TypeAlias = tuple[
+    float, str, str, str | None, str | None, str | None, int, float, float | None, str | None
+]
+
+_KNOWN = frozenset(COLUMNS) | {"timestamp"}
+_ID_MAX = 256
+
+
+@dataclass(frozen=True, slots=True)
+class LineError:
+    line: int  # 1-based line number within the batch
+    code: str
+    detail: str
+
+    def as_dict(self) -> dict[str, Any]:
+        return {"line": self.line, "code": self.code, "detail": self.detail}
+
+
+class EventError(ValueError):
+    def __init__(self, code: str, detail: str) -> None:
+        super().__init__(detail)
+        self.code = code
+        self.detail = detail
+
+
+def _id(obj: dict[str, Any], key: str, *, required: bool) -> str | None:
+    value = obj.get(key)
+    if value is None:
+        if required:
+            raise EventError("missing_field", f"{key} is required")
+        return None
+    if not isinstance(value, str) or not value or len(value) > _ID_MAX:
+        raise EventError(
+            "invalid_field", f"{key} must be a non-empty string of at most {_ID_MAX} chars"
+        )
+    return value
+
+
+def _number(
+    obj: dict[str, Any], key: str, default: float | None, lo: float, hi: float
+) -> float | None:
+    value = obj.get(key)
+    if value is None:
+        return default
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or not math.isfinite(value):
+        raise EventError("invalid_field", f"{key} must be a number")
+    if not lo <= value <= hi:
+        raise EventError("out_of_range", f"{key} must be within [{lo:g}, {hi:g}]")
+    return float(value)
+
+
+def parse_timestamp(value: Any, now: float) -> float:
+    """Epoch seconds (number) or an ISO-8601 string; a naive string is taken as UTC."""
+    if value is None:
+        return now
+    if isinstance(value, (int, float)) and not isinstance(value, bool) and math.isfinite(value):
+        return float(value)
+    if isinstance(value, str):
+        try:
+            parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+        except ValueError:
+            pass
+        else:
+            if parsed.tzinfo is None:
+                parsed = parsed.replace(tzinfo=timezone.utc)
+            return parsed.timestamp()
+    raise EventError("invalid_field", "timestamp must be epoch seconds or an ISO-8601 string")
+
+
+def to_row(obj: Any, now: float) -> EventRow:
+    """Validate one decoded event against docs/telemetry.md and flatten it to a row."""
+    if not isinstance(obj, dict):
+        raise EventError("invalid_event", "each line must be a JSON object")
+    tokens = _number(obj, "tokens_used", 0, 0, 1e12)
+    latency = _number(obj, "latency_ms", 0, 0, 1e9)
+    rating = _number(obj, "outcome_rating", None, 0, 5)
+    extra = {k: v for k, v in obj.items() if k not in _KNOWN}
+    return (
+        parse_timestamp(obj.get("timestamp", obj.get("ts")), now),
+        _id(obj, "agent_id", required=True) or "",
+        _id(obj, "task_id", required=True) or "",
+        _id(obj, "sprint_id", required=False),
+        _id(obj, "run_id", required=False),
+        _id(obj, "model_name", required=False),
+        int(tokens or 0),
+        float(latency or 0.0),
+        rating,
+        json.dumps(extra, separators=(",", ":"), sort_keys=True) if extra else None,
+    )
+
+
+def parse_ndjson(body: bytes, now: float | None = None) -> tuple[list[EventRow], list[LineError]]:
+    """
+    Decode a newline-delimited JSON batch. Blank lines are skipped; bad lines are
+    reported, not fatal.
+    """
+    stamp = time.time() if now is None else now
+    rows: list[EventRow] = []
+    errors: list[LineError] = []
+    for i, raw in enumerate(body.split(b"\n"), start=1):
+        line = raw.strip()
+        if not line:
+            continue
+        try:
+            rows.append(to_row(json.loads(line), stamp))
+        except EventError as exc:
+            errors.append(LineError(i, exc.code, exc.detail))
+        except (ValueError, RecursionError) as exc:  # JSONDecodeError and bad UTF-8
+            errors.append(LineError(i, "invalid_json", str(exc)[:200]))
+    return rows, errors
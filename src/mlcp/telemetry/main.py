@@ -1,16 +1,150 @@
 from __future__ import annotations
 
-from fastapi import FastAPI, status
+import os
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+import time
+from typing import Annotated, Any
+
+from fastapi import FastAPI, HTTPException, Query, Request, status
 from mlcp.common.boot import ensure_workspace
 from mlcp.common.logger import get_logger
+from mlcp.common.metrics import instrument
+from mlcp.telemetry.events import EventError, parse_ndjson, parse_timestamp
+from mlcp.telemetry.rollups import DIMENSIONS, query
+from mlcp.telemetry.store import EVENTS, EVENTS_TOTAL
+from starlette.concurrency import run_in_threadpool
+from starlette.responses import JSONResponse
+
+EVENTS_MAX_BYTES = int(os.getenv("MLCP_EVENTS_MAX_BYTES", str(8 * 1024 * 1024)))
+EVENTS_MAX_LINES = int(os.getenv("MLCP_EVENTS_MAX_LINES", "20000"))
+_ERRORS_SHOWN = 100
+_PARSE_INLINE_BYTES = 64 * 1024  # decode larger batches off the event loop
 
-ensure_workspace()
+root = ensure_workspace()
 log = get_logger("telemetry")
 
-app = FastAPI(title="The Good Shepherd", version="0.1.0")
+
+@asynccontextmanager
+async def _lifespan(_app: FastAPI) -> AsyncIterator[None]:
+    EVENTS.start(root)
+    try:
+        yield
+    finally:
+        EVENTS.close()  # drains the buffer so accepted events survive a clean shutdown
+
+
+app = FastAPI(title="The Good Shepherd", version="0.1.0", lifespan=_lifespan)
+instrument(app)
 
 
 @app.get("/health", status_code=status.HTTP_200_OK)
 def health() -> dict[str, bool | str]:
     log.debug("health ping")
     return {"ok": True, "service": "telemetry"}
+
+
+async def _read_body(request: Request) -> bytes:
+    declared = request.headers.get("content-length")
+    if declared is not None and declared.isdigit() and int(declared) > EVENTS_MAX_BYTES:
+        raise HTTPException(status_code=413, detail="request_too_large")
+    chunks: list[bytes] = []
+    size = 0
+    async for chunk in request.stream():
+        size += len(chunk)
+        if size > EVENTS_MAX_BYTES:
+            raise HTTPException(status_code=413, detail="request_too_large")
+        chunks.append(chunk)
+    return b"".join(chunks)
+
+
+@app.post("/v1/events:batch", status_code=status.HTTP_202_ACCEPTED)
+async def ingest_events(request: Request) -> JSONResponse:
+    """
+    Accept a batch of agent-invocation events as NDJSON (one JSON object per line).
+    Valid lines are buffered and written in bulk by the store; invalid lines are
+    reported back by line number. 503 + Retry-After when the buffer is full.
+    """
+    body = await _read_body(request)
+    # NDJSON lines end with a newline; only an unterminated last line adds one
+    if body.count(b"\n") + (not body.endswith(b"\n")) > EVENTS_MAX_LINES:
+        raise HTTPException(status_code=413, detail="too_many_events")
+    if len(body) > _PARSE_INLINE_BYTES:
+        rows, errors = await run_in_threadpool(parse_ndjson, body)
+    else:
+        rows, errors = parse_ndjson(body)
+    if errors:
+        EVENTS_TOTAL.inc(len(errors), result="rejected")
+    if not rows:
+        detail: Any = [e.as_dict() for e in errors[:_ERRORS_SHOWN]] if errors else "empty_batch"
+        raise HTTPException(status_code=400, detail=detail)
+    if not EVENTS.offer(rows):
+        raise HTTPException(
+            status_code=503, detail="ingest_backpressure", headers={"Retry-After": "1"}
+        )
+    return JSONResponse(
+        {
+            "accepted": len(rows),
+            "rejected": len(errors),
+            "errors": [e.as_dict() for e in errors[:_ERRORS_SHOWN]],
+        },
+        status_code=status.HTTP_202_ACCEPTED,
+    )
+
+
+def _time_param(name: str, value: str | None) -> float | None:
+    if value is None:
+        return None
+    try:
+        return parse_timestamp(float(value) if value.replace(".", "", 1).isdigit() else value, 0.0)
+    except EventError:
+        raise HTTPException(
+            status_code=422, detail=[{"code": "invalid_timestamp", "detail": f"{name}: {value}"}]
+        ) from None
+
+
+@app.get("/v1/rollups")
+def get_rollups(
+    dim: Annotated[str, Query(pattern=f"^({'|'.join(DIMENSIONS)})$")] = "all",
+    key: str | None = None,
+    since: Annotated[str | None, Query(description="epoch seconds or ISO-8601")] = None,
+    until: Annotated[str | None, Query(description="epoch seconds or ISO-8601")] = None,
+    step: Annotated[
+        int | None, Query(ge=0, description="re-bucket to this many seconds; 0 = one total per key")
+    ] = None,
+    q: Annotated[
+        list[float] | None, Query(description="latency quantiles, e.g. q=0.5&q=0.99")
+    ] = None,
+    limit: Annotated[int, Query(ge=1, le=10000)] = 1000,
+) -> dict[str, Any]:
+    """
+    Tokens, event counts, latency quantiles and mean outcome rating per key of one
+    dimension (agent, task, sprint or all) over time. Served from the rollups
+    table, so cost scales with buckets in range, not events.
+    """
+    quantiles = q or [0.5, 0.9, 0.99]
+    if any(not 0.0 <= x <= 1.0 for x in quantiles):
+        raise HTTPException(
+            status_code=422,
+            detail=[{"code": "invalid_quantile", "detail": "q must be in [0, 1]"}],
+        )
+    start, end = _time_param("since", since), _time_param("until", until)
+    items, truncated = query(
+        EVENTS.reader(),
+        dim,
+        key=key,
+        since=start,
+        until=end,
+        step=step,
+        quantiles=quantiles,
+        limit=limit,
+    )
+    return {
+        "dim": dim,
+        "since": start,
+        "until": end,
+        "step": step,
+        "generated_at": time.time(),
+        "items": items,
+        "truncated": truncated,
+    }
@@ -0,0 +1,254 @@
+from __future__ import annotations
+
+import os
+import sqlite3
+from collections.abc import Iterable, Sequence
+from dataclasses import dataclass, field
+from typing import Any, Final
+
+from mlcp.common.config import config_value
+from mlcp.common.logger import get_logger
+
+from mlcp.telemetry.events import EventRow
+from mlcp.telemetry.sketch import QuantileSketch
+
+_LOG = get_logger(__name__)
+
+MINUTE: Final[int] = 60
+HOUR: Final[int] = 3600
+DAY: Final[int] = 86400
+RESOLUTIONS: Final[tuple[int, ...]] = (MINUTE, HOUR, DAY)
+
+# minute rows older than this are merged into hours, hour rows older than the next into days
+ROLLUP_MINUTE_RETAIN_SEC = float(os.getenv("MLCP_ROLLUP_MINUTE_RETAIN_H", "48")) * 3600
+ROLLUP_HOUR_RETAIN_SEC = float(os.getenv("MLCP_ROLLUP_HOUR_RETAIN_D", "14")) * 86400
+
+DIMENSIONS: Final[tuple[str, ...]] = ("all", "agent", "task", "sprint")
+
+_COLUMNS = (
+    "dim, key, resolution, bucket_start, events, tokens, "
+    "latency_sum, rating_sum, rating_n, latency_sketch"
+)
+_UPSERT = f"INSERT OR REPLACE INTO rollups({_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"
+
+RollupKey = tuple[str, str, int]  # dim, key, bucket_start
+
+
+def retain_days() -> int:
+    return int(config_value("mlcp.temporal.retain_days", 30))
+
+
+def sample_rate() -> float:
+    """Fraction of raw events kept (`telemetry.sample_rate`); rollups always see every event."""
+    rate = float(config_value("mlcp.telemetry.sample_rate", 1.0))
+    return min(1.0, max(0.0, rate))
+
+
+@dataclass(slots=True)
+class Aggregate:
+    events: int = 0
+    tokens: int = 0
+    latency_sum: float = 0.0
+    rating_sum: float = 0.0
+    rating_n: int = 0
+    latency: QuantileSketch = field(default_factory=QuantileSketch)
+
+    def add(self, tokens: int, latency_ms: float, rating: float | None) -> None:
+        self.events += 1
+        self.tokens += tokens
+        self.latency_sum += latency_ms
+        self.latency.add(latency_ms)
+        if rating is not None:
+            self.rating_sum += rating
+            self.rating_n += 1
+
+    def merge(self, other: Aggregate) -> None:
+        self.events += other.events
+        self.tokens += other.tokens
+        self.latency_sum += other.latency_sum
+        self.rating_sum += other.rating_sum
+        self.rating_n += other.rating_n
+        self.latency.merge(other.latency)
+
+    @classmethod
+    def from_row(cls, row: sqlite3.Row) -> Aggregate:
+        return cls(
+            int(row["events"]),
+            int(row["tokens"]),
+            float(row["latency_sum"]),
+            float(row["rating_sum"]),
+            int(row["rating_n"]),
+            QuantileSketch.from_bytes(row["latency_sketch"]),
+        )
+
+    def summary(self, quantiles: Sequence[float]) -> dict[str, Any]:
+        latency: dict[str, float | None] = {
+            "mean": round(self.latency_sum / self.events, 3) if self.events else None,
+            "max": self.latency.max if self.events else None,
+        }
+        for q in quantiles:
+            value = self.latency.quantile(q)
+            latency[f"p{q * 100:g}"] = None if value is None else round(value, 3)
+        return {
+            "events": self.events,
+            "tokens_used": self.tokens,
+            "latency_ms": latency,
+            "outcome_rating_mean": (
+                round(self.rating_sum / self.rating_n, 3) if self.rating_n else None
+            ),
+        }
+
+
+def _upsert(conn: sqlite3.Connection, resolution: int, aggs: dict[RollupKey, Aggregate]) -> None:
+    """Merge `aggs` into the stored rows at `resolution` (read, merge, replace)."""
+    params = []
+    for (dim, key, start), agg in aggs.items():
+        row = conn.execute(
+            f"SELECT {_COLUMNS} FROM rollups "
+            "WHERE dim = ? AND key = ? AND resolution = ? AND bucket_start = ?",
+            (dim, key, resolution, start),
+        ).fetchone()
+        if row is not None:
+            agg.merge(Aggregate.from_row(row))
+        params.append((dim, key, resolution, start, agg.events, agg.tokens, agg.latency_sum,
+                       agg.rating_sum, agg.rating_n, agg.latency.to_bytes()))
+    conn.executemany(_UPSERT, params)
+
+
+def apply_batch(conn: sqlite3.Connection, rows: Iterable[EventRow], now: float) -> int:
+    """
+    Fold events into the minute rollups of every dimension. Call inside the
+    transaction that stores the events. Events already past retention are skipped;
+    returns how many were.
+    """
+    cutoff = now - retain_days() * DAY
+    aggs: dict[RollupKey, Aggregate] = {}
+    expired = 0
+    for ts, agent_id, task_id, sprint_id, _run, _model, tokens, latency, rating, _attrs in rows:
+        if ts < cutoff:
+            expired += 1
+            continue
+        start = int(ts // MINUTE) * MINUTE
+        keys = (("all", ""), ("agent", agent_id), ("task", task_id), ("sprint", sprint_id))
+        for dim, key in keys:
+            if key is None:
+                continue
+            agg = aggs.get((dim, key, start))
+            if agg is None:
+                agg = aggs[(dim, key, start)] = Aggregate()
+            agg.add(tokens, latency, rating)
+    if aggs:
+        _upsert(conn, MINUTE, aggs)
+    return expired
+
+
+def compact(conn: sqlite3.Connection, now: float) -> dict[str, int]:
+    """
+    Downsample and expire, in one transaction: minute rows older than
+    MLCP_ROLLUP_MINUTE_RETAIN_H become hour rows, hour rows older than
+    MLCP_ROLLUP_HOUR_RETAIN_D become day rows, and rollups and raw events older than
+    `temporal.retain_days` are deleted. Only whole target buckets are merged, so a
+    period is only ever stored at one resolution.
+    """
+    stats: dict[str, int] = {}
+    conn.execute("BEGIN IMMEDIATE;")
+    try:
+        steps = ((MINUTE, HOUR, ROLLUP_MINUTE_RETAIN_SEC), (HOUR, DAY, ROLLUP_HOUR_RETAIN_SEC))
+        for src, dst, age in steps:
+            horizon = int((now - age) // dst) * dst
+            merged: dict[RollupKey, Aggregate] = {}
+            rows = conn.execute(
+                f"SELECT {_COLUMNS} FROM rollups WHERE resolution = ? AND bucket_start < ?",
+                (src, horizon),
+            ).fetchall()
+            for row in rows:
+                k = (str(row["dim"]), str(row["key"]), int(row["bucket_start"]) // dst * dst)
+                agg = Aggregate.from_row(row)
+                if k in merged:
+                    merged[k].merge(agg)
+                else:
+                    merged[k] = agg
+            if merged:
+                _upsert(conn, dst, merged)
+                conn.execute(
+                    "DELETE FROM rollups WHERE resolution = ? AND bucket_start < ?", (src, horizon)
+                )
+            stats[f"downsampled_{src}s"] = len(rows)
+        cutoff = now - retain_days() * DAY
+        stats["expired_rollups"] = conn.execute(
+            "DELETE FROM rollups WHERE bucket_start + resolution <= ?", (cutoff,)
+        ).rowcount
+        stats["expired_events"] = conn.execute(
+            "DELETE FROM events WHERE ts < ?", (cutoff,)
+        ).rowcount
+        conn.execute("COMMIT;")
+    except BaseException:
+        conn.execute("ROLLBACK;")
+        raise
+    if any(stats.values()):
+        _LOG.info("telemetry_rollups_compacted", **stats)
+    return stats
+
+
+def query(
+    conn: sqlite3.Connection,
+    dim: str,
+    *,
+    key: str | None = None,
+    since: float | None = None,
+    until: float | None = None,
+    step: int | None = None,
+    quantiles: Sequence[float] = (0.5, 0.9, 0.99),
+    limit: int = 1000,
+) -> tuple[list[dict[str, Any]], bool]:
+    """
+    Read rollups for one dimension, optionally one key, over [since, until). Rows come
+    back at their stored resolution; with `step` they are merged into `step`-second
+    buckets, and with step=0 into one total per key. Cost is proportional to the
+    number of stored buckets in range, never to the number of events. Returns
+    (items, truncated).
+    """
+    sql = f"SELECT {_COLUMNS} FROM rollups WHERE dim = ?"
+    params: list[Any] = [dim]
+    if key is not None:
+        sql += " AND key = ?"
+        params.append(key)
+    if since is not None:
+        # a coarser row that started earlier can still overlap the window
+        sql += " AND bucket_start > ?"
+        params.append(since - DAY)
+    if until is not None:
+        sql += " AND bucket_start < ?"
+        params.append(until)
+
+    groups: dict[tuple[str, int], tuple[Aggregate, int, int]] = {}
+    for row in conn.execute(sql, params):
+        start, res = int(row["bucket_start"]), int(row["resolution"])
+        if since is not None and start + res <= since:
+            continue
+        k = str(row["key"])
+        if step is None:
+            group, width = start, res
+        elif step == 0:
+            group, width = 0, 0
+        else:
+            group, width = start // step * step, max(step, res)
+        agg = Aggregate.from_row(row)
+        found = groups.get((k, group))
+        if found is None:
+            groups[(k, group)] = (agg, width, start + res)
+        else:
+            found[0].merge(agg)
+            groups[(k, group)] = (found[0], max(found[1], width), max(found[2], start + res))
+
+    items: list[dict[str, Any]] = []
+    for (k, group), (agg, width, end) in sorted(groups.items()):
+        item: dict[str, Any] = {"key": k}
+        if step != 0:
+            item["bucket_start"] = group
+            item["resolution"] = width
+        else:
+            item["last_bucket_end"] = end
+        item.update(agg.summary(quantiles))
+        items.append(item)
+    return items[:limit], len(items) > limit
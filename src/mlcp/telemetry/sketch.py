@@ -0,0 +1,88 @@
+from __future__ import annotations
+
+import math
+import os
+import struct
+from collections.abc import Iterable
+
+# stored sketches are only meaningful for the alpha they were written with;
+# keep it fixed per database
+SKETCH_ALPHA = float(os.getenv("MLCP_SKETCH_ALPHA", "0.01"))
+
+_HEADER = struct.Struct("<qdd")  # zero count, min, max
+_PAIR = struct.Struct("<iq")  # bucket index, count
+
+
+class QuantileSketch:
+    """
+    Log-bucketed quantile sketch (DDSketch layout) for non-negative values. Bucket i
+    counts values in (gamma^(i-1), gamma^i] with gamma = (1+alpha)/(1-alpha), so any
+    quantile is returned within relative error alpha. Merging adds bucket counts, so
+    rollups of rollups stay exact at the sketch's accuracy; size grows with log(max/min),
+    not with the number of values.
+    """
+
+    __slots__ = ("bins", "zero", "count", "min", "max")
+
+    _gamma = (1 + SKETCH_ALPHA) / (1 - SKETCH_ALPHA)
+    _log_gamma = math.log(_gamma)
+
+    def __init__(self) -> None:
+        self.bins: dict[int, int] = {}
+        self.zero = 0
+        self.count = 0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def add(self, value: float, n: int = 1) -> None:
+        if value <= 0.0:
+            self.zero += n
+            value = 0.0
+        else:
+            i = math.ceil(math.log(value) / self._log_gamma)
+            self.bins[i] = self.bins.get(i, 0) + n
+        self.count += n
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+
+    def update(self, values: Iterable[float]) -> None:
+        for v in values:
+            self.add(v)
+
+    def merge(self, other: QuantileSketch) -> None:
+        for i, n in other.bins.items():
+            self.bins[i] = self.bins.get(i, 0) + n
+        self.zero += other.zero
+        self.count += other.count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    def quantile(self, q: float) -> float | None:
+        if self.count == 0:
+            return None
+        rank = q * (self.count - 1)
+        seen = self.zero
+        if rank < seen:
+            return 0.0
+        for i in sorted(self.bins):
+            seen += self.bins[i]
+            if rank < seen:
+                estimate = 2.0 * self._gamma**i / (self._gamma + 1.0)
+                return min(max(estimate, self.min), self.max)
+        return self.max
+
+    def to_bytes(self) -> bytes:
+        header = _HEADER.pack(self.zero, self.min, self.max)
+        return header + b"".join(_PAIR.pack(i, n) for i, n in sorted(self.bins.items()))
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> QuantileSketch:
+        s = cls()
+        s.zero, s.min, s.max = _HEADER.unpack_from(data)
+        s.count = s.zero
+        for i, n in _PAIR.iter_unpack(memoryview(data)[_HEADER.size:]):
+            s.bins[i] = n
+            s.count += n
+        return s
@@ -0,0 +1,327 @@
+from __future__ import annotations
+
+import os
+import random
+import sqlite3
+import threading
+import time
+from collections import deque
+from collections.abc import Sequence
+from pathlib import Path
+from typing import Final
+
+from mlcp.common.logger import get_logger
+from mlcp.common.metrics import REGISTRY
+
+from mlcp.telemetry.events import COLUMNS, EventRow
+from mlcp.telemetry.rollups import apply_batch, compact, sample_rate
+
+_LOG = get_logger(__name__)
+
+EVENTS_QUEUE_MAX = int(os.getenv("MLCP_EVENTS_QUEUE_MAX", "200000"))
+EVENTS_FLUSH_MAX = int(os.getenv("MLCP_EVENTS_FLUSH_MAX", "5000"))
+EVENTS_LINGER_SEC = float(os.getenv("MLCP_EVENTS_LINGER_MS", "200")) / 1000.0
+EVENTS_RETRY_SEC = float(os.getenv("MLCP_EVENTS_RETRY_MS", "500")) / 1000.0
+ROLLUP_COMPACT_SEC = float(os.getenv("MLCP_ROLLUP_COMPACT_SEC", "300"))
+
+_DB_NAME: Final[str] = "telemetry.db"
+_SYNCHRONOUS_MODES: Final[frozenset[str]] = frozenset({"OFF", "NORMAL", "FULL", "EXTRA"})
+
+# Ordered schema migrations; entry N brings `PRAGMA user_version` from N to N+1.
+_MIGRATIONS: Final[tuple[tuple[str, ...], ...]] = (
+    (
+        # append-only; ts and received_at are unix epoch seconds
+        """
+        CREATE TABLE IF NOT EXISTS events (
+          ts             REAL NOT NULL,
+          agent_id       TEXT NOT NULL,
+          task_id        TEXT NOT NULL,
+          sprint_id      TEXT,
+          run_id         TEXT,
+          model_name     TEXT,
+          tokens_used    INTEGER NOT NULL,
+          latency_ms     REAL NOT NULL,
+          outcome_rating REAL,
+          attrs          TEXT,           -- JSON object of fields outside the spec
+          received_at    REAL NOT NULL
+        );
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_events_ts ON events(ts);",
+        "CREATE INDEX IF NOT EXISTS idx_events_agent ON events(agent_id, ts);",
+        "CREATE INDEX IF NOT EXISTS idx_events_task ON events(task_id, ts);",
+    ),
+    (
+        # pre-aggregated per (dimension, key, time bucket); dim 'all' uses key ''
+        """
+        CREATE TABLE IF NOT EXISTS rollups (
+          dim            TEXT NOT NULL,      -- all|agent|task|sprint
+          key            TEXT NOT NULL,
+          resolution     INTEGER NOT NULL,   -- bucket width in seconds: 60|3600|86400
+          bucket_start   INTEGER NOT NULL,   -- unix epoch seconds
+          events         INTEGER NOT NULL,
+          tokens         INTEGER NOT NULL,
+          latency_sum    REAL NOT NULL,
+          rating_sum     REAL NOT NULL,
+          rating_n       INTEGER NOT NULL,
+          latency_sketch BLOB NOT NULL,      -- QuantileSketch.to_bytes()
+          PRIMARY KEY (dim, key, resolution, bucket_start)
+        ) WITHOUT ROWID;
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_rollups_dim_time ON rollups(dim, bucket_start);",
+        "CREATE INDEX IF NOT EXISTS idx_rollups_resolution ON rollups(resolution, bucket_start);",
+    ),
+)
+SCHEMA_VERSION: Final[int] = len(_MIGRATIONS)
+
+_INSERT = (
+    f"INSERT INTO events({', '.join(COLUMNS)}, received_at) "
+    f"VALUES ({', '.join('?' for _ in COLUMNS)}, ?)"
+)
+
+EVENTS_TOTAL = REGISTRY.counter(
+    "mlcp_telemetry_events_total", "Telemetry events by ingest outcome.", ("result",)
+)
+EVENTS_BUFFERED = REGISTRY.gauge(
+    "mlcp_telemetry_events_buffered", "Events accepted but not yet written."
+)
+FLUSH_SECONDS = REGISTRY.histogram(
+    "mlcp_telemetry_flush_seconds", "Time to write one batch of events."
+)
+
+
+def open_db(path: Path) -> sqlite3.Connection:
+    """Open the telemetry database (WAL, autocommit) and bring its schema up to date."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode=WAL;")
+    sync = os.getenv("MLCP_DB_SYNCHRONOUS", "NORMAL").upper()
+    conn.execute(f"PRAGMA synchronous={sync if sync in _SYNCHRONOUS_MODES else 'NORMAL'};")
+    conn.execute(f"PRAGMA busy_timeout={int(os.getenv('MLCP_DB_BUSY_TIMEOUT_MS', '5000'))};")
+    current = int(conn.execute("PRAGMA user_version;").fetchone()[0])
+    if current < SCHEMA_VERSION:
+        conn.execute("BEGIN IMMEDIATE;")
+        try:
+            for version in range(current, SCHEMA_VERSION):
+                for step in _MIGRATIONS[version]:
+                    conn.execute(step)
+            conn.execute(f"PRAGMA user_version={SCHEMA_VERSION};")
+            conn.execute("COMMIT;")
+        except BaseException:
+            conn.execute("ROLLBACK;")
+            raise
+        _LOG.info(
+            "telemetry_db_migrated",
+            path=str(path),
+            from_version=current,
+            to_version=SCHEMA_VERSION,
+        )
+    return conn
+
+
+class EventStore:
+    """
+    Buffered, append-only event log. Requests hand whole batches to `offer`, which
+    only appends to an in-memory buffer bounded by EVENTS_QUEUE_MAX events and
+    refuses the batch outright when it would not fit (callers answer 503, so agents
+    back off instead of the service growing without bound). A background thread
+    waits up to EVENTS_LINGER_MS for rows to accumulate and writes up to
+    EVENTS_FLUSH_MAX of them per transaction with one executemany, keeping a
+    `telemetry.sample_rate` fraction of raw rows and folding all of them into the
+    rollups. Every ROLLUP_COMPACT_SEC it downsamples and expires rollups and events.
+    `close` stops intake, drains the buffer and closes the database.
+    """
+
+    def __init__(self, max_events: int = EVENTS_QUEUE_MAX) -> None:
+        self.max_events = max(1, max_events)
+        self._buf: deque[tuple[EventRow, float]] = deque()
+        self._cond = threading.Condition()
+        self._thread: threading.Thread | None = None
+        self._path: Path | None = None
+        self._closing = False
+        self._inflight = 0
+        self._local = threading.local()
+        self._readers: list[sqlite3.Connection] = []
+
+    def start(self, root: Path) -> None:
+        with self._cond:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._path = root / "db" / _DB_NAME
+            self._closing = False
+            conn = open_db(self._path)
+            self._thread = threading.Thread(
+                target=self._run, args=(conn,), name="mlcp-telemetry", daemon=True
+            )
+            self._thread.start()
+        _LOG.info("telemetry_store_started", path=str(self._path))
+
+    @property
+    def path(self) -> Path | None:
+        return self._path
+
+    def offer(self, rows: Sequence[EventRow]) -> bool:
+        """Buffer a whole batch, or nothing if it would overflow the buffer or intake is closed."""
+        if not rows:
+            return True
+        received = time.time()
+        with self._cond:
+            full = len(self._buf) + len(rows) > self.max_events
+            if self._closing or self._thread is None or full:
+                EVENTS_TOTAL.inc(len(rows), result="refused")
+                return False
+            self._buf.extend((row, received) for row in rows)
+            EVENTS_BUFFERED.set(len(self._buf) + self._inflight)
+            self._cond.notify_all()
+        EVENTS_TOTAL.inc(len(rows), result="accepted")
+        return True
+
+    def pending(self) -> int:
+        with self._cond:
+            return len(self._buf) + self._inflight
+
+    def flush(self, timeout: float | None = None) -> bool:
+        """Block until everything offered so far is written (or the timeout passes)."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            self._cond.notify_all()
+            while self._buf or self._inflight:
+                if self._thread is None or not self._thread.is_alive():
+                    return False
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._cond.wait(remaining if remaining is not None else 0.1)
+            return True
+
+    def close(self) -> None:
+        with self._cond:
+            thread, self._closing = self._thread, True
+            self._cond.notify_all()
+        if thread is not None:
+            thread.join()
+        with self._cond:
+            self._thread = None
+            left = len(self._buf)
+            readers, self._readers = self._readers, []
+            self._local = threading.local()
+        for conn in readers:
+            conn.close()
+        if left:
+            _LOG.error("telemetry_events_lost", count=left)
+
+    # --- writer thread -------------------------------------------------
+
+    def _take(self, timeout: float) -> list[tuple[EventRow, float]] | None:
+        """
+        Next batch to write: [] when `timeout` passes with nothing buffered, None once
+        closing and drained.
+        """
+        with self._cond:
+            if not self._buf:
+                if self._closing:
+                    return None
+                self._cond.wait_for(
+                    lambda: self._closing or bool(self._buf), timeout=max(0.0, timeout)
+                )
+                if not self._buf:
+                    return None if self._closing else []
+            if len(self._buf) < EVENTS_FLUSH_MAX and not self._closing:
+                # linger so a trickle of small requests still becomes one transaction
+                self._cond.wait_for(
+                    lambda: self._closing or len(self._buf) >= EVENTS_FLUSH_MAX,
+                    timeout=EVENTS_LINGER_SEC,
+                )
+            n = min(len(self._buf), EVENTS_FLUSH_MAX)
+            batch = [self._buf.popleft() for _ in range(n)]
+            self._inflight = n
+            return batch
+
+    def _done(self, batch: list[tuple[EventRow, float]], *, requeue: bool) -> None:
+        with self._cond:
+            if requeue:
+                self._buf.extendleft(reversed(batch))
+            self._inflight = 0
+            EVENTS_BUFFERED.set(len(self._buf))
+            self._cond.notify_all()
+
+    def _write(self, conn: sqlite3.Connection, batch: list[tuple[EventRow, float]]) -> None:
+        """Store the sampled raw rows and fold every row into the rollups, atomically."""
+        rate = sample_rate()
+        kept = [
+            (*row, received) for row, received in batch if rate >= 1.0 or random.random() < rate
+        ]
+        conn.execute("BEGIN IMMEDIATE;")
+        try:
+            if kept:
+                conn.executemany(_INSERT, kept)
+            expired = apply_batch(conn, (row for row, _ in batch), time.time())
+        except BaseException:
+            conn.execute("ROLLBACK;")
+            raise
+        conn.execute("COMMIT;")
+        EVENTS_TOTAL.inc(len(batch), result="written")
+        if len(kept) < len(batch):
+            EVENTS_TOTAL.inc(len(batch) - len(kept), result="sampled_out")
+        if expired:
+            EVENTS_TOTAL.inc(expired, result="expired")
+
+    def _run(self, conn: sqlite3.Connection) -> None:
+        next_compact = time.monotonic()
+        try:
+            while True:
+                if time.monotonic() >= next_compact:
+                    try:
+                        compact(conn, time.time())
+                    except sqlite3.Error as exc:
+                        _LOG.error("telemetry_compact_failed", error=str(exc))
+                    next_compact = time.monotonic() + ROLLUP_COMPACT_SEC
+                batch = self._take(next_compact - time.monotonic())
+                if batch is None:
+                    return
+                if not batch:
+                    continue
+                t0 = time.perf_counter()
+                try:
+                    self._write(conn, batch)
+                except sqlite3.OperationalError as exc:
+                    # locked / busy / disk full: keep the rows and try again shortly
+                    _LOG.warning("telemetry_flush_retry", count=len(batch), error=str(exc))
+                    self._done(batch, requeue=True)
+                    time.sleep(EVENTS_RETRY_SEC)
+                    if self._closing:
+                        _LOG.error(
+                            "telemetry_flush_abandoned", count=self.pending(), error=str(exc)
+                        )
+                        return
+                    continue
+                except sqlite3.Error as exc:
+                    _LOG.error("telemetry_flush_failed", count=len(batch), error=str(exc))
+                    EVENTS_TOTAL.inc(len(batch), result="dropped")
+                    self._done(batch, requeue=False)
+                    continue
+                FLUSH_SECONDS.observe(time.perf_counter() - t0)
+                self._done(batch, requeue=False)
+        finally:
+            conn.close()
+
+    # --- readers -------------------------------------------------------
+
+    def reader(self) -> sqlite3.Connection:
+        """
+        This thread's read connection to the telemetry database (WAL, so reads never
+        wait on the writer).
+        """
+        if self._path is None:
+            raise RuntimeError("event store not started")
+        cached: tuple[Path, sqlite3.Connection] | None = getattr(self._local, "conn", None)
+        if cached is not None and cached[0] == self._path:
+            return cached[1]
+        conn = open_db(self._path)
+        with self._cond:
+            self._readers.append(conn)
+        self._local.conn = (self._path, conn)
+        return conn
+
+
+EVENTS = EventStore()
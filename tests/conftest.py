@@ -0,0 +1,60 @@
+from __future__ import annotations
+
+from collections.abc import Callable, Iterator
+from pathlib import Path
+from typing import Any
+
+import pytest
+from fastapi.testclient import TestClient
+
+from mlcp.api.db import close_all
+from mlcp.api.frontier import FRONTIER
+from mlcp.api.main import create_app
+
+Seal = Callable[..., tuple[str, int]]
+
+
+def plan(edges: list[tuple[str, str]], *nodes: str, **timeouts: int) -> dict[str, Any]:
+    """A plan over `nodes` (all developers); `timeouts` overrides timeout_ms per node."""
+    return {
+        "nodes": [
+            {"id": n, "name": n, "role": "developer", "timeout_ms": timeouts.get(n, 60000)}
+            for n in nodes
+        ],
+        "edges": [list(e) for e in edges],
+    }
+
+
+# a -> b, a -> c, b -> d, c -> d
+DIAMOND = plan([("a", "b"), ("a", "c"), ("b", "d"), ("c", "d")], "a", "b", "c", "d")
+
+
+@pytest.fixture
+def data_root(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Iterator[Path]:
+    monkeypatch.setenv("DATA_ROOT", str(tmp_path))
+    FRONTIER.clear()
+    yield tmp_path
+    FRONTIER.clear()
+    close_all()
+
+
+@pytest.fixture
+def client(data_root: Path) -> Iterator[TestClient]:
+    with TestClient(create_app()) as c:
+        yield c
+
+
+@pytest.fixture
+def seal(client: TestClient) -> Seal:
+    """Seal `body` (default DIAMOND) into `run_id`, creating a run when None."""
+
+    def _seal(body: dict[str, Any] = DIAMOND, run_id: str | None = None) -> tuple[str, int]:
+        if run_id is None:
+            r = client.post("/v1/runs", json={"goals": "test"})
+            assert r.status_code == 201, r.text
+            run_id = str(r.json()["run_id"])
+        r = client.post(f"/v1/runs/{run_id}/plan:seal", json={"plan": body})
+        assert r.status_code == 200, r.text
+        return run_id, int(r.json()["plan_version"])
+
+    return _seal
@@ -0,0 +1,99 @@
+from __future__ import annotations
+
+import random
+
+import pytest
+
+from mlcp.registry.index import AgentIndex, AgentProfile, RegistryError, profile_from, skill_key
+
+SKILLS = ["a", "b", "c", "d"]
+ROLES = ["Developer", "Tester"]
+
+
+def _agent(agent_id: str, role: str = "Developer", **skills: int) -> AgentProfile:
+    return AgentProfile(agent_id, role, {k: (k, r) for k, r in skills.items()}, {})
+
+
+def _brute_force(
+    agents: list[AgentProfile],
+    requires: list[str],
+    role: str | None,
+    limit: int,
+    require_all: bool,
+    min_rating: int,
+) -> list[tuple[str, int]]:
+    keys = list(dict.fromkeys(skill_key(r) for r in requires))
+    scored = []
+    for agent in agents:
+        if role is not None and agent.role_category != role:
+            continue
+        hits = [agent.skills.get(k) for k in keys]
+        ok = [h[1] for h in hits if h is not None and h[1] >= min_rating]
+        if not ok or (require_all and len(ok) < len(keys)):
+            continue
+        scored.append((agent.agent_id, sum(ok)))
+    scored.sort(key=lambda c: (-c[1], c[0]))
+    return scored[:limit]
+
+
+def test_match_equals_brute_force() -> None:
+    rng = random.Random(699)
+    for _ in range(500):
+        index = AgentIndex(limits={})
+        agents = []
+        for i in range(rng.randrange(1, 30)):
+            skills = {s: rng.choice([0, 0, 1, 2]) for s in rng.sample(SKILLS, rng.randrange(1, 4))}
+            agents.append(_agent(f"{rng.choice('xyz')}{i}", rng.choice(ROLES), **skills))
+            index.register(agents[-1])
+        requires = rng.sample(SKILLS, rng.randrange(1, 4))
+        role = rng.choice([None, *ROLES])
+        limit = rng.randrange(1, 8)
+        require_all = rng.random() < 0.3
+        min_rating = rng.choice([0, 0, 1, 2])
+        got, _ = index.match(
+            requires, role=role, limit=limit, require_all=require_all, min_rating=min_rating
+        )
+        expected = _brute_force(agents, requires, role, limit, require_all, min_rating)
+        args = (requires, role, limit, require_all, min_rating)
+        assert [(c.agent.agent_id, c.score) for c in got] == expected, args
+
+
+def test_zero_rated_positions_do_not_end_the_walk_early() -> None:
+    index = AgentIndex(limits={})
+    index.register(_agent("a1", b=1))
+    index.register(_agent("y1", b=1))
+    index.register(_agent("zz3", c=0, b=1))
+    got, _ = index.match(["c", "b"], limit=2)
+    assert [(c.agent.agent_id, c.score) for c in got] == [("a1", 1), ("y1", 1)]
+
+
+def test_match_reports_matched_and_missing_skills() -> None:
+    index = AgentIndex(limits={})
+    index.register(_agent("dev-1", **{"react": 4, "ux design": 1}))
+    (cand,), examined = index.match(["React", "UX Design", "Go"], min_rating=2)
+    assert (cand.score, cand.matched, cand.missing) == (4, {"React": 4}, ["UX Design", "Go"])
+    assert examined == 1
+    assert index.match(["React"], require_all=True, role="Tester") == ([], 0)
+
+
+def test_role_capacity_and_replacement() -> None:
+    index = AgentIndex(limits={"Developer": 1})
+    assert index.register(_agent("d1", a=1))
+    assert not index.register(_agent("d1", a=3))
+    assert index.match(["a"])[0][0].score == 3
+    with pytest.raises(RegistryError) as full:
+        index.register(_agent("d2", a=1))
+    assert full.value.status_code == 409
+    assert index.remove("d1") and not index.remove("d1")
+    assert index.register(_agent("d2", a=1))
+    assert index.capacity()["Developer"] == {"instances": 1, "max_instances": 1, "available": 0}
+
+
+def test_profile_from_validates_the_agent_layer() -> None:
+    layer = {"agent_id": "a", "role_category": "Developer"}
+    agent = profile_from({**layer, "skill_profile": [{"name": " React ", "rating": 4}]})
+    assert agent.skills == {"react": ("React", 4)}
+    with pytest.raises(RegistryError):
+        profile_from({**layer, "skill_profile": [{"name": "React", "rating": -1}]})
+    with pytest.raises(RegistryError):
+        profile_from({"agent_id": "", "role_category": "Developer"})
@@ -0,0 +1,117 @@
+from __future__ import annotations
+
+import gzip
+import os
+import sqlite3
+from collections.abc import Iterator
+from datetime import timedelta
+from pathlib import Path
+
+import pytest
+
+from mlcp.api import artifacts
+from mlcp.api.artifacts import ARTIFACTS_TOTAL, ArtifactStore, StoredArtifact
+
+
+@pytest.fixture
+def store(data_root: Path) -> Iterator[ArtifactStore]:
+    s = ArtifactStore()
+    yield s
+    s.close()
+
+
+def _read(stored: StoredArtifact | None, *, compressed: bool = False) -> bytes:
+    assert stored is not None
+    return b"".join(stored.iter_bytes(compressed=compressed))
+
+
+def test_segment_round_trip(store: ArtifactStore, data_root: Path) -> None:
+    texts = {v: f"version: {v}\n" + "x" * v * 100 for v in range(1, 6)}
+    for v, text in texts.items():
+        store.submit("run_a", v, "yaml", text)
+    store.flush()
+
+    for v, text in texts.items():
+        stored = store.open("run_a", v)
+        assert stored is not None and stored.data is None and stored.kind == "yaml"
+        assert _read(stored) == text.encode()
+        assert gzip.decompress(_read(stored, compressed=True)) == text.encode()
+
+    (seg,) = (data_root / "layers" / "artifacts").glob("*/*.gz")
+    assert seg.name == f"segment-{os.getpid()}-0.gz"
+    # the segment is a valid multi-member gzip stream
+    assert gzip.decompress(seg.read_bytes()) == "".join(texts.values()).encode()
+    assert store.open("run_a", 9) is None
+
+
+def test_segments_roll_over_at_the_size_limit(
+    store: ArtifactStore, data_root: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(artifacts, "ARTIFACT_SEGMENT_BYTES", 1)
+    for v in (1, 2):
+        store.submit("run_a", v, "json", f'{{"v": {v}}}')
+        store.flush()
+    names = sorted(p.name for p in (data_root / "layers" / "artifacts").glob("*/*.gz"))
+    assert names == [f"segment-{os.getpid()}-0.gz", f"segment-{os.getpid()}-1.gz"]
+    assert _read(store.open("run_a", 2)) == b'{"v": 2}'
+
+
+def test_rotation_archives_old_days(store: ArtifactStore, data_root: Path) -> None:
+    store.submit("run_a", 1, "yaml", "a: 1\n")
+    store.flush()
+    assert store.rotate() == 0
+
+    later = artifacts._utcnow() + timedelta(days=artifacts.retain_days() + 1)
+    assert store.rotate(later) == 1
+    assert not any((data_root / "layers" / "artifacts").iterdir())
+    stored = store.open("run_a", 1)
+    assert stored is not None and stored.path is not None
+    assert stored.path.is_relative_to(data_root / "archive" / "artifacts")
+    assert _read(stored) == b"a: 1\n"
+
+    # new writes start a fresh segment for today
+    store.submit("run_a", 2, "yaml", "a: 2\n")
+    store.flush()
+    assert _read(store.open("run_a", 2)) == b"a: 2\n"
+
+
+def test_legacy_plain_files_are_served(store: ArtifactStore, data_root: Path) -> None:
+    legacy = data_root / "layers" / "plans" / "run_a"
+    legacy.mkdir(parents=True)
+    (legacy / "v1.json").write_text('{"old": true}')
+    stored = store.open("run_a", 1)
+    assert stored is not None and not stored.gzipped
+    assert gzip.decompress(_read(stored, compressed=True)) == b'{"old": true}'
+
+
+def test_failed_writes_are_retried_then_counted_as_dropped(
+    store: ArtifactStore, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(artifacts, "ARTIFACT_RETRY_SEC", 0.0)
+    real_write = store._write
+    failures = iter([OSError("disk full"), sqlite3.OperationalError("database is locked")])
+
+    def flaky(batch: list[artifacts.Artifact]) -> None:
+        exc = next(failures, None)
+        if exc is not None:
+            raise exc
+        real_write(batch)
+
+    monkeypatch.setattr(store, "_write", flaky)
+    retried = ARTIFACTS_TOTAL.value(result="retried")
+    store.submit("run_a", 1, "yaml", "a: 1\n")
+    store.flush()
+    assert ARTIFACTS_TOTAL.value(result="retried") == retried + 2
+    stored = store.open("run_a", 1)
+    assert stored is not None and stored.data is None
+    assert _read(stored) == b"a: 1\n"
+
+    def broken(batch: list[artifacts.Artifact]) -> None:
+        raise OSError("read-only file system")
+
+    monkeypatch.setattr(store, "_write", broken)
+    dropped = ARTIFACTS_TOTAL.value(result="dropped")
+    store.submit("run_a", 2, "yaml", "a: 2\n")
+    store.flush()
+    assert ARTIFACTS_TOTAL.value(result="dropped") == dropped + 1
+    assert store.open("run_a", 2) is None
@@ -0,0 +1,106 @@
+from __future__ import annotations
+
+from typing import Any
+
+from mlcp.context.budget import TokenEstimator, estimate_tokens, fit, packet_budget
+from mlcp.context.fragments import Fragment, FragmentCache
+from mlcp.context.packets import PacketBuilder
+
+HISTORY = [f"ctx-{i:04d}-" + "prior context summary " * 5 for i in range(20)]
+
+
+def _frags(cache: FragmentCache, **layers: Any) -> dict[str, Fragment]:
+    return {name: cache.intern(name, data) for name, data in layers.items()}
+
+
+def test_estimate_tokens_heuristic() -> None:
+    assert estimate_tokens("") == 0
+    assert estimate_tokens("hello world") == 4  # 5 letters -> 2 tokens each
+    assert estimate_tokens("1234567") == 3
+    assert estimate_tokens('{"a":1}') == 7
+
+
+def test_estimates_are_cached_per_fragment() -> None:
+    cache = FragmentCache(8)
+    est = TokenEstimator(8)
+    frag = cache.intern("task", {"title": "Search"})
+    n = est.fragment(frag)
+    assert n == estimate_tokens('"task":') + estimate_tokens(frag.raw.decode()) + 1
+    assert est.fragment(frag) == n
+    assert est.stats()["hits"] == 1
+
+
+def test_budget_is_the_tightest_limit() -> None:
+    cache = FragmentCache(8)
+    frags = _frags(
+        cache,
+        operational={"token_budget": 10000, "current_usage": 1200},
+        agent={"model_info": {"max_context_window": 128000}},
+    )
+    assert packet_budget(frags) == (8800, "operational.token_budget")
+    assert packet_budget(frags, 500) == (500, "request.max_tokens")
+    assert packet_budget({}) == (None, None)
+    odd = _frags(cache, operational={"token_budget": True}, agent={"model_info": "x"})
+    assert packet_budget(odd) == (None, None)
+    assert packet_budget(_frags(cache, operational={"token_budget": 10, "current_usage": 50})) == (
+        0,
+        "operational.token_budget",
+    )
+
+
+def test_fit_without_pressure_changes_nothing() -> None:
+    cache = FragmentCache(8)
+    frags = _frags(cache, task={"title": "Search"}, telemetry={"last_latency_ms": 320})
+    out, account = fit(frags, 10, None, None, TokenEstimator(8), cache)
+    assert out == frags
+    assert account.fits and account.trimmed == []
+    assert account.total == 10 + sum(account.layers.values())
+
+
+def test_fit_trims_along_the_policy_in_order() -> None:
+    cache = FragmentCache(32)
+    est = TokenEstimator(32)
+    frags = _frags(
+        cache,
+        task={"title": "Search", "metadata": {"requires": ["React"]}},
+        temporal={"previous_context_ids": HISTORY, "forecast": {"due": "soon"}},
+        telemetry={"last_latency_ms": 320, "outcome_rating": 4},
+    )
+    full = sum(est.fragment(f) for f in frags.values())
+    history = est.item_costs(frags["temporal"], ("previous_context_ids",), HISTORY)[-1]
+    budget = full - history // 2
+
+    out, account = fit(frags, 0, budget, "request.max_tokens", est, cache)
+    assert account.fits and account.total <= budget
+    assert "telemetry" not in out
+    steps = [(t["layer"], t["action"]) for t in account.trimmed]
+    assert steps == [("telemetry", "drop_layer"), ("temporal", "drop_oldest")]
+    kept = out["temporal"].data["previous_context_ids"]
+    assert 0 < len(kept) < len(HISTORY)
+    assert kept == HISTORY[-len(kept) :]  # the oldest go first
+    assert out["temporal"].data["forecast"] == {"due": "soon"}
+    assert out["task"] is frags["task"]
+
+    again, _ = fit(frags, 0, budget, "request.max_tokens", est, cache)
+    assert again["temporal"] is out["temporal"]  # trimmed variants are memoized
+
+
+def test_fit_reports_when_the_essentials_do_not_fit() -> None:
+    cache = FragmentCache(8)
+    frags = _frags(cache, task={"title": "x" * 400, "metadata": {"a": 1}})
+    out, account = fit(frags, 5, 1, "request.max_tokens", TokenEstimator(8), cache)
+    assert not account.fits
+    assert "metadata" not in out["task"].data
+    assert [(t["layer"], t["path"]) for t in account.trimmed] == [("task", "metadata")]
+
+
+def test_built_packets_carry_their_accounting() -> None:
+    builder = PacketBuilder(FragmentCache(64), max_packets=4)
+    layers = {"temporal": {"previous_context_ids": HISTORY}, "telemetry": {"latency": 1}}
+    loose = builder.build(layers)
+    assert loose.tokens.budget is None and loose.tokens.trimmed == []
+    tight = builder.build(layers, max_tokens=loose.tokens.total - 50)
+    assert tight.tokens.fits
+    assert tight.tokens.budget_source == "request.max_tokens"
+    assert tight.layers["temporal"].data["previous_context_ids"] == HISTORY
+    assert len(tight.rendered["temporal"].data["previous_context_ids"]) < len(HISTORY)
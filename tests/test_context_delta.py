@@ -0,0 +1,178 @@
+from __future__ import annotations
+
+import copy
+import importlib
+import json
+import random
+from collections.abc import Iterator
+from pathlib import Path
+from typing import Any
+
+import pytest
+from fastapi.testclient import TestClient
+
+from mlcp.context.delta import DeltaEncoder, Op, diff_values
+from mlcp.context.fragments import FragmentCache
+from mlcp.context.packets import PacketBuilder
+
+HISTORY = [f"ctx-{i}" for i in range(8)]
+
+
+def _apply(doc: Any, ops: list[Op]) -> Any:
+    """Minimal RFC 6902 applier for the add/remove/replace ops the encoder emits."""
+    doc = copy.deepcopy(doc)
+    for op in ops:
+        if op["path"] == "":
+            doc = copy.deepcopy(op["value"])
+            continue
+        *parents, last = [
+            t.replace("~1", "/").replace("~0", "~") for t in op["path"].split("/")[1:]
+        ]
+        node = doc
+        for t in parents:
+            node = node[int(t)] if isinstance(node, list) else node[t]
+        if isinstance(node, list):
+            if op["op"] == "remove":
+                del node[int(last)]
+            elif op["op"] == "replace":
+                node[int(last)] = copy.deepcopy(op["value"])
+            elif last == "-":
+                node.append(copy.deepcopy(op["value"]))
+            else:
+                node.insert(int(last), copy.deepcopy(op["value"]))
+        elif op["op"] == "remove":
+            del node[last]
+        else:
+            node[last] = copy.deepcopy(op["value"])
+    return doc
+
+
+def _value(rng: random.Random, depth: int = 0) -> Any:
+    kind = rng.randrange(7 if depth < 3 else 4)
+    if kind == 0:
+        return rng.randrange(3)
+    if kind == 1:
+        return rng.choice(["a", "b", "x/y", "t~1", ""])
+    if kind == 2:
+        return rng.choice([True, False, None, 1.0])
+    if kind == 3:
+        return rng.choice([0, 1])
+    if kind in (4, 5):
+        keys = rng.sample(["a", "b", "c", "d/e", "f~g"], rng.randrange(4))
+        return {k: _value(rng, depth + 1) for k in keys}
+    return [_value(rng, depth + 1) for _ in range(rng.randrange(5))]
+
+
+def _mutate(rng: random.Random, value: Any) -> Any:
+    if isinstance(value, dict) and value and rng.random() < 0.7:
+        out = dict(value)
+        key = rng.choice(list(out))
+        out[key] = _mutate(rng, out[key])
+        if rng.random() < 0.3:
+            out.pop(rng.choice(list(out)), None)
+        return out
+    if isinstance(value, list) and value and rng.random() < 0.7:
+        out = list(value)
+        r = rng.random()
+        if r < 0.3:
+            del out[: rng.randrange(1, len(out) + 1)]
+            out.extend(_value(rng, 2) for _ in range(rng.randrange(3)))
+        elif r < 0.6:
+            i = rng.randrange(len(out))
+            out[i] = _mutate(rng, out[i])
+        else:
+            out.insert(rng.randrange(len(out) + 1), _value(rng, 2))
+        return out
+    return _value(rng)
+
+
+def test_patch_round_trips() -> None:
+    rng = random.Random(23)
+    for _ in range(500):
+        a = _value(rng)
+        b = _mutate(rng, a)
+        ops: list[Op] = []
+        diff_values(a, b, "", ops)
+        result = _apply(a, ops)
+        # json.dumps tells 1 from 1.0 and True, which == does not
+        assert json.dumps(result, sort_keys=True) == json.dumps(b, sort_keys=True), (a, b, ops)
+
+
+def test_type_changes_are_replaced() -> None:
+    ops: list[Op] = []
+    diff_values({"a": 1, "b": True}, {"a": 1.0, "b": 1}, "", ops)
+    assert ops == [
+        {"op": "replace", "path": "/a", "value": 1.0},
+        {"op": "replace", "path": "/b", "value": 1},
+    ]
+
+
+def test_history_shift_is_encoded_as_remove_and_append() -> None:
+    ops: list[Op] = []
+    diff_values(HISTORY, HISTORY[2:] + ["ctx-8"], "/h", ops)
+    assert ops == [
+        {"op": "remove", "path": "/h/0"},
+        {"op": "remove", "path": "/h/0"},
+        {"op": "add", "path": "/h/-", "value": "ctx-8"},
+    ]
+
+
+def test_packet_delta_round_trips() -> None:
+    builder = PacketBuilder(FragmentCache(64), max_packets=8)
+    deltas = DeltaEncoder(16)
+    p1 = builder.build(
+        {
+            "task": {"title": "Search", "status": "open"},
+            "temporal": {"previous_context_ids": HISTORY},
+            "telemetry": {"latency": 1},
+        },
+        header={"source_agent_id": "po", "target_agent_id": "dev"},
+    )
+    p2 = builder.build(
+        {
+            "task": {"title": "Search", "status": "in_progress"},
+            "temporal": {"previous_context_ids": [*HISTORY[1:], p1.id]},
+            "telemetry": None,
+            "agent": {"agent_id": "agent-12"},
+        },
+        base=p1.id,
+        header={"source_agent_id": "dev", "target_agent_id": "qa"},
+    )
+    assert p2.size == len(p2.raw)
+    ops = deltas.diff(p1.head, p1.rendered, p2.head, p2.rendered)
+    assert not any(op["path"].startswith("/global") for op in ops)
+    assert _apply(json.loads(p1.raw), ops) == json.loads(p2.raw)
+    # changed layers are diffed once per (layer, base version, target version)
+    assert deltas.diff(p1.head, p1.rendered, p2.head, p2.rendered) == ops
+    assert deltas.stats()["hits"] >= 2
+
+
+@pytest.fixture
+def context_client(data_root: Path) -> Iterator[TestClient]:
+    main = importlib.import_module("mlcp.context.main")
+    with TestClient(main.app) as c:
+        yield c
+
+
+def test_delta_endpoint(context_client: TestClient) -> None:
+    layers = {"temporal": {"previous_context_ids": HISTORY}, "task": {"title": "x" * 500}}
+    first = context_client.post("/v1/packets:build", json={"layers": layers})
+    assert first.status_code == 201, first.text
+    base = first.headers["X-Packet-Id"]
+    body = {"base": base, "layers": {"temporal": {"previous_context_ids": [*HISTORY, base]}}}
+    second = context_client.post("/v1/packets:build", json=body)
+    target = second.headers["X-Packet-Id"]
+    url = f"/v1/packets/{target}:delta"
+
+    r = context_client.get(url, params={"base": base})
+    assert r.status_code == 226
+    assert r.headers["IM"] == "json-patch"
+    assert r.headers["Delta-Base"] == base
+    assert len(r.content) < len(second.content)
+    assert _apply(first.json(), r.json()) == second.json()
+
+    full = context_client.get(url, params={"base": "ctx-evicted"})
+    assert full.status_code == 200
+    assert full.headers["X-Delta"] == "full"
+    assert full.content == second.content
+    assert context_client.get("/v1/packets/ctx-nope:delta", params={"base": base}).status_code == 404
@@ -0,0 +1,113 @@
+from __future__ import annotations
+
+import json
+from hashlib import sha256
+from typing import Any
+
+import pytest
+
+from mlcp.context.fragments import REDACTED, FragmentCache, VersionConflict, canonical
+from mlcp.context.global_layer import global_fragment
+from mlcp.context.packets import PacketBuilder, PacketError
+
+TASK = {"title": "Search", "priority": "high", "metadata": {"estimated_tokens": 7000}}
+AGENT = {"agent_id": "agent-12", "role_category": "Developer"}
+
+
+@pytest.fixture
+def builder() -> PacketBuilder:
+    return PacketBuilder(FragmentCache(64), max_packets=16)
+
+
+def test_intern_is_content_addressed() -> None:
+    cache = FragmentCache(8)
+    a = cache.intern("task", {"b": 1, "a": [1, 2]})
+    b = cache.intern("task", {"a": [1, 2], "b": 1})
+    assert a is b
+    assert a.raw == b'{"a":[1,2],"b":1}'
+    assert a.version == sha256(a.raw).hexdigest()
+    assert cache.get("task", a.version) is a
+    assert cache.get("agent", a.version) is None
+
+
+def test_caller_versions_must_keep_their_content() -> None:
+    cache = FragmentCache(8)
+    first = cache.intern("task", TASK, "rev-1")
+    assert first.version == "rev-1"
+    assert cache.intern("task", dict(TASK), "rev-1") is first
+    with pytest.raises(VersionConflict):
+        cache.intern("task", {**TASK, "priority": "low"}, "rev-1")
+
+
+def test_canonical_rejects_non_finite_numbers() -> None:
+    with pytest.raises(ValueError):
+        canonical({"x": float("nan")})
+
+
+def test_derived_fragments_are_memoized() -> None:
+    cache = FragmentCache(8)
+    frag = cache.intern("task", TASK)
+    calls: list[Any] = []
+
+    def upper(data: Any) -> Any:
+        calls.append(data)
+        return {**data, "title": data["title"].upper()}
+
+    first = cache.derive(frag, "upper", upper)
+    assert cache.derive(frag, "upper", upper) is first
+    assert len(calls) == 1
+    assert first.data["title"] == "SEARCH"
+    assert first.version == sha256(first.raw).hexdigest()
+
+
+def test_packets_share_unchanged_layers(builder: PacketBuilder) -> None:
+    p1 = builder.build({"task": TASK, "agent": AGENT}, header={"task_id": "t-1"})
+    assert p1.layers["global"] is global_fragment()
+    p2 = builder.build({"agent": {**AGENT, "agent_id": "agent-13"}}, base=p1.id)
+    assert p2.layers["task"] is p1.layers["task"]
+    assert p2.layers["agent"] is not p1.layers["agent"]
+    assert p2.header == {"task_id": "t-1"}
+
+    body = json.loads(p2.raw)
+    assert body["id"] == p2.id and body["task_id"] == "t-1"
+    assert body["global"] == global_fragment().data
+    assert body["task"] == TASK
+    assert body["agent"]["agent_id"] == "agent-13"
+
+    p3 = builder.build({"agent": None}, base=p2.id)
+    assert "agent" not in json.loads(p3.raw)
+
+
+def test_layers_by_reference(builder: PacketBuilder) -> None:
+    frag = builder.register("task", TASK, "rev-7")
+    packet = builder.build({"task": {"$ref": "rev-7"}})
+    assert packet.layers["task"] is frag
+
+    with pytest.raises(PacketError) as missing:
+        builder.build({"task": {"$ref": "rev-8"}})
+    assert (missing.value.code, missing.value.status_code) == ("unknown_fragment", 404)
+    with pytest.raises(PacketError) as conflict:
+        builder.register("task", {"title": "other"}, "rev-7")
+    assert conflict.value.status_code == 409
+
+
+def test_global_and_unknown_layers_are_rejected(builder: PacketBuilder) -> None:
+    with pytest.raises(PacketError) as immutable:
+        builder.build({"global": {"protocol_version": "9"}})
+    assert immutable.value.status_code == 403
+    with pytest.raises(PacketError) as unknown:
+        builder.build({"bogus": {}})
+    assert unknown.value.code == "unknown_layer"
+    with pytest.raises(PacketError) as base:
+        builder.build({}, base="ctx-missing")
+    assert base.value.status_code == 404
+
+
+def test_security_redactions_apply_to_the_rendered_layer(builder: PacketBuilder) -> None:
+    packet = builder.build({"task": TASK, "security": {"redact_fields": ["task.priority"]}})
+    assert packet.layers["task"].data["priority"] == "high"
+    assert packet.rendered["task"].data["priority"] == REDACTED
+    assert json.loads(packet.raw)["task"]["priority"] == REDACTED
+
+    again = builder.build({}, base=packet.id)
+    assert again.rendered["task"] is packet.rendered["task"]
@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+import json
+import sqlite3
+from pathlib import Path
+
+import pytest
+
+from mlcp.api import db
+from mlcp.api.plan_codec import decode_gates, decompress_body
+from mlcp.api.plan_validate import GATE_ORDER
+
+GATE = GATE_ORDER[0]
+
+PLAN_H = {
+    "nodes": [{"id": "h1", "role": "Developer"}, {"id": "h2", "role": "Tester"}],
+    "edges": [["h1", "h2"]],
+}
+PLAN_G = {"nodes": [{"id": "g1", "role": "Architect"}], "edges": []}
+
+
+def _v3_database(path: Path) -> None:
+    """A schema-v3 database where runs "a" and "b" both sealed plan H, and a@1 sealed plan G."""
+    conn = sqlite3.connect(path, isolation_level=None)
+    for version in range(3):
+        for step in db._MIGRATIONS[version]:
+            assert isinstance(step, str)
+            conn.execute(step)
+    conn.execute("PRAGMA user_version=3")
+    for run in ("a", "b"):
+        conn.execute(
+            "INSERT INTO runs VALUES (?, 'sealed', 'g', 'mlcp', 'op', 1, ?, ?)",
+            (run, "2025-01-01", "2025-01-01"),
+        )
+    # H is stored at (b, 1) and (a, 2): MIN(run_id), MIN(plan_version) would pick (a, 1) = G
+    sealed = [
+        ("b", 1, "H", "2025-01-01T00:00:00", PLAN_H),
+        ("a", 1, "G", "2025-01-02T00:00:00", PLAN_G),
+        ("a", 2, "H", "2025-01-03T00:00:00", PLAN_H),
+    ]
+    for run, version, plan_hash, created, plan in sealed:
+        conn.execute("INSERT INTO plans VALUES (?, ?, ?, ?)", (run, version, plan_hash, created))
+        conn.execute("INSERT INTO plan_json VALUES (?, ?, ?)", (run, version, json.dumps(plan)))
+        for i, node in enumerate(plan["nodes"]):
+            conn.execute(
+                "INSERT INTO plan_nodes VALUES (?, ?, ?, ?, 2, 60000, ?, ?, ?, 0, 0)",
+                (run, version, node["id"], node["role"], json.dumps([GATE]), i, i),
+            )
+        for src, dst in plan["edges"]:
+            conn.execute("INSERT INTO plan_edges VALUES (?, ?, ?, ?)", (run, version, src, dst))
+    conn.close()
+
+
+def test_v4_migration_keeps_each_hash_with_its_own_rows(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setenv("DATA_ROOT", str(tmp_path))
+    path = tmp_path / "db" / "mlcp.db"
+    path.parent.mkdir()
+    _v3_database(path)
+
+    db.init_db()
+
+    conn = sqlite3.connect(path)
+    assert conn.execute("PRAGMA user_version").fetchone()[0] == db.SCHEMA_VERSION
+    bodies = {
+        h: json.loads(decompress_body(z))
+        for h, z in conn.execute("SELECT plan_hash, body_z FROM plan_bodies")
+    }
+    assert bodies == {"H": PLAN_H, "G": PLAN_G}
+    for plan_hash, plan in (("H", PLAN_H), ("G", PLAN_G)):
+        rows = conn.execute(
+            "SELECT node_id, role, retries, timeout_ms, gates_mask, topo_index"
+            " FROM plan_body_nodes WHERE plan_hash = ? ORDER BY topo_index",
+            (plan_hash,),
+        ).fetchall()
+        assert [(r[0], r[1]) for r in rows] == [(n["id"], n["role"]) for n in plan["nodes"]]
+        for node_id, _, retries, timeout_ms, gates_mask, topo_index in rows:
+            assert (retries, timeout_ms, decode_gates(gates_mask)) == (2, 60000, [GATE]), node_id
+        edges = conn.execute(
+            "SELECT src, dst FROM plan_body_edges WHERE plan_hash = ?", (plan_hash,)
+        ).fetchall()
+        assert sorted(edges) == sorted(tuple(e) for e in plan["edges"])
+    created = conn.execute("SELECT created_at FROM plan_bodies WHERE plan_hash = 'H'").fetchone()
+    assert created[0] == "2025-01-01T00:00:00"
+    conn.close()
@@ -0,0 +1,75 @@
+from __future__ import annotations
+
+import sqlite3
+from pathlib import Path
+
+from conftest import Seal
+from fastapi.testclient import TestClient
+
+from mlcp.api.frontier import FRONTIER, NodeMeta, RunFrontier
+
+EDGES = [("a", "b"), ("a", "c"), ("b", "d"), ("c", "d")]
+
+
+def _diamond(status: dict[str, str] | None = None) -> RunFrontier:
+    meta = {n: NodeMeta(role="developer", retries=0, timeout_ms=1000, gates=[]) for n in "abcd"}
+    return RunFrontier.build(meta, EDGES, status or {})
+
+
+def test_nodes_are_released_when_all_predecessors_complete() -> None:
+    rf = _diamond()
+    assert rf.ready_ids() == ["a"]
+    assert rf.update({"a": "complete"}) == (["b", "c"], ["a"])
+    assert rf.apply("b", "complete") == []
+    assert rf.ready_ids() == ["c"]
+    assert rf.apply("c", "complete") == ["d"]
+    assert rf.update({"d": "failed"}) == ([], ["d"])
+    assert rf.ready_ids() == []
+
+
+def test_failing_a_completed_node_blocks_its_successors_again() -> None:
+    rf = _diamond({"a": "complete"})
+    assert rf.ready_ids() == ["b", "c"]
+    assert rf.update({"a": "failed"}) == ([], ["b", "c"])
+    assert rf.ready_ids() == []
+
+
+def test_hydration_counts_completed_predecessors() -> None:
+    rf = _diamond({"a": "complete", "b": "complete"})
+    assert rf.ready_ids() == ["c"]
+    assert rf.remaining["d"] == 1
+
+
+def test_frontier_follows_task_updates(client: TestClient, seal: Seal) -> None:
+    run_id, _ = seal()
+    url = f"/v1/runs/{run_id}/frontier"
+    assert [n["node_id"] for n in client.get(url).json()] == ["a"]
+    client.post(f"/v1/runs/{run_id}/tasks/a:complete").raise_for_status()
+    assert [n["node_id"] for n in client.get(url).json()] == ["b", "c"]
+
+
+def test_writes_from_another_process_are_picked_up(
+    client: TestClient, seal: Seal, data_root: Path
+) -> None:
+    run_id, version = seal()
+    url = f"/v1/runs/{run_id}/frontier"
+    assert [n["node_id"] for n in client.get(url).json()] == ["a"]
+
+    # another API worker completes `a` through its own connection
+    other = sqlite3.connect(data_root / "db" / "mlcp.db", isolation_level=None)
+    other.execute(
+        "INSERT INTO run_tasks(run_id, plan_version, node_id, status, updated_at)"
+        " VALUES (?, ?, 'a', 'complete', '2025-01-01T00:00:00+00:00')",
+        (run_id, version),
+    )
+    other.close()
+
+    assert [n["node_id"] for n in client.get(url).json()] == ["b", "c"]
+
+
+def test_unknown_version_is_404_and_not_cached(client: TestClient, seal: Seal) -> None:
+    run_id, _ = seal()
+    r = client.get(f"/v1/runs/{run_id}/frontier", params={"version": 7})
+    assert r.status_code == 404
+    assert r.json()["detail"] == "plan_not_found"
+    assert FRONTIER._cache.get((run_id, 7)) is None
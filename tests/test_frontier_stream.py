@@ -0,0 +1,158 @@
+from __future__ import annotations
+
+import asyncio
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any
+
+import pytest
+from conftest import Seal
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+
+from mlcp.api.routes import runs
+
+
+def _poll(client: TestClient, run_id: str, **params: Any) -> dict[str, Any]:
+    r = client.get(f"/v1/runs/{run_id}/frontier:poll", params={"timeout_sec": 0, **params})
+    assert r.status_code == 200, r.text
+    return dict(r.json())
+
+
+def _ids(body: dict[str, Any]) -> list[str]:
+    return [n["node_id"] for n in body["nodes"]]
+
+
+def test_poll_cursor_returns_only_new_ready_nodes(client: TestClient, seal: Seal) -> None:
+    run_id, _ = seal()
+    first = _poll(client, run_id)
+    assert first["reset"] is True and _ids(first) == ["a"]
+
+    idle = _poll(client, run_id, since=first["cursor"])
+    assert idle["reset"] is False and _ids(idle) == []
+    assert idle["cursor"] == first["cursor"]
+
+    client.post(f"/v1/runs/{run_id}/tasks/a:complete").raise_for_status()
+    moved = _poll(client, run_id, since=first["cursor"])
+    assert moved["reset"] is False and _ids(moved) == ["b", "c"]
+    assert _ids(_poll(client, run_id, since=moved["cursor"])) == []
+
+
+def test_poll_with_foreign_cursor_resets_to_full_frontier(client: TestClient, seal: Seal) -> None:
+    run_id, _ = seal()
+    client.post(f"/v1/runs/{run_id}/tasks/a:complete").raise_for_status()
+    for cursor in ("bogus", "0.0", "999999.1"):
+        body = _poll(client, run_id, since=cursor)
+        assert body["reset"] is True and _ids(body) == ["b", "c"], cursor
+
+
+def test_poll_wakes_for_writes_from_another_process(
+    client: TestClient, seal: Seal, data_root: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(runs, "FRONTIER_RESYNC_SEC", 0.05)
+    run_id, version = seal()
+    cursor = _poll(client, run_id)["cursor"]
+
+    def other_worker() -> None:
+        time.sleep(0.2)
+        conn = sqlite3.connect(data_root / "db" / "mlcp.db", isolation_level=None)
+        conn.execute(
+            "INSERT INTO run_tasks(run_id, plan_version, node_id, status, updated_at)"
+            " VALUES (?, ?, 'a', 'complete', '2025-01-01T00:00:00+00:00')",
+            (run_id, version),
+        )
+        conn.close()
+
+    writer = threading.Thread(target=other_worker)
+    writer.start()
+    started = time.monotonic()
+    body = _poll(client, run_id, since=cursor, timeout_sec=10)
+    writer.join()
+    assert _ids(body) == ["b", "c"]
+    assert time.monotonic() - started < 5
+
+
+class _Request:
+    """Just enough of a Request for stream_frontier: app state and a disconnect after `polls`."""
+
+    def __init__(self, polls: int, streams: int = 0) -> None:
+        self.app = SimpleNamespace(state=SimpleNamespace(frontier_streams=streams))
+        self._polls = polls
+
+    async def is_disconnected(self) -> bool:
+        self._polls -= 1
+        return self._polls < 0
+
+
+async def _events(
+    request: _Request, run_id: str, last_event_id: str | None = None, limit: int = 1
+) -> list[tuple[str, str, str]]:
+    """The first `limit` (event, id, data) triples of a stream."""
+    resp = await runs.stream_frontier(
+        request,  # type: ignore[arg-type]
+        run_id=run_id,
+        since=None,
+        version=None,
+        last_event_id=last_event_id,
+    )
+    out: list[tuple[str, str, str]] = []
+    async for chunk in resp.body_iterator:
+        text = chunk if isinstance(chunk, str) else bytes(chunk).decode()
+        if text.startswith("event:"):
+            fields = dict(line.split(": ", 1) for line in text.strip().splitlines())
+            out.append((fields["event"], fields["id"], fields["data"]))
+            if len(out) == limit:
+                break
+    await resp.body_iterator.aclose()  # type: ignore[attr-defined]
+    return out
+
+
+def test_stream_snapshot_then_ready_and_resume(client: TestClient, seal: Seal) -> None:
+    run_id, _ = seal()
+
+    async def scenario() -> None:
+        [(event, cursor, data)] = await _events(_Request(polls=5), run_id)
+        assert event == "snapshot" and '"node_id":"a"' in data
+
+        async def complete_a() -> None:
+            await asyncio.sleep(0.05)
+            await runs.run_db(runs._upsert_task_status, run_id, 1, "a", "complete")
+
+        task = asyncio.create_task(complete_a())
+        # open a stream from the snapshot cursor; completing `a` pushes a ready event
+        [(event, resumed, data)] = await _events(_Request(polls=5), run_id, last_event_id=cursor)
+        await task
+        assert event == "ready" and resumed != cursor
+        assert '"node_id":"b"' in data and '"node_id":"c"' in data and '"node_id":"a"' not in data
+
+        # an id from another epoch (or garbage) cannot be resumed: start over with a snapshot
+        [(event, _, data)] = await _events(_Request(polls=5), run_id, last_event_id="bogus")
+        assert event == "snapshot" and '"node_id":"b"' in data
+
+    asyncio.run(scenario())
+
+
+def test_stream_slots_are_capped_and_released(client: TestClient, seal: Seal) -> None:
+    run_id, _ = seal()
+
+    async def scenario() -> None:
+        full = _Request(polls=1, streams=runs.FRONTIER_MAX_STREAMS)
+        with pytest.raises(HTTPException) as exc:
+            await runs.stream_frontier(
+                full,  # type: ignore[arg-type]
+                run_id=run_id,
+                since=None,
+                version=None,
+                last_event_id=None,
+            )
+        assert exc.value.status_code == 503
+        assert full.app.state.frontier_streams == runs.FRONTIER_MAX_STREAMS
+
+        request = _Request(polls=1)
+        await _events(request, run_id)
+        assert request.app.state.frontier_streams == 0
+
+    asyncio.run(scenario())
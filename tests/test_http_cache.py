@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+from itertools import pairwise
+
+from conftest import DIAMOND, Seal, plan
+from fastapi.testclient import TestClient
+
+from mlcp.api.http_cache import CACHE_IMMUTABLE, CACHE_REVALIDATE, match_etag
+
+IDENTITY = {"Accept-Encoding": "identity"}
+
+
+def test_match_etag_is_weak_and_accepts_either_encoding() -> None:
+    assert match_etag('W/"abc"', '"abc"') == '"abc"'
+    assert match_etag('"x", "abc-gz"', '"abc"') == '"abc-gz"'
+    assert match_etag("*", '"abc"') == '"abc"'
+    assert match_etag('"abd"', '"abc"') is None
+    assert match_etag(None, '"abc"') is None
+
+
+def test_pinned_norm_json_is_immutable_and_revalidates(client: TestClient, seal: Seal) -> None:
+    run_id, version = seal()
+    url = f"/v1/runs/{run_id}/plan:norm.json"
+    r = client.get(url, params={"version": version}, headers=IDENTITY)
+    assert r.status_code == 200
+    assert r.headers["Cache-Control"] == CACHE_IMMUTABLE
+    assert r.headers["X-Plan-Version"] == str(version)
+    etag = r.headers["ETag"]
+
+    headers = {**IDENTITY, "If-None-Match": etag}
+    again = client.get(url, params={"version": version}, headers=headers)
+    assert again.status_code == 304
+    assert again.headers["ETag"] == etag
+    assert again.content == b""
+
+
+def test_latest_norm_json_etag_changes_on_identical_reseal(
+    client: TestClient, seal: Seal
+) -> None:
+    run_id, _ = seal()
+    url = f"/v1/runs/{run_id}/plan:norm.json"
+    first = client.get(url, headers=IDENTITY)
+    assert first.headers["Cache-Control"] == CACHE_REVALIDATE
+    etag = first.headers["ETag"]
+    assert client.get(url, headers={**IDENTITY, "If-None-Match": etag}).status_code == 304
+
+    seal(DIAMOND, run_id)
+    second = client.get(url, headers={**IDENTITY, "If-None-Match": etag})
+    assert second.status_code == 200
+    assert second.headers["X-Plan-Version"] == "2"
+    assert second.headers["ETag"] != etag
+    assert second.content == first.content
+
+
+def test_gzip_variant_has_its_own_validator(client: TestClient, seal: Seal) -> None:
+    nodes = [f"n{i:03d}" for i in range(40)]
+    run_id, _ = seal(plan(list(pairwise(nodes)), *nodes))
+    url = f"/v1/runs/{run_id}/plan:norm.json"
+    plain = client.get(url, headers=IDENTITY)
+    gz = client.get(url, headers={"Accept-Encoding": "gzip"})
+    assert gz.headers["Content-Encoding"] == "gzip"
+    assert gz.headers["ETag"] == plain.headers["ETag"][:-1] + '-gz"'
+    assert gz.content == plain.content
+    hit = client.get(url, headers={"Accept-Encoding": "gzip", "If-None-Match": gz.headers["ETag"]})
+    assert hit.status_code == 304
+
+
+def test_plan_versions_etag_follows_new_versions(client: TestClient, seal: Seal) -> None:
+    run_id, _ = seal()
+    url = f"/v1/runs/{run_id}/plan:versions"
+    r = client.get(url, headers=IDENTITY)
+    assert [v["version"] for v in r.json()] == [1]
+    etag = r.headers["ETag"]
+    assert client.get(url, headers={**IDENTITY, "If-None-Match": etag}).status_code == 304
+    seal(DIAMOND, run_id)
+    r = client.get(url, headers={**IDENTITY, "If-None-Match": etag})
+    assert r.status_code == 200
+    assert [v["version"] for v in r.json()] == [1, 2]
@@ -0,0 +1,109 @@
+from __future__ import annotations
+
+import os
+import re
+from pathlib import Path
+
+import pytest
+
+from mlcp.common.config import CONFIG_DIR
+from mlcp.kernel.policy import PolicyCache, PolicyError, _glob_regex, compile_policy
+
+CONFIG = (CONFIG_DIR / "agentic_kernel.yaml").read_text(encoding="utf-8")
+
+
+TABLE = compile_policy(CONFIG.encode("utf-8"))
+
+
+@pytest.mark.parametrize(
+    ("glob", "matches", "misses"),
+    [
+        ("src/*.py", ["src/a.py"], ["src/x/a.py", "src/a.pyc", "a.py"]),
+        ("**/*.md", ["a.md", "docs/x/a.md"], ["a.py", "docs/a.md/x"]),
+        ("docs/**", ["docs", "docs/a", "docs/a/b.md"], ["docsx", "x/docs"]),
+        ("./**", ["a", "a/b/c"], []),
+        ("/etc/?.conf", ["/etc/a.conf"], ["/etc/ab.conf", "/etc/x/a.conf"]),
+        ("a+b/(c).txt", ["a+b/(c).txt"], ["aab/c.txt"]),
+    ],
+)
+def test_glob_regex(glob: str, matches: list[str], misses: list[str]) -> None:
+    rx = re.compile(_glob_regex(glob))
+    assert [p for p in matches if not rx.fullmatch(p)] == []
+    assert [p for p in misses if rx.fullmatch(p)] == []
+
+
+@pytest.mark.parametrize(
+    ("role", "syscall", "kwargs", "reason"),
+    [
+        ("Developer", "openPullRequest", {}, None),
+        ("Developer", "spawn", {}, "syscall_not_allowed"),
+        ("Nobody", "read", {"path": "a"}, "unknown_role"),
+        ("Developer", "teleport", {}, "unknown_syscall"),
+        ("Developer", "readContext", {"layer": "task"}, None),
+        ("Developer", "readContext", {"layer": "global"}, "layer_not_permitted"),
+        ("Developer", "readContext", {}, "layer_required"),
+        ("ProductOwner", "updateContext", {}, "layer_required"),
+        ("ProductOwner", "updateContext", {"layer": "temporal"}, "layer_not_permitted"),
+        ("Developer", "sendEvent", {"layer": "task"}, "layer_not_applicable"),
+        ("Developer", "read", {"path": "src/a.py"}, None),
+        ("Developer", "write", {"path": "./a/../b"}, None),
+        ("Developer", "read", {}, "path_required"),
+        ("Developer", "write", {}, "path_required"),
+        ("Developer", "read", {"path": "../etc/passwd"}, "outside_pwd"),
+        ("Developer", "read", {"path": "a/../../b"}, "outside_pwd"),
+        ("Developer", "read", {"path": ".."}, "outside_pwd"),
+        ("Developer", "read", {"path": "/etc/passwd"}, "path_not_permitted"),
+        ("Developer", "sendEvent", {"path": "a"}, "path_not_applicable"),
+    ],
+)
+def test_authorize(role: str, syscall: str, kwargs: dict[str, str], reason: str | None) -> None:
+    decision = TABLE.authorize(role, syscall, **kwargs)
+    assert (decision.allowed, decision.reason) == (reason is None, reason)
+
+
+def _write(path: Path, text: str, bump: int) -> None:
+    path.write_text(text, encoding="utf-8")
+    st = path.stat()
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + bump * 1_000_000_000))
+
+
+@pytest.fixture
+def cache(tmp_path: Path) -> PolicyCache:
+    path = tmp_path / "agentic_kernel.yaml"
+    _write(path, CONFIG, 0)
+    return PolicyCache(path, check_sec=0)
+
+
+def test_reload_picks_up_changes(cache: PolicyCache) -> None:
+    before = cache.current()
+    assert not before.authorize("Developer", "spawn").allowed
+    spawning = CONFIG.replace("      - sendMessage\n", "      - sendMessage\n      - spawn\n", 1)
+    _write(cache.path, spawning, 1)
+    after = cache.current()
+    assert after.version != before.version
+    assert after.authorize("Developer", "spawn").allowed
+
+
+@pytest.mark.parametrize(
+    "broken",
+    ["agent_roles: [unclosed", "agent_roles: [Developer]", CONFIG + "\nsyscall_policies: [read]\n"],
+)
+def test_broken_config_keeps_previous_table(cache: PolicyCache, broken: str) -> None:
+    before = cache.current()
+    _write(cache.path, broken, 1)
+    assert cache.current() is before
+    assert cache.current() is before  # rechecks do not raise either
+
+
+def test_unreadable_config_keeps_previous_table(cache: PolicyCache) -> None:
+    before = cache.current()
+    cache.path.unlink()
+    cache.path.mkdir()  # stat succeeds, read_bytes raises IsADirectoryError
+    assert cache.current() is before
+
+
+def test_broken_config_at_startup_raises(tmp_path: Path) -> None:
+    path = tmp_path / "agentic_kernel.yaml"
+    _write(path, "syscall_policies: [read]\nagent_roles: {}\n", 0)
+    with pytest.raises(PolicyError):
+        PolicyCache(path, check_sec=0).current()
@@ -0,0 +1,100 @@
+from __future__ import annotations
+
+from conftest import DIAMOND, Seal, plan
+from fastapi.testclient import TestClient
+
+from mlcp.api.db import connect
+from mlcp.api.frontier import FRONTIER, RunFrontier
+from mlcp.api.leases import claim, heartbeat
+
+NOW = 1_000_000.0
+
+
+def _frontier(run_id: str, version: int) -> RunFrontier:
+    rf = FRONTIER.get(connect(), run_id, version)
+    assert rf is not None
+    return rf
+
+
+def test_claim_leases_ready_nodes_once(seal: Seal) -> None:
+    run_id, version = seal(plan([], "a", "b", "c"))
+    rf = _frontier(run_id, version)
+    first, _ = claim(connect(), rf, run_id, version, "w1", None, 2, NOW)
+    assert [(x.node_id, x.worker_id, x.attempt) for x in first] == [("a", "w1", 1), ("b", "w1", 1)]
+    assert first[0].expires_at == NOW + 60.0
+
+    second, _ = claim(connect(), rf, run_id, version, "w2", None, 2, NOW)
+    assert [x.node_id for x in second] == ["c"]
+    assert claim(connect(), rf, run_id, version, "w3", None, 2, NOW) == ([], [])
+
+
+def test_claim_filters_by_role(seal: Seal) -> None:
+    body = plan([], "a", "b")
+    body["nodes"][0]["role"] = "tester"
+    run_id, version = seal(body)
+    rf = _frontier(run_id, version)
+    leases, _ = claim(connect(), rf, run_id, version, "w", "developer", 5, NOW)
+    assert [x.node_id for x in leases] == ["b"]
+
+
+def test_expired_lease_is_reclaimed_then_exhausted(seal: Seal) -> None:
+    body = plan([("a", "b")], "a", "b", a=1000)
+    body["nodes"][0]["retries"] = 0
+    run_id, version = seal(body)
+    rf = _frontier(run_id, version)
+    (lease,), _ = claim(connect(), rf, run_id, version, "w1", None, 1, NOW)
+
+    # no retries: the one attempt is spent once the lease expires
+    assert claim(connect(), rf, run_id, version, "w2", None, 1, NOW + 0.5) == ([], [])
+    assert claim(connect(), rf, run_id, version, "w2", None, 1, NOW + 1) == ([], ["a"])
+    assert rf.status["a"] == "failed"
+    assert rf.ready_ids() == []
+    assert heartbeat(connect(), rf, run_id, version, "a", lease.lease_id, NOW + 1) is None
+
+
+def test_expired_lease_with_retries_left_is_requeued(seal: Seal) -> None:
+    run_id, version = seal(plan([], "a", a=1000))  # retries default to 1
+    rf = _frontier(run_id, version)
+    (first,), _ = claim(connect(), rf, run_id, version, "w1", None, 1, NOW)
+    (second,), failed = claim(connect(), rf, run_id, version, "w2", None, 1, NOW + 1)
+    assert failed == []
+    assert (second.worker_id, second.attempt) == ("w2", 2)
+    assert second.lease_id != first.lease_id
+    assert heartbeat(connect(), rf, run_id, version, "a", first.lease_id, NOW + 1) is None
+
+
+def test_heartbeat_extends_a_live_lease(seal: Seal) -> None:
+    run_id, version = seal(plan([], "a", a=1000))
+    rf = _frontier(run_id, version)
+    (lease,), _ = claim(connect(), rf, run_id, version, "w", None, 1, NOW)
+    extended = heartbeat(connect(), rf, run_id, version, "a", lease.lease_id, NOW + 0.9)
+    assert extended is not None and extended.expires_at == NOW + 1.9
+    assert claim(connect(), rf, run_id, version, "w2", None, 1, NOW + 1.5) == ([], [])
+
+
+def test_claim_skips_nodes_finished_behind_a_lagging_frontier(seal: Seal) -> None:
+    run_id, version = seal(plan([], *"abcdef"))
+    stale = RunFrontier.build(_frontier(run_id, version).meta, [], {})
+    # finished elsewhere: the first max_nodes * 2 candidates of the stale frontier
+    connect().executemany(
+        "INSERT INTO run_tasks(run_id, plan_version, node_id, status, updated_at)"
+        " VALUES (?, ?, ?, 'complete', '2025-01-01T00:00:00+00:00')",
+        [(run_id, version, n) for n in "abcd"],
+    )
+    leases, _ = claim(connect(), stale, run_id, version, "w", None, 2, NOW)
+    assert [x.node_id for x in leases] == ["e", "f"]
+
+
+def test_claim_endpoint(client: TestClient, seal: Seal) -> None:
+    run_id, version = seal(DIAMOND)
+    url = f"/v1/runs/{run_id}/frontier:claim"
+    body = client.post(url, params={"max": 5, "worker_id": "w1"}).json()
+    assert body["plan_version"] == version
+    assert [x["node_id"] for x in body["leases"]] == ["a"]
+    assert client.post(url, params={"worker_id": "w2"}).json()["leases"] == []
+
+    lease_id = body["leases"][0]["lease_id"]
+    hb = client.post(f"/v1/runs/{run_id}/tasks/a:heartbeat", params={"lease_id": lease_id})
+    assert hb.status_code == 200 and hb.json()["worker_id"] == "w1"
+    lost = client.post(f"/v1/runs/{run_id}/tasks/a:heartbeat", params={"lease_id": "nope"})
+    assert lost.status_code == 409
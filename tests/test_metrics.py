@@ -0,0 +1,20 @@
+from __future__ import annotations
+
+from conftest import Seal
+from fastapi.testclient import TestClient
+
+from mlcp.common.metrics import SQL_BUCKETS
+
+
+def test_sql_buckets_are_exported_once_not_per_statement(
+    client: TestClient, seal: Seal
+) -> None:
+    seal()
+    text = client.get("/metrics").text
+    lines = text.splitlines()
+    statements = [ln for ln in lines if ln.startswith("mlcp_sql_statements_total{")]
+    timings = [ln for ln in lines if ln.startswith("mlcp_sql_statement_seconds_total{")]
+    assert len(statements) > 1
+    assert len(timings) == len(statements)
+    assert sum(ln.startswith("mlcp_sql_seconds_bucket{") for ln in lines) == len(SQL_BUCKETS) + 1
+    assert not any('statement="' in ln for ln in lines if "_bucket{" in ln)
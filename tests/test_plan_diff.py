@@ -0,0 +1,71 @@
+from __future__ import annotations
+
+import copy
+from typing import Any
+
+from conftest import DIAMOND, Seal, plan
+from fastapi.testclient import TestClient
+
+from mlcp.api.plan_diff import diff_plans
+from mlcp.api.plan_normalize import normalize_plan
+
+
+def _edited(**timeouts: int) -> dict[str, Any]:
+    body = copy.deepcopy(DIAMOND)
+    for n in body["nodes"]:
+        n["timeout_ms"] = timeouts.get(n["id"], n["timeout_ms"])
+    return body
+
+
+def test_diff_marks_descendants_of_a_changed_node_unstable() -> None:
+    d = diff_plans(normalize_plan(DIAMOND), normalize_plan(_edited(b=1000)))
+    assert d.nodes_changed == ["b"]
+    assert (d.nodes_added, d.nodes_removed, d.edges_added, d.edges_removed) == ([], [], [], [])
+    assert d.stable == ["a", "c"]
+
+
+def test_diff_of_added_and_removed_edges() -> None:
+    old = plan([("a", "b"), ("b", "c")], "a", "b", "c")
+    new = plan([("a", "b"), ("a", "c"), ("c", "e")], "a", "b", "c", "e")
+    d = diff_plans(normalize_plan(old), normalize_plan(new))
+    assert d.nodes_added == ["e"]
+    assert d.edges_added == [("a", "c"), ("c", "e")]
+    assert d.edges_removed == [("b", "c")]
+    # c lost its predecessor b, so its ancestor set changed
+    assert d.stable == ["a", "b"]
+
+
+def test_reseal_carries_over_stable_completed_nodes(client: TestClient, seal: Seal) -> None:
+    run_id, _ = seal()
+    for n in ("a", "b", "c"):
+        client.post(f"/v1/runs/{run_id}/tasks/{n}:complete").raise_for_status()
+
+    r = client.post(f"/v1/runs/{run_id}/plan:seal", json={"plan": _edited(b=1000)})
+    assert r.status_code == 200, r.text
+    assert r.json()["plan_version"] == 2
+    assert r.json()["carried_over"] == 2
+
+    # b changed: it has to run again, and d waits for it
+    frontier = client.get(f"/v1/runs/{run_id}/frontier").json()
+    assert [n["node_id"] for n in frontier] == ["b"]
+
+
+def test_reseal_of_an_identical_plan_carries_everything(client: TestClient, seal: Seal) -> None:
+    run_id, _ = seal()
+    client.post(f"/v1/runs/{run_id}/tasks/a:complete").raise_for_status()
+    _, version = seal(DIAMOND, run_id)
+    assert version == 2
+    frontier = client.get(f"/v1/runs/{run_id}/frontier").json()
+    assert [n["node_id"] for n in frontier] == ["b", "c"]
+
+
+def test_plan_diff_endpoint(client: TestClient, seal: Seal) -> None:
+    run_id, _ = seal()
+    seal(_edited(c=5000), run_id)
+    body = client.get(f"/v1/runs/{run_id}/plan:diff").json()
+    assert (body["from_version"], body["to_version"]) == (1, 2)
+    assert body["from_hash"] != body["to_hash"]
+    assert body["nodes_changed"] == ["c"]
+    assert body["carry_over"] == ["a", "b"]
+
+    assert client.get(f"/v1/runs/{run_id}/plan:diff", params={"to": 9}).status_code == 404
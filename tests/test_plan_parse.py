@@ -0,0 +1,30 @@
+from __future__ import annotations
+
+import pytest
+import yaml
+
+from mlcp.api.plan_validate import _YAML_LOADER, _safe_parse
+
+# JSON texts whose scalars YAML 1.1 resolves differently from the stdlib JSON parser
+CASES = [
+    '{"a": 1E3, "b": 1.5e3, "c": 1.5e+3, "d": 1e-3, "e": 2.5E-2, "f": 1.0, "g": -0}',
+    '{"a": NaN, "b": Infinity, "c": -Infinity}',
+    '{"a": 12345678901234567890, "b": -1.25, "c": [true, false, null]}',
+    '{"a": "\\/x\\u00e9\\t", "a": "last wins"}',
+    '{"nodes": [{"id": "n1", "timeout_ms": 6e4, "retries": 2.0e+0}], "edges": []}',
+]
+
+
+@pytest.mark.parametrize("text", CASES)
+def test_json_fast_path_matches_yaml(text: str) -> None:
+    data, errors = _safe_parse(None, text)
+    assert errors == []
+    expected = yaml.load(text, Loader=_YAML_LOADER)
+    assert data == expected
+    assert [type(v) for v in data.values()] == [type(v) for v in expected.values()]
+
+
+def test_surrogate_escapes_are_rejected_like_yaml() -> None:
+    data, errors = _safe_parse(None, '{"a": "\\ud83d\\ude00"}')
+    assert data is None
+    assert [e.code for e in errors] == ["invalid_format"]
@@ -0,0 +1,65 @@
+from __future__ import annotations
+
+import pytest
+from conftest import Seal, plan
+from fastapi.testclient import TestClient
+
+from mlcp.api.plan_schedule import compute_schedule
+
+# a(10) -> b(30) -> d(10), a -> c(5, tester) -> d
+NODES = [("a", "developer", 10), ("b", "developer", 30), ("c", "tester", 5), ("d", "developer", 10)]
+EDGES = [("a", "b"), ("a", "c"), ("b", "d"), ("c", "d")]
+
+
+def test_cpm_on_a_known_dag() -> None:
+    s = compute_schedule(NODES, EDGES)
+    assert s.makespan_ms == 50
+    assert s.critical_path == ["a", "b", "d"]
+    by_id = {n.node_id: n for n in s.nodes}
+    assert {k: (n.earliest_start_ms, n.latest_start_ms) for k, n in by_id.items()} == {
+        "a": (0, 0),
+        "b": (10, 10),
+        "c": (10, 35),
+        "d": (40, 40),
+    }
+    assert by_id["c"].slack_ms == 25
+    assert {k: n.level for k, n in by_id.items()} == {"a": 0, "b": 1, "c": 1, "d": 2}
+    assert s.level_width == [1, 2, 1]
+    assert [(r.role, r.nodes, r.work_ms, r.max_parallel) for r in s.roles] == [
+        ("developer", 3, 50, 1),
+        ("tester", 1, 5, 1),
+    ]
+    assert s.max_parallel == 2
+
+
+def test_duplicate_edges_and_independent_chains() -> None:
+    s = compute_schedule(
+        [("a", "dev", 5), ("b", "dev", 5), ("x", "dev", 20)], [("a", "b"), ("a", "b")]
+    )
+    assert s.makespan_ms == 20
+    assert s.critical_path == ["x"]
+    assert s.roles[0].max_parallel == 2
+    assert {n.node_id: n.slack_ms for n in s.nodes} == {"a": 10, "b": 10, "x": 0}
+
+
+def test_empty_plan() -> None:
+    s = compute_schedule([], [])
+    assert (s.makespan_ms, s.critical_path, s.nodes, s.max_parallel) == (0, [], [], 0)
+
+
+def test_cycle_is_rejected() -> None:
+    with pytest.raises(ValueError, match="plan_not_acyclic"):
+        compute_schedule([("a", "dev", 1), ("b", "dev", 1)], [("a", "b"), ("b", "a")])
+
+
+def test_plan_analysis_endpoint(client: TestClient, seal: Seal) -> None:
+    body = plan(EDGES, "a", "b", "c", "d", a=10_000, b=30_000, c=5_000, d=10_000)
+    body["nodes"][2]["role"] = "tester"
+    run_id, version = seal(body)
+    r = client.get(f"/v1/runs/{run_id}/plan:analysis")
+    assert r.status_code == 200, r.text
+    out = r.json()
+    assert out["plan_version"] == version
+    assert (out["makespan_ms"], out["critical_path"]) == (50_000, ["a", "b", "d"])
+    assert [n["node_id"] for n in out["nodes"] if n["critical"]] == ["a", "b", "d"]
+    assert client.get(f"/v1/runs/{run_id}/plan:analysis", params={"version": 9}).status_code == 404
@@ -0,0 +1,60 @@
+from __future__ import annotations
+
+from typing import Any
+
+from conftest import Seal
+from fastapi.testclient import TestClient
+
+
+def _batch(client: TestClient, run_id: str, *updates: tuple[str, str]) -> Any:
+    return client.post(
+        f"/v1/runs/{run_id}/tasks:batch",
+        json=[{"node_id": n, "status": s} for n, s in updates],
+    )
+
+
+def test_batch_returns_the_frontier_delta(client: TestClient, seal: Seal) -> None:
+    run_id, version = seal()
+    r = _batch(client, run_id, ("a", "complete"))
+    assert r.status_code == 200, r.text
+    body = r.json()
+    assert body["plan_version"] == version
+    assert [n["node_id"] for n in body["frontier_added"]] == ["b", "c"]
+    assert body["frontier_removed"] == ["a"]
+
+    body = _batch(client, run_id, ("b", "complete"), ("c", "complete")).json()
+    assert [n["node_id"] for n in body["frontier_added"]] == ["d"]
+    assert body["frontier_removed"] == ["b", "c"]
+    frontier = client.get(f"/v1/runs/{run_id}/frontier").json()
+    assert [n["node_id"] for n in frontier] == ["d"]
+
+
+def test_batch_last_update_per_node_wins(client: TestClient, seal: Seal) -> None:
+    run_id, _ = seal()
+    body = _batch(client, run_id, ("a", "failed"), ("a", "complete")).json()
+    assert body["tasks"] == [{"node_id": "a", "status": "complete"}]
+    assert [n["node_id"] for n in body["frontier_added"]] == ["b", "c"]
+
+
+def test_batch_delta_ignores_earlier_writes(client: TestClient, seal: Seal) -> None:
+    run_id, _ = seal()
+    client.post(f"/v1/runs/{run_id}/tasks/a:complete").raise_for_status()
+    body = _batch(client, run_id, ("b", "complete")).json()
+    assert body["frontier_added"] == []
+    assert body["frontier_removed"] == ["b"]
+
+
+def test_batch_with_unknown_node_changes_nothing(client: TestClient, seal: Seal) -> None:
+    run_id, _ = seal()
+    r = _batch(client, run_id, ("a", "complete"), ("zz", "complete"))
+    assert r.status_code == 404
+    assert r.json()["detail"] == [{"code": "node_not_found", "detail": "zz"}]
+    frontier = client.get(f"/v1/runs/{run_id}/frontier").json()
+    assert [n["node_id"] for n in frontier] == ["a"]
+
+
+def test_batch_size_limits(client: TestClient, seal: Seal) -> None:
+    run_id, _ = seal()
+    assert _batch(client, run_id).json()["detail"][0]["code"] == "empty_batch"
+    many = [("a", "complete")] * 501
+    assert _batch(client, run_id, *many).json()["detail"][0]["code"] == "batch_too_large"